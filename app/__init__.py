@@ -1,6 +1,13 @@
 from flask import Flask
 from .extensions import ma, limiter, cache
 from .models import db
+from .migrations import schema_cli
+from .utils.roles import init_auth_cache
+from .utils.passwords import init_password_hasher
+from .utils.instrumentation import init_instrumentation
+from .utils.metrics import init_metrics, use_timed_pool
+from .utils.replicas import init_replicas
+from .utils.json_provider import init_json_provider
 from .blueprints.customers import customers_bp
 from .blueprints.mechanics import mechanics_bp
 from .blueprints.service_tickets import service_tickets_bp
@@ -20,12 +27,19 @@ def create_app(config_name):
 
     app = Flask(__name__)
     app.config.from_object(f"config.{config_name}")
+    init_json_provider(app)
 
     # Initialize extensions
+    use_timed_pool(app)  # Before the engines are created
     db.init_app(app)
+    init_replicas(app)  # Before the limiter and auth hooks, which may query
     ma.init_app(app)
     limiter.init_app(app)
     cache.init_app(app)
+    init_auth_cache(app)
+    init_password_hasher(app)
+    init_instrumentation(app)
+    init_metrics(app, cache, limiter)
 
     # Import and register blueprints
     app.register_blueprint(customers_bp, url_prefix="/customers")
@@ -35,4 +49,7 @@ def create_app(config_name):
     app.register_blueprint(fakedata_bp, url_prefix="/fakedata")
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
+    # Register CLI commands
+    app.cli.add_command(schema_cli)
+
     return app
@@ -0,0 +1,93 @@
+# Async deployment mode: the read-heavy GET routes run as coroutines on the
+# SQLAlchemy asyncio engine, every other request goes to the sync Flask app.
+# Serve it with an ASGI server, e.g. `uvicorn asgi:asgi_app --workers 4`.
+import io
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask import request
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from app.utils.async_db import ASYNC_VIEWS, init_async_db
+
+
+def _build_environ(scope):
+    """The WSGI environ of a GET request, built the way WsgiToAsgi builds it."""
+    instance = WsgiToAsgiInstance(None)
+    instance.scope = scope
+    return instance.build_environ(scope, io.BytesIO())
+
+
+class AsyncApp:
+    """
+    ASGI application serving the Flask app's blueprints.
+
+    GET requests whose endpoint has an async view (see async_view) run as a
+    coroutine inside a regular Flask request context, so before/after request
+    hooks (rate limits, metrics), error handlers and the response cache work as
+    under WSGI, while database round trips await the async engine instead of
+    holding a thread. The hooks and the cache are still called synchronously.
+    Every other request is passed to the sync app through asgiref's WsgiToAsgi,
+    which runs it on a thread pool. ETags (conditional_get) are only sent by
+    the sync views.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.engine = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] == "http" and scope["method"] == "GET":
+            environ = _build_environ(scope)
+            view = self._async_view(environ)
+            if view is not None:
+                return await self._dispatch(view, environ, send)
+        await self.wsgi(scope, receive, send)
+
+    def _async_view(self, environ):
+        try:
+            endpoint, _ = self.flask_app.url_map.bind_to_environ(environ).match()
+        except HTTPException:  # 404, 405 and slash redirects are left to Flask
+            return None
+        return ASYNC_VIEWS.get(endpoint)
+
+    async def _dispatch(self, view, environ, send):
+        """Flask's full_dispatch_request, awaiting the view."""
+        if self.engine is None:
+            self.engine = init_async_db(self.flask_app)
+        app = self.flask_app
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await view(**request.view_args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                response = app.handle_exception(e)
+            body = response.get_data()
+            headers = [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in response.headers.items()
+            ]
+        await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.engine = init_async_db(self.flask_app)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.engine is not None:
+                    await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(config_name):
+    return AsyncApp(create_app(config_name))
@@ -1,7 +1,7 @@
 # Customer routes will be defined here
 from .schemas import (
     customer_schema,
-    customers_schema,
+    compiled_customers_schema,
     login_schema,
     customer_update_schema,
 )
@@ -11,9 +11,13 @@ from sqlalchemy import select
 from app.models import Customer, db
 from . import customers_bp
 from app.extensions import limiter
-from app.extensions import cache
+from app.utils.cache_tags import cached_with_tags
+from app.utils.fieldsets import request_fieldset
 from app.utils.util import encode_token
+from app.utils.passwords import hash_password, verify_password
 from app.utils.roles import customer_token_required
+from app.utils.pagination import is_cursor_request, keyset_paginate
+from app.utils.rate_limits import request_cost, unpaginated_cost
 
 
 @customers_bp.route("/login", methods=["POST"])
@@ -32,7 +36,12 @@ def login():
     query = select(Customer).where(Customer.email == email)
     customer = db.session.execute(query).scalar_one_or_none()
 
-    if customer and customer.password == password:
+    matches, needs_rehash = verify_password(customer.password if customer else None, password)
+    if matches:
+        if needs_rehash:
+            # Legacy plaintext or an old cost setting, upgraded now the password is known
+            customer.password = hash_password(password)
+            db.session.commit()
         auth_token = encode_token(customer.id)
 
         response = {
@@ -69,7 +78,7 @@ def create_customer():
         name=customer_data["name"],
         email=customer_data["email"],
         phone=customer_data["phone"],
-        password=password,
+        password=hash_password(password),
     )
 
     db.session.add(new_customer)
@@ -80,29 +89,50 @@ def create_customer():
 
 # Route to get all customers
 @customers_bp.route("/", methods=["GET"])
+@request_cost(unpaginated_cost(3))  # The whole table without page / per_page or a cursor
 @customer_token_required
+@cached_with_tags("customers:list", query_args=True, vary_on_role=True)
 def get_all_customers(current_user):
+    try:
+        fieldset = request_fieldset(compiled_customers_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    query = select(Customer).options(*fieldset.options)
+
+    # Cursor mode: ?after=<cursor>&limit=<n>
+    if is_cursor_request():
+        try:
+            customers, next_cursor = keyset_paginate(query, Customer.id)
+        except ValueError as e:
+            return jsonify({"Error": str(e)}), 400
+        return (
+            jsonify({"items": fieldset.schema.dump(customers), "next_cursor": next_cursor}),
+            200,
+        )
+
     try:
         page = int(request.args.get("page"))
         per_page = int(request.args.get("per_page"))
-        query = select(Customer)
         customers = db.paginate(query, page=page, per_page=per_page)
-        return jsonify(customers_schema.dump(customers))
+        return jsonify(fieldset.schema.dump(customers))
     except (TypeError, ValueError):
-        query = select(Customer)
         customers = db.session.execute(query).scalars().all()
-        return jsonify(customers_schema.dump(customers)), 200
+        return jsonify(fieldset.schema.dump(customers)), 200
 
 
 # Route to get a customer by id
 @customers_bp.route("/<int:customer_id>", methods=["GET"])
 @customer_token_required
-@cache.cached(timeout=60)
+@cached_with_tags("customer:{customer_id}", query_args=("fields", "expand"), vary_on_role=True)
 def find_customer(current_user, customer_id):
-    customer = db.session.get(Customer, customer_id)
+    try:
+        fieldset = request_fieldset(customer_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    customer = db.session.get(Customer, customer_id, options=fieldset.options)
     if not customer:
         return jsonify({"Error": "Customer not found."}), 404
-    return jsonify(customer_schema.dump(customer)), 200
+    return jsonify(fieldset.schema.dump(customer)), 200
 
 
 # Route to update a customer by id
@@ -120,13 +150,14 @@ def update_customer(current_user, customer_id):
     except ValidationError as e:
         return {"Error": e.messages}, 400
 
+    password = customer_data.pop("password", None)
     # Update customer fields from the validated data
     for field, value in customer_data.items():
         if hasattr(customer, field):
             setattr(customer, field, value)
 
-    if "password" in request.json and request.json["password"]:
-        customer.password = request.json["password"]
+    if password:
+        customer.password = hash_password(password)
 
     db.session.commit()
     return jsonify(customer_schema.dump(customer)), 200
@@ -159,4 +190,4 @@ def search_customer(current_user):
     if not customers:
         return jsonify({"Message": f"No customers found matching '{name}'."}), 404
 
-    return jsonify(customers_schema.dump(customers)), 200
+    return jsonify(compiled_customers_schema.dump(customers)), 200
@@ -4,14 +4,17 @@ from marshmallow import ValidationError, fields, validates
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from app.extensions import ma
 from app.models import Customer
+from app.utils.compiled_schemas import compile_schema
 
 
 # Defining the Marshmallow schemas for serialization and deserialization
 class CustomerSchema(SQLAlchemyAutoSchema):
+    password = fields.String(required=True, load_only=True)
+
     class Meta:
         model = Customer
         include_fk = True
-        exclude = ("service_tickets",)
+        exclude = ("service_tickets", "version")
         load_instance = False
 
     @validates("email")
@@ -36,6 +39,7 @@ class CustomerUpdateSchema(SQLAlchemyAutoSchema):
         model = Customer
         include_fk = True
         load_instance = False
+        exclude = ("version",)
 
     username = fields.String(dump_only=True)
     password = fields.String(load_only=True, required=False)
@@ -59,5 +63,6 @@ class CustomerUpdateSchema(SQLAlchemyAutoSchema):
 # creating an instance of the schema
 customer_schema = CustomerSchema()
 customers_schema = CustomerSchema(many=True, exclude=("password",))
+compiled_customers_schema = compile_schema(customers_schema)  # Same output, for the list routes
 login_schema = CustomerSchema(only=("email", "password"), load_instance=False)
 customer_update_schema = CustomerUpdateSchema()
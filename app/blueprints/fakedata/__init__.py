@@ -2,5 +2,5 @@ from flask import Blueprint
 
 fakedata_bp = Blueprint("fakedata", __name__)
 
-from . import routes
+from . import routes, cli
 
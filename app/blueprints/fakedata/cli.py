@@ -0,0 +1,36 @@
+# Command line interface for the fake data seeder: `flask fakedata seed --help`
+import time
+import click
+from . import fakedata_bp
+from .seeder import DEFAULT_SCALE, DEFAULT_CHUNK_SIZE, seed_database
+
+
+@fakedata_bp.cli.command("seed")
+@click.option("--customers", default=DEFAULT_SCALE["customers"], show_default=True)
+@click.option("--mechanics", default=DEFAULT_SCALE["mechanics"], show_default=True)
+@click.option("--parts", default=DEFAULT_SCALE["parts"], show_default=True)
+@click.option("--tickets", default=DEFAULT_SCALE["tickets"], show_default=True)
+@click.option("--seed", type=int, default=None, help="Random seed for a reproducible dataset.")
+@click.option("--workers", default=1, show_default=True, help="Generator processes.")
+@click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True)
+@click.option(
+    "--as-of",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    default=None,
+    help="Latest service date (defaults to today). Fix it to reproduce a dataset later.",
+)
+def seed_command(customers, mechanics, parts, tickets, seed, workers, chunk_size, as_of):
+    """Clear the database and seed it with generated data."""
+    started = time.perf_counter()
+    counts = seed_database(
+        customers=customers,
+        mechanics=mechanics,
+        parts=parts,
+        tickets=tickets,
+        seed=seed,
+        workers=workers,
+        chunk_size=chunk_size,
+        as_of=as_of.date() if as_of else None,
+    )
+    elapsed = time.perf_counter() - started
+    click.echo(f"Seeded in {elapsed:.1f}s: {counts}")
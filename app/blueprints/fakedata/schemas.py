@@ -0,0 +1,37 @@
+# Fake data schemas will be defined here
+from marshmallow import fields, validate
+from app.extensions import ma
+from .seeder import DEFAULT_SCALE, DEFAULT_CHUNK_SIZE
+
+
+# Largest scale the HTTP endpoint seeds inside one request; bigger datasets
+# are built with the `flask fakedata seed` command
+MAX_HTTP_SCALE = {"customers": 1000, "mechanics": 200, "parts": 1000, "tickets": 5000}
+
+
+class SeedOptionsSchema(ma.Schema):
+    customers = fields.Int(
+        load_default=DEFAULT_SCALE["customers"],
+        validate=validate.Range(min=1, max=MAX_HTTP_SCALE["customers"]),
+    )
+    mechanics = fields.Int(
+        load_default=DEFAULT_SCALE["mechanics"],
+        validate=validate.Range(min=1, max=MAX_HTTP_SCALE["mechanics"]),
+    )
+    parts = fields.Int(
+        load_default=DEFAULT_SCALE["parts"],
+        validate=validate.Range(min=1, max=MAX_HTTP_SCALE["parts"]),
+    )
+    tickets = fields.Int(
+        load_default=DEFAULT_SCALE["tickets"],
+        validate=validate.Range(min=0, max=MAX_HTTP_SCALE["tickets"]),
+    )
+    seed = fields.Int(load_default=None, allow_none=True)
+    chunk_size = fields.Int(load_default=DEFAULT_CHUNK_SIZE, validate=validate.Range(min=1))
+
+    class Meta:
+        fields = ("customers", "mechanics", "parts", "tickets", "seed", "chunk_size")
+
+
+# creating an instance of the schema
+seed_options_schema = SeedOptionsSchema()
@@ -0,0 +1,264 @@
+# Bulk fake data generation used by the seed-database route and the `flask fakedata seed` command
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from faker import Faker
+from sqlalchemy import text
+from app.extensions import cache
+from app.utils.passwords import UNUSABLE_PASSWORD
+from app.models import (
+    db,
+    Customer,
+    Mechanic,
+    ServiceTicket,
+    LaborLog,
+    Part,
+    mechanic_association,
+    service_ticket_part_association,
+)
+
+DEFAULT_SCALE = {"customers": 100, "mechanics": 20, "parts": 50, "tickets": 100}
+DEFAULT_CHUNK_SIZE = 5000
+TICKET_STATUSES = ("Open", "In Progress", "Completed")
+
+# Characters allowed in a VIN (no I, O or Q), used to make every VIN unique by ticket id
+VIN_ALPHABET = "0123456789ABCDEFGHJKLMNPRSTUVWXYZ"
+
+
+def clear_database():
+    """Deletes all rows, respecting FK constraints."""
+    db.session.execute(mechanic_association.delete())
+    db.session.execute(service_ticket_part_association.delete())
+    db.session.query(LaborLog).delete()
+    db.session.query(ServiceTicket).delete()
+    db.session.query(Part).delete()
+    db.session.query(Customer).delete()
+    db.session.query(Mechanic).delete()
+    db.session.commit()
+
+
+def _unique_vin(faker, ticket_id):
+    """Returns a realistic looking VIN whose last 8 characters encode the ticket id."""
+    suffix = ""
+    for _ in range(8):
+        ticket_id, remainder = divmod(ticket_id, len(VIN_ALPHABET))
+        suffix = VIN_ALPHABET[remainder] + suffix
+    return faker.vin()[:9] + suffix
+
+
+def _unique_email(faker, row_id):
+    return f"{faker.user_name()}.{row_id}@{faker.free_email_domain()}"
+
+
+def _generate_chunk(task):
+    """
+    Generates the rows of one chunk. Runs in a worker process, so it only returns
+    plain dicts and never touches the database.
+
+    The random state is derived from (seed, kind, first_id), so the generated data
+    does not depend on the number of workers or the order chunks complete in.
+    """
+    kind, first_id, count, seed, scale, as_of = task
+    chunk_seed = f"{seed}:{kind}:{first_id}"
+    faker = Faker()
+    faker.seed_instance(chunk_seed)
+    rng = random.Random(chunk_seed)
+    ids = range(first_id, first_id + count)
+
+    if kind == "customers":
+        return {
+            "customers": [
+                {
+                    "id": row_id,
+                    "name": faker.name(),
+                    "email": _unique_email(faker, row_id),
+                    "phone": faker.phone_number(),
+                    "password": UNUSABLE_PASSWORD,  # Generated accounts cannot log in
+                }
+                for row_id in ids
+            ]
+        }
+
+    if kind == "mechanics":
+        return {
+            "mechanics": [
+                {
+                    "id": row_id,
+                    "name": faker.name(),
+                    "email": _unique_email(faker, row_id),
+                    "phone": faker.phone_number(),
+                    "salary": rng.randint(45000, 120000),
+                    "password": UNUSABLE_PASSWORD,  # Generated accounts cannot log in
+                }
+                for row_id in ids
+            ]
+        }
+
+    if kind == "parts":
+        return {
+            "parts": [
+                {
+                    "part_id": row_id,
+                    "name": faker.word(),
+                    "description": faker.sentence(),
+                    "price": round(rng.uniform(10, 500), 2),
+                    "quantity_in_stock": rng.randint(1, 100),
+                }
+                for row_id in ids
+            ]
+        }
+
+    # Service tickets with their mechanics, parts and one labor log per mechanic
+    tickets, mechanic_links, part_links, labor_logs = [], [], [], []
+    mechanic_ids = range(1, scale["mechanics"] + 1)
+    part_ids = range(1, scale["parts"] + 1)
+    for ticket_id in ids:
+        service_date = as_of - timedelta(days=rng.randint(0, 730))
+        status = rng.choice(TICKET_STATUSES)
+        tickets.append(
+            {
+                "ticket_id": ticket_id,
+                "customer_id": rng.randint(1, scale["customers"]),
+                "service_date": service_date,
+                "description": faker.sentence(),
+                "VIN": _unique_vin(faker, ticket_id),
+                "status": status,
+                "date_created": service_date,
+                "date_completed": (
+                    service_date + timedelta(days=rng.randint(0, 14))
+                    if status == "Completed"
+                    else None
+                ),
+            }
+        )
+        # Attach 1–3 mechanics and 0–5 parts
+        for mechanic_id in rng.sample(mechanic_ids, min(rng.randint(1, 3), len(mechanic_ids))):
+            mechanic_links.append({"service_ticket_id": ticket_id, "mechanic_id": mechanic_id})
+            labor_logs.append(
+                {
+                    "ticket_id": ticket_id,
+                    "mechanic_id": mechanic_id,
+                    "hours_worked": round(rng.uniform(1, 8), 2),
+                    "date_logged": service_date,
+                }
+            )
+        for part_id in rng.sample(part_ids, min(rng.randint(0, 5), len(part_ids))):
+            part_links.append({"service_ticket_id": ticket_id, "part_id": part_id})
+
+    return {
+        "tickets": tickets,
+        "mechanic_links": mechanic_links,
+        "part_links": part_links,
+        "labor_logs": labor_logs,
+    }
+
+
+def _chunk_tasks(kind, total, chunk_size, seed, scale, as_of):
+    for first_id in range(1, total + 1, chunk_size):
+        yield (kind, first_id, min(chunk_size, total - first_id + 1), seed, scale, as_of)
+
+
+def _generate(tasks, executor, workers):
+    """Yields chunk results in task order, with a bounded number of chunks in flight."""
+    if executor is None:
+        for task in tasks:
+            yield _generate_chunk(task)
+        return
+
+    window = workers * 2
+    pending = []
+    for task in tasks:
+        pending.append(executor.submit(_generate_chunk, task))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+def _reset_sequences():
+    """Moves Postgres id sequences past the explicitly inserted primary keys."""
+    if db.engine.dialect.name != "postgresql":
+        return
+    for table, column in (
+        ("customers", "id"),
+        ("mechanics", "id"),
+        ("parts", "part_id"),
+        ("service_tickets", "ticket_id"),
+        ("labor_logs", "id"),
+    ):
+        db.session.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), "
+                f"COALESCE((SELECT MAX({column}) FROM {table}), 1))"
+            )
+        )
+    db.session.commit()
+
+
+def seed_database(
+    customers=DEFAULT_SCALE["customers"],
+    mechanics=DEFAULT_SCALE["mechanics"],
+    parts=DEFAULT_SCALE["parts"],
+    tickets=DEFAULT_SCALE["tickets"],
+    seed=None,
+    workers=1,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    as_of=None,
+):
+    """
+    Clears the database and inserts a generated dataset of the requested scale.
+
+    Rows are generated by `workers` processes in chunks of `chunk_size` and
+    inserted with executemany INSERT batches, committed per chunk. The same
+    `seed`, `as_of` date and `chunk_size` always produce the same dataset.
+    Returns the row counts and the seed used.
+    """
+    if seed is None:
+        seed = random.randrange(2**31)
+    as_of = as_of or date.today()
+    scale = {"customers": customers, "mechanics": mechanics, "parts": parts, "tickets": tickets}
+
+    clear_database()
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    labor_logs = 0
+    try:
+        for kind, model in (("customers", Customer), ("mechanics", Mechanic), ("parts", Part)):
+            tasks = _chunk_tasks(kind, scale[kind], chunk_size, seed, scale, as_of)
+            for chunk in _generate(tasks, executor, workers):
+                db.session.execute(model.__table__.insert(), chunk[kind])
+                db.session.commit()
+
+        tasks = _chunk_tasks("tickets", tickets, chunk_size, seed, scale, as_of)
+        for chunk in _generate(tasks, executor, workers):
+            # Labor log ids are assigned here, in chunk order, to keep them deterministic
+            for log in chunk["labor_logs"]:
+                labor_logs += 1
+                log["id"] = labor_logs
+
+            # Table inserts run as one executemany per chunk; ORM bulk inserts would start
+            # a new batch whenever the set of non-NULL keys changes (e.g. date_completed)
+            db.session.execute(ServiceTicket.__table__.insert(), chunk["tickets"])
+            if chunk["mechanic_links"]:
+                db.session.execute(mechanic_association.insert(), chunk["mechanic_links"])
+            if chunk["part_links"]:
+                db.session.execute(service_ticket_part_association.insert(), chunk["part_links"])
+            if chunk["labor_logs"]:
+                db.session.execute(LaborLog.__table__.insert(), chunk["labor_logs"])
+            db.session.commit()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    _reset_sequences()
+    # Rows were inserted with Core statements, which the cache tag events do not see
+    cache.clear()
+
+    return {
+        "customers": customers,
+        "mechanics": mechanics,
+        "parts": parts,
+        "service_tickets": tickets,
+        "labor_logs": labor_logs,
+        "seed": seed,
+    }
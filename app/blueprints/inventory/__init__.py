@@ -2,4 +2,4 @@ from flask import Blueprint
 
 inventory_bp = Blueprint("inventory", __name__)
 
-from . import routes
\ No newline at end of file
+from . import routes, async_routes, cli
\ No newline at end of file
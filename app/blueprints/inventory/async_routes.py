@@ -0,0 +1,35 @@
+# Async versions of the inventory reads, served by the ASGI app (app/asgi.py)
+from flask import jsonify
+from sqlalchemy import select
+from app.models import Part
+from app.utils.async_db import async_session, async_view
+from app.utils.cache_tags import cached_with_tags
+from app.utils.fieldsets import request_fieldset
+from .routes import PART_NOT_FOUND
+from .schemas import compiled_parts_schema, part_schema
+
+
+@async_view("inventory.get_all_parts")
+@cached_with_tags("parts:list", query_args=("fields", "expand"))
+async def get_all_parts():
+    try:
+        fieldset = request_fieldset(compiled_parts_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    async with async_session() as session:
+        parts = (await session.execute(select(Part).options(*fieldset.options))).scalars().all()
+    return jsonify(fieldset.schema.dump(parts)), 200
+
+
+@async_view("inventory.get_part")
+@cached_with_tags("part:{part_id}", query_args=("fields", "expand"))
+async def get_part(part_id):
+    try:
+        fieldset = request_fieldset(part_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    async with async_session() as session:
+        part = await session.get(Part, part_id, options=fieldset.options)
+    if not part:
+        return jsonify({"Error": PART_NOT_FOUND}), 404
+    return jsonify(fieldset.schema.dump(part)), 200
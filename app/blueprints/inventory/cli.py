@@ -0,0 +1,13 @@
+# Command line interface for inventory maintenance: `flask inventory --help`
+import click
+from app.models import db
+from . import inventory_bp
+from .stock import release_expired_holds
+
+
+@inventory_bp.cli.command("release-holds")
+def release_holds_command():
+    """Return the stock of expired part holds. Run it periodically, e.g. from cron."""
+    released = release_expired_holds()
+    db.session.commit()
+    click.echo(f"Released {released} expired holds.")
@@ -3,15 +3,35 @@
 from flask import request, jsonify
 from marshmallow import ValidationError
 from sqlalchemy import select
-from app.models import Part, db, ServiceTicket
-from .schemas import part_schema, parts_schema
+from sqlalchemy.exc import IntegrityError
+from app.models import Part, db, ServiceTicket, service_ticket_part_association
+from .schemas import compiled_parts_schema, part_schema, reservation_schema
+from .stock import (
+    StockShortage,
+    confirm_holds,
+    decrement_stock,
+    release_due_holds,
+    release_expired_holds,
+    reserve_parts,
+)
 from . import inventory_bp
-from app.extensions import limiter, cache
+from app.extensions import limiter
+from app.utils.cache_tags import cached_with_tags, invalidate_tags
+from app.utils.fieldsets import request_fieldset
+from app.utils.rate_limits import request_cost
+from app.utils.etags import conditional_get, part_etag, parts_etag
 from app.utils.roles import mechanic_token_required
 
 PART_NOT_FOUND = "Part not found"
 
 
+@inventory_bp.before_request
+def release_expired_part_holds():
+    # Expired holds return their stock before any inventory route reads or changes it
+    if release_due_holds():
+        db.session.commit()
+
+
 # Create a new part
 @inventory_bp.route("/", methods=["POST"])
 @limiter.limit("10/hour")
@@ -40,21 +60,32 @@ def create_part(current_user):
 
 # Get all parts
 @inventory_bp.route("/", methods=["GET"])
-@cache.cached(timeout=60)
+@request_cost(3)  # Not paginated
+@conditional_get(parts_etag, "parts:list", query_args=("fields", "expand"))
+@cached_with_tags("parts:list", query_args=("fields", "expand"))
 def get_all_parts():
-    query = select(Part)
+    try:
+        fieldset = request_fieldset(compiled_parts_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    query = select(Part).options(*fieldset.options)
     parts = db.session.execute(query).scalars().all()
-    return jsonify(parts_schema.dump(parts)), 200
+    return jsonify(fieldset.schema.dump(parts)), 200
 
 
 # Get a single part by ID
 @inventory_bp.route("/<int:part_id>", methods=["GET"])
-@cache.cached(timeout=60)
+@conditional_get(part_etag, "part:{part_id}", query_args=("fields", "expand"))
+@cached_with_tags("part:{part_id}", query_args=("fields", "expand"))
 def get_part(part_id):
-    part = db.session.get(Part, part_id)
+    try:
+        fieldset = request_fieldset(part_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    part = db.session.get(Part, part_id, options=fieldset.options)
     if not part:
         return jsonify({"Error": PART_NOT_FOUND}), 404
-    return jsonify(part_schema.dump(part)), 200
+    return jsonify(fieldset.schema.dump(part)), 200
 
 
 # Update a part
@@ -101,10 +132,6 @@ def delete_part(current_user, part_id):
 @limiter.limit("20/minute")
 @mechanic_token_required
 def remove_part_stock(current_user, part_id):
-    part = db.session.get(Part, part_id)
-    if not part:
-        return jsonify({"Error": PART_NOT_FOUND}), 404
-
     if not request.json or "quantity" not in request.json:
         return jsonify({"Error": "Missing 'quantity' in request body"}), 400
 
@@ -115,25 +142,31 @@ def remove_part_stock(current_user, part_id):
     except (ValueError, TypeError):
         return jsonify({"Error": "Invalid quantity. Must be a positive integer."}), 400
 
-    if part.quantity_in_stock < quantity_to_remove:
+    # Check and decrement in one atomic statement
+    result = decrement_stock(part_id, quantity_to_remove)
+    if result is None:
+        quantity_in_stock = db.session.execute(
+            select(Part.quantity_in_stock).where(Part.part_id == part_id)
+        ).scalar()
+        if quantity_in_stock is None:
+            return jsonify({"Error": PART_NOT_FOUND}), 404
         return (
             jsonify(
                 {
                     "Error": "Cannot remove more parts than are in stock.",
-                    "quantity_in_stock": part.quantity_in_stock,
+                    "quantity_in_stock": quantity_in_stock,
                 }
             ),
             400,
         )
-
-    part.quantity_in_stock -= quantity_to_remove
     db.session.commit()
 
+    part_name, new_quantity = result
     return (
         jsonify(
             {
-                "Message": f"Removed {quantity_to_remove} units from {part.name}.",
-                "new_quantity_in_stock": part.quantity_in_stock,
+                "Message": f"Removed {quantity_to_remove} units from {part_name}.",
+                "new_quantity_in_stock": new_quantity,
             }
         ),
         200,
@@ -144,25 +177,123 @@ def remove_part_stock(current_user, part_id):
 @inventory_bp.route("/<int:part_id>/add-to-ticket/<int:ticket_id>", methods=["POST"])
 @mechanic_token_required
 def add_part_to_ticket(current_user, part_id, ticket_id):
-    part = db.session.get(Part, part_id)
-    if not part:
+    part_exists = db.session.execute(select(Part.part_id).where(Part.part_id == part_id)).first()
+    if not part_exists:
         return jsonify({"Error": PART_NOT_FOUND}), 404
 
-    ticket = db.session.get(ServiceTicket, ticket_id)
-    if not ticket:
+    ticket_exists = db.session.execute(
+        select(ServiceTicket.ticket_id).where(ServiceTicket.ticket_id == ticket_id)
+    ).first()
+    if not ticket_exists:
         return jsonify({"Error": "Service ticket not found"}), 404
 
-    if part in ticket.parts:
+    already_added = db.session.execute(
+        select(service_ticket_part_association.c.part_id).where(
+            service_ticket_part_association.c.service_ticket_id == ticket_id,
+            service_ticket_part_association.c.part_id == part_id,
+        )
+    ).first()
+    if already_added:
         return jsonify({"Message": "Part already added to this ticket"}), 200
 
-    if part.quantity_in_stock < 1:
+    result = decrement_stock(part_id, 1)
+    if result is None:
         return jsonify({"Error": "Not enough parts in stock"}), 400
 
-    ticket.parts.append(part)
-    part.quantity_in_stock -= 1
-    db.session.commit()
+    try:
+        db.session.execute(
+            service_ticket_part_association.insert().values(service_ticket_id=ticket_id, part_id=part_id)
+        )
+        invalidate_tags(f"ticket:{ticket_id}", "tickets:list")
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request added it first; the rollback also returns the unit
+        db.session.rollback()
+        return jsonify({"Message": "Part already added to this ticket"}), 200
 
+    part_name, _ = result
     return (
-        jsonify({"Message": f"Part {part.name} added to ticket {ticket.ticket_id}"}),
+        jsonify({"Message": f"Part {part_name} added to ticket {ticket_id}"}),
         200,
     )
+
+
+# Route to reserve several parts for a service ticket in one transaction
+@inventory_bp.route("/reserve/<int:ticket_id>", methods=["POST"])
+@limiter.limit("20/minute")
+@mechanic_token_required
+def reserve_parts_for_ticket(current_user, ticket_id):
+    try:
+        data = reservation_schema.load(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        return jsonify({"Error": e.messages}), 400
+
+    # 1. Merge repeated part ids into one quantity per part
+    quantities = {}
+    for item in data["parts"]:
+        quantities[item["part_id"]] = quantities.get(item["part_id"], 0) + item["quantity"]
+
+    # 2. Check the ticket, holds are only for tickets that are still open
+    ticket = db.session.execute(
+        select(ServiceTicket.status).where(ServiceTicket.ticket_id == ticket_id)
+    ).first()
+    if not ticket:
+        return jsonify({"Error": "Service ticket not found"}), 404
+    hold_seconds = data.get("hold_seconds")
+    if hold_seconds and ticket.status != "Open":
+        return jsonify({"Error": "Parts can only be held for open tickets."}), 400
+
+    # 3. Return the stock of expired holds before checking availability
+    if release_expired_holds():
+        db.session.commit()
+
+    # 4. Parts already on the ticket cannot be reserved again
+    links = service_ticket_part_association.c
+    already_added = db.session.execute(
+        select(links.part_id).where(
+            links.service_ticket_id == ticket_id, links.part_id.in_(quantities)
+        )
+    ).scalars().all()
+    if already_added:
+        return (
+            jsonify({"Error": "Parts already added to this ticket", "part_ids": sorted(already_added)}),
+            409,
+        )
+
+    # 5. Take the stock of every part and link them, all or nothing
+    try:
+        hold_expires_at = reserve_parts(ticket_id, quantities, hold_seconds)
+        db.session.commit()
+    except StockShortage as e:
+        if e.missing:
+            return jsonify({"Error": "Parts not found", "part_ids": e.missing}), 404
+        return jsonify({"Error": "Not enough stock", "parts": e.short}), 409
+    except IntegrityError:
+        # A concurrent request linked one of the parts first
+        db.session.rollback()
+        return jsonify({"Error": "Parts already added to this ticket"}), 409
+
+    return (
+        jsonify(
+            {
+                "ticket_id": ticket_id,
+                "parts": [
+                    {"part_id": part_id, "quantity": quantity}
+                    for part_id, quantity in sorted(quantities.items())
+                ],
+                "hold_expires_at": hold_expires_at.isoformat() if hold_expires_at else None,
+            }
+        ),
+        201,
+    )
+
+
+# Route to turn a ticket's held parts into permanent reservations
+@inventory_bp.route("/reserve/<int:ticket_id>/confirm", methods=["POST"])
+@mechanic_token_required
+def confirm_reserved_parts(current_user, ticket_id):
+    if release_expired_holds():
+        db.session.commit()
+    confirmed = confirm_holds(ticket_id)
+    db.session.commit()
+    return jsonify({"Message": f"Confirmed {confirmed} held parts.", "confirmed": confirmed}), 200
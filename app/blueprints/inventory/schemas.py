@@ -1,8 +1,9 @@
 # Inventory schemas will be defined here
-from marshmallow import validates, ValidationError
+from marshmallow import fields, validate, validates, ValidationError
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from app.extensions import ma
 from app.models import Part
+from app.utils.compiled_schemas import compile_schema
 
 
 # Defining the Marshmallow schemas for serialization and deserialization
@@ -11,6 +12,7 @@ class PartSchema(SQLAlchemyAutoSchema):
         model = Part
         load_instance = False
         include_fk = True
+        exclude = ("version",)  # Exposed as the ETag instead
 
     @validates("price")
     def validate_price(self, value, **kwargs):
@@ -23,6 +25,21 @@ class PartSchema(SQLAlchemyAutoSchema):
             raise ValidationError("Quantity in stock cannot be negative.")
 
 
+class ReservationItemSchema(ma.Schema):
+    part_id = fields.Int(required=True)
+    quantity = fields.Int(load_default=1, validate=validate.Range(min=1))
+
+
+class ReservationSchema(ma.Schema):
+    parts = fields.List(
+        fields.Nested(ReservationItemSchema), required=True, validate=validate.Length(min=1, max=100)
+    )
+    # Hold the parts for this many seconds instead of reserving them for good
+    hold_seconds = fields.Int(validate=validate.Range(min=60, max=7 * 24 * 3600))
+
+
 # creating an instance of the schema
 part_schema = PartSchema()
 parts_schema = PartSchema(many=True)
+compiled_parts_schema = compile_schema(parts_schema)  # Same output, for the list routes
+reservation_schema = ReservationSchema()
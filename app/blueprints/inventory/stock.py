@@ -0,0 +1,221 @@
+# Stock changes done as single conditional UPDATE statements.
+# The check and the decrement happen in the database, in one statement, so
+# concurrent requests can neither oversell a part nor lose each other's updates,
+# and the row lock is only held from the UPDATE to the commit. There is nothing
+# to retry: a request either gets its units or is told the stock is too low.
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import case, delete, func, select, update
+from app.extensions import cache
+from app.models import Part, db, service_ticket_part_association
+from app.utils.cache_tags import invalidate_tags
+
+
+def _returns_rows():
+    """Whether the database supports UPDATE ... RETURNING (SQLite 3.35+, PostgreSQL, MariaDB)."""
+    return db.session.get_bind().dialect.update_returning
+
+
+def decrement_stock(part_id, quantity):
+    """
+    Removes `quantity` units of a part if at least that many are in stock.
+
+    Returns the part's (name, new quantity), or None when the part does not exist
+    or has fewer than `quantity` units; then nothing is changed. The caller commits.
+    """
+    statement = (
+        update(Part)
+        .where(Part.part_id == part_id, Part.quantity_in_stock >= quantity)
+        .values(
+            quantity_in_stock=Part.quantity_in_stock - quantity,
+            version=Part.version + 1,  # Core updates bypass the version hook
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if _returns_rows():
+        row = db.session.execute(
+            statement.returning(Part.name, Part.quantity_in_stock)
+        ).first()
+    else:
+        # MySQL: the row stays locked by our UPDATE, so reading it back is exact
+        row = None
+        if db.session.execute(statement).rowcount == 1:
+            row = db.session.execute(
+                select(Part.name, Part.quantity_in_stock).where(Part.part_id == part_id)
+            ).first()
+    if row is None:
+        return None
+
+    invalidate_tags(f"part:{part_id}", "parts:list")
+    return row.name, row.quantity_in_stock
+
+
+class StockShortage(Exception):
+    """Some requested parts are missing or short of stock; nothing was reserved."""
+
+    def __init__(self, missing, short):
+        super().__init__("Not enough stock")
+        self.missing = missing  # part ids that do not exist
+        self.short = short  # [{"part_id", "requested", "quantity_in_stock"}]
+
+
+# Cache key of the earliest hold expiry (naive UTC), datetime.max when nothing is held
+NEXT_HOLD_EXPIRY = "holds:next_expiry"
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _schedule_release(expires_at):
+    """Moves the next release time earlier when a new hold expires first."""
+    due = cache.get(NEXT_HOLD_EXPIRY)
+    if due is not None and expires_at < due:
+        cache.set(NEXT_HOLD_EXPIRY, expires_at, timeout=0)
+
+
+def reserve_parts(ticket_id, quantities, hold_seconds=None):
+    """
+    Takes stock for every part in `quantities` ({part_id: quantity}) and links the
+    parts to the ticket, all or nothing. The caller commits; when this raises
+    StockShortage the transaction has already been rolled back.
+
+    One UPDATE checks and decrements every part (quantity_in_stock >= the
+    requested quantity, per part, through a CASE); if it did not match every
+    part, nothing is changed. One multi-row INSERT adds the association rows.
+    With hold_seconds the parts are only held until then; see release_expired_holds.
+    Returns the hold expiry time, or None.
+    """
+    part_ids = sorted(quantities)
+    requested = case(quantities, value=Part.part_id)
+    updated = db.session.execute(
+        update(Part)
+        .where(Part.part_id.in_(part_ids), Part.quantity_in_stock >= requested)
+        .values(quantity_in_stock=Part.quantity_in_stock - requested, version=Part.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if updated != len(part_ids):
+        db.session.rollback()
+        in_stock = dict(
+            db.session.execute(
+                select(Part.part_id, Part.quantity_in_stock).where(Part.part_id.in_(part_ids))
+            ).all()
+        )
+        raise StockShortage(
+            missing=[part_id for part_id in part_ids if part_id not in in_stock],
+            short=[
+                {
+                    "part_id": part_id,
+                    "requested": quantities[part_id],
+                    "quantity_in_stock": in_stock[part_id],
+                }
+                for part_id in part_ids
+                if part_id in in_stock and in_stock[part_id] < quantities[part_id]
+            ],
+        )
+
+    hold_expires_at = _utcnow() + timedelta(seconds=hold_seconds) if hold_seconds else None
+    db.session.execute(
+        service_ticket_part_association.insert().values(
+            [
+                {
+                    "service_ticket_id": ticket_id,
+                    "part_id": part_id,
+                    "quantity": quantities[part_id],
+                    "hold_expires_at": hold_expires_at,
+                }
+                for part_id in part_ids
+            ]
+        )
+    )
+    invalidate_tags(
+        "parts:list", f"ticket:{ticket_id}", *(f"part:{part_id}" for part_id in part_ids)
+    )
+    if hold_expires_at:
+        _schedule_release(hold_expires_at)
+    return hold_expires_at
+
+
+def confirm_holds(ticket_id):
+    """Makes the ticket's unexpired holds permanent. Returns how many were confirmed."""
+    links = service_ticket_part_association.c
+    return db.session.execute(
+        update(service_ticket_part_association)
+        .where(links.service_ticket_id == ticket_id, links.hold_expires_at > _utcnow())
+        .values(hold_expires_at=None)
+    ).rowcount
+
+
+def release_expired_holds():
+    """
+    Unlinks parts whose hold expired and returns their stock. The caller commits.
+    Returns the number of released holds.
+    """
+    links = service_ticket_part_association.c
+    expired = delete(service_ticket_part_association).where(links.hold_expires_at <= _utcnow())
+    if db.session.get_bind().dialect.delete_returning:
+        # The deleted rows are exactly the ones whose stock is returned, even if a
+        # confirm runs at the same time
+        released = db.session.execute(
+            expired.returning(links.service_ticket_id, links.part_id, links.quantity)
+        ).all()
+    else:
+        # MySQL: lock the expired rows first so a concurrent confirm waits for us
+        released = db.session.execute(
+            select(links.service_ticket_id, links.part_id, links.quantity)
+            .where(links.hold_expires_at <= _utcnow())
+            .with_for_update()
+        ).all()
+        for ticket_id, part_id, _ in released:
+            db.session.execute(
+                delete(service_ticket_part_association).where(
+                    links.service_ticket_id == ticket_id, links.part_id == part_id
+                )
+            )
+    if not released:
+        return 0
+
+    returned = {}
+    for _, part_id, quantity in released:
+        returned[part_id] = returned.get(part_id, 0) + quantity
+    db.session.execute(
+        update(Part)
+        .where(Part.part_id.in_(returned))
+        .values(
+            quantity_in_stock=Part.quantity_in_stock + case(returned, value=Part.part_id),
+            version=Part.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    invalidate_tags(
+        "parts:list",
+        *(f"part:{part_id}" for part_id in returned),
+        *(f"ticket:{ticket_id}" for ticket_id, _, _ in released),
+    )
+    return len(released)
+
+
+def _next_hold_expiry():
+    # Read from the primary without pinning a replica request's session to it
+    return db.session.scalar(
+        select(func.min(service_ticket_part_association.c.hold_expires_at)),
+        bind_arguments={"bind": db.engine},
+    )
+
+
+def release_due_holds():
+    """
+    release_expired_holds, only when a hold has expired since the last call, so
+    it can run before every stock read or change: otherwise it costs one cache
+    read. The earliest expiry is read from the database on the first call and
+    after each release. The caller commits. Returns the number of released holds.
+    """
+    due = cache.get(NEXT_HOLD_EXPIRY)
+    if due is not None and due > _utcnow():
+        return 0
+    released = 0
+    next_expiry = _next_hold_expiry()
+    if next_expiry is not None and next_expiry <= _utcnow():
+        released = release_expired_holds()
+        next_expiry = _next_hold_expiry()
+    cache.set(NEXT_HOLD_EXPIRY, next_expiry or datetime.max, timeout=0)
+    return released
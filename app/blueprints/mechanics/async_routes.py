@@ -0,0 +1,33 @@
+# Async versions of the mechanic reports, served by the ASGI app (app/asgi.py)
+from flask import jsonify
+from app.utils.async_db import async_session, async_view
+from app.utils.cache_tags import cached_with_tags
+from .reports import top_labor_query, top_labor_row, tickets_worked_query, tickets_worked_row
+
+
+@async_view("mechanics.get_top_labor_report")
+@cached_with_tags("reports", query_args=True)
+async def get_top_labor_report():
+    try:
+        query = top_labor_query()
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    async with async_session() as session:
+        rows = (await session.execute(query)).all()
+    return jsonify([top_labor_row(row) for row in rows]), 200
+
+
+@async_view("mechanics.get_mechanics_by_ticket_count")
+@cached_with_tags("reports", query_args=True)
+async def get_mechanics_by_ticket_count():
+    try:
+        query = tickets_worked_query()
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    if query is None:
+        return jsonify([]), 200
+
+    async with async_session() as session:
+        rows = (await session.execute(query)).all()
+    return jsonify([tickets_worked_row(row) for row in rows]), 200
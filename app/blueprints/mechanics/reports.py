@@ -0,0 +1,146 @@
+# Report queries built from the request's query string. They only build the
+# statement, so the sync routes and the async views (async_routes.py) run the
+# same SQL and format the rows the same way.
+from flask import request
+from sqlalchemy import select, func
+from app.models import Mechanic, ServiceTicket, LaborLog, mechanic_association
+from app.utils.query_args import parse_date_range, parse_float_arg, parse_int_arg
+
+
+def top_labor_query():
+    """
+    The mechanic who worked the most hours on each ticket.
+
+    Hours are summed per (ticket, mechanic) and ranked per ticket with a window
+    function in a single query. Optional query parameters:
+    limit, start_date / end_date (ticket service_date, YYYY-MM-DD) and min_hours.
+    Raises ValueError for invalid parameters.
+    """
+    limit = parse_int_arg("limit", minimum=1)
+    start_date, end_date = parse_date_range()
+    min_hours = parse_float_arg("min_hours", minimum=0)
+
+    # 1. Total hours per mechanic on each ticket
+    hours_query = (
+        select(
+            LaborLog.ticket_id,
+            LaborLog.mechanic_id,
+            func.sum(LaborLog.hours_worked).label("total_hours"),
+        )
+        .join(ServiceTicket, ServiceTicket.ticket_id == LaborLog.ticket_id)
+        .group_by(LaborLog.ticket_id, LaborLog.mechanic_id)
+    )
+    if start_date:
+        hours_query = hours_query.where(ServiceTicket.service_date >= start_date)
+    if end_date:
+        hours_query = hours_query.where(ServiceTicket.service_date <= end_date)
+    hours = hours_query.subquery()
+
+    # 2. Rank the mechanics on each ticket by hours worked
+    ranked = select(
+        hours.c.ticket_id,
+        hours.c.mechanic_id,
+        hours.c.total_hours,
+        func.row_number()
+        .over(
+            partition_by=hours.c.ticket_id,
+            order_by=(hours.c.total_hours.desc(), hours.c.mechanic_id),
+        )
+        .label("rank"),
+    ).subquery()
+
+    # 3. Keep the top mechanic per ticket
+    query = (
+        select(
+            ServiceTicket.ticket_id,
+            ServiceTicket.description,
+            Mechanic.name,
+            ranked.c.total_hours,
+        )
+        .join(ranked, ranked.c.ticket_id == ServiceTicket.ticket_id)
+        .join(Mechanic, Mechanic.id == ranked.c.mechanic_id)
+        .where(ranked.c.rank == 1)
+        .order_by(ServiceTicket.ticket_id)
+    )
+    if min_hours is not None:
+        query = query.where(ranked.c.total_hours >= min_hours)
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def top_labor_row(row):
+    return {
+        "ticket_id": row.ticket_id,
+        "ticket_description": row.description,
+        "top_mechanic": row.name,
+        "total_hours_logged": row.total_hours,
+    }
+
+
+def tickets_worked_query():
+    """
+    Mechanics ordered by the number of tickets they have worked on.
+
+    Tickets are counted with a single COUNT ... GROUP BY over mechanic_association.
+    Optional query parameters: start_date / end_date (ticket service_date, YYYY-MM-DD),
+    status, limit (top N mechanics) and page / per_page.
+    Returns None when the requested page is past the top N, and raises
+    ValueError for invalid parameters.
+    """
+    start_date, end_date = parse_date_range()
+    limit = parse_int_arg("limit", minimum=1)
+    page = parse_int_arg("page", minimum=1)
+    per_page = parse_int_arg("per_page", minimum=1, maximum=100)
+    status = request.args.get("status")
+
+    # 1. Count the tickets of each mechanic
+    counts_query = select(
+        mechanic_association.c.mechanic_id,
+        func.count(mechanic_association.c.service_ticket_id).label("tickets_worked_on"),
+    ).group_by(mechanic_association.c.mechanic_id)
+    if start_date or end_date or status:
+        counts_query = counts_query.join(
+            ServiceTicket,
+            ServiceTicket.ticket_id == mechanic_association.c.service_ticket_id,
+        )
+    if start_date:
+        counts_query = counts_query.where(ServiceTicket.service_date >= start_date)
+    if end_date:
+        counts_query = counts_query.where(ServiceTicket.service_date <= end_date)
+    if status:
+        counts_query = counts_query.where(ServiceTicket.status == status)
+    counts = counts_query.subquery()
+
+    # 2. Rank every mechanic by that count, mechanics without tickets count 0
+    tickets_worked_on = func.coalesce(counts.c.tickets_worked_on, 0)
+    query = (
+        select(
+            Mechanic.id,
+            Mechanic.name,
+            Mechanic.email,
+            tickets_worked_on.label("tickets_worked_on"),
+        )
+        .outerjoin(counts, counts.c.mechanic_id == Mechanic.id)
+        .order_by(tickets_worked_on.desc(), Mechanic.id)
+    )
+
+    # 3. Apply pagination inside the top N window
+    offset = 0
+    row_limit = limit
+    if page or per_page:
+        per_page = per_page or 10
+        offset = ((page or 1) - 1) * per_page
+        row_limit = per_page if limit is None else min(per_page, limit - offset)
+        if row_limit <= 0:
+            return None
+    return query.offset(offset).limit(row_limit)
+
+
+def tickets_worked_row(row):
+    return {
+        "mechanic_id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "tickets_worked_on": row.tickets_worked_on,
+    }
@@ -11,10 +11,16 @@ from marshmallow import ValidationError
 from sqlalchemy import select
 from app.models import Mechanic, db, ServiceTicket
 from . import mechanics_bp
+from .reports import top_labor_query, top_labor_row, tickets_worked_query, tickets_worked_row
 from app.extensions import limiter
-from app.extensions import cache
+from app.utils.cache_tags import cached_with_tags
+from app.utils.fieldsets import request_fieldset
+from app.utils.rate_limits import request_cost, unpaginated_cost
+from app.utils.replicas import reads_replica
 from app.utils.util import encode_mechanic_token
+from app.utils.passwords import hash_password, verify_password
 from app.utils.roles import mechanic_token_required
+from app.utils.pagination import is_cursor_request, keyset_paginate
 
 
 # routes for mechanic
@@ -34,7 +40,12 @@ def login():
     query = select(Mechanic).where(Mechanic.email == email)
     mechanic = db.session.execute(query).scalar_one_or_none()
 
-    if mechanic and mechanic.password == password:
+    matches, needs_rehash = verify_password(mechanic.password if mechanic else None, password)
+    if matches:
+        if needs_rehash:
+            # Legacy plaintext or an old cost setting, upgraded now the password is known
+            mechanic.password = hash_password(password)
+            db.session.commit()
         auth_token = encode_mechanic_token(mechanic.id)
 
         response = {
@@ -70,7 +81,7 @@ def create_mechanic():
         name=mechanic_data["name"],
         email=mechanic_data["email"],
         phone=mechanic_data["phone"],
-        password=request.json.get("password"),  # Get password from original request
+        password=hash_password(mechanic_data["password"]),
         salary=mechanic_data.get("salary", 0.0),  # Include salary field
     )
     db.session.add(new_mechanic)
@@ -81,29 +92,51 @@ def create_mechanic():
 
 # get all mechanics
 @mechanics_bp.route("/", methods=["GET"])
+@request_cost(unpaginated_cost(3))  # The whole table without page / per_page or a cursor
 @mechanic_token_required
+@cached_with_tags("mechanics:list", query_args=True, vary_on_role=True)
 def get_mechanics(current_user):
+    try:
+        fieldset = request_fieldset(mechanics_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    query = select(Mechanic).options(*fieldset.options)
+
+    # Cursor mode: ?after=<cursor>&limit=<n>
+    if is_cursor_request():
+        try:
+            mechanics, next_cursor = keyset_paginate(query, Mechanic.id)
+        except ValueError as e:
+            return jsonify({"Error": str(e)}), 400
+        return (
+            jsonify({"items": fieldset.schema.dump(mechanics), "next_cursor": next_cursor}),
+            200,
+        )
+
     try:
         page = int(request.args.get("page"))
         per_page = int(request.args.get("per_page"))
-        query = select(Mechanic)
         mechanics = db.paginate(query, page=page, per_page=per_page)
-        return jsonify(mechanics_schema.dump(mechanics))
+        return jsonify(fieldset.schema.dump(mechanics))
     except (TypeError, ValueError):
         # Query all mechanics from the database
-        query = select(Mechanic)
         mechanics = db.session.execute(query).scalars().all()
-        return jsonify(mechanics_schema.dump(mechanics)), 200
+        return jsonify(fieldset.schema.dump(mechanics)), 200
 
 
 # get a mechanic by id
 @mechanics_bp.route("/<int:mechanic_id>", methods=["GET"])
 @mechanic_token_required
+@cached_with_tags("mechanic:{mechanic_id}", query_args=("fields", "expand"), vary_on_role=True)
 def get_mechanic(current_user, mechanic_id):
-    mechanic = db.session.get(Mechanic, mechanic_id)
+    try:
+        fieldset = request_fieldset(mechanic_schema)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    mechanic = db.session.get(Mechanic, mechanic_id, options=fieldset.options)
     if not mechanic:
         return jsonify({"Error": "Mechanic not found."}), 404
-    return jsonify(mechanic_schema.dump(mechanic)), 200
+    return jsonify(fieldset.schema.dump(mechanic)), 200
 
 
 # update a mechanic
@@ -121,13 +154,14 @@ def update_mechanic(current_user, mechanic_id):
     except ValidationError as e:
         return {"Error": e.messages}, 400
 
+    password = mechanic_data.pop("password", None)
     # Update mechanic fields from the validated data
     for field, value in mechanic_data.items():
         if hasattr(mechanic, field):
             setattr(mechanic, field, value)
 
-    if "password" in request.json and request.json["password"]:
-        mechanic.password = request.json["password"]
+    if password:
+        mechanic.password = hash_password(password)
 
     db.session.commit()
     return jsonify(mechanic_schema.dump(mechanic)), 200
@@ -223,78 +257,45 @@ def get_service_tickets(current_user, mechanic_id):
 
 # New route for the report
 @mechanics_bp.route("/reports/top_labor_by_ticket", methods=["GET"])
-@cache.cached(timeout=60)  # Cache the report for 60 seconds
+@request_cost(5)
+@reads_replica  # Lag is acceptable, even right after the client wrote
+@cached_with_tags("reports", query_args=True)  # Cache each filtered report until tickets change
 def get_top_labor_report():
     """
-    Generates a report of the mechanic who worked the most hours on each ticket
-    using Python sorting.
+    Generates a report of the mechanic who worked the most hours on each ticket.
+
+    Hours are summed per (ticket, mechanic) and ranked per ticket with a window
+    function in a single query. Optional query parameters:
+    limit, start_date / end_date (ticket service_date, YYYY-MM-DD) and min_hours.
     """
-    # 1. Fetch ALL tickets from the database
-    all_tickets = db.session.execute(select(ServiceTicket)).scalars().all()
-
-    report = []
-
-    # 2. Loop through every single ticket
-    for ticket in all_tickets:
-        if not ticket.labor_logs:
-            continue  # Skip tickets with no labor logged
-
-        # 3. For each ticket, create a dictionary to hold hours per mechanic
-        mechanic_hours = {}
-        for log in ticket.labor_logs:
-            mechanic_name = log.mechanic.name
-            if mechanic_name not in mechanic_hours:
-                mechanic_hours[mechanic_name] = 0
-            mechanic_hours[mechanic_name] += log.hours_worked
-
-        # 4. Find the top mechanic for the current ticket
-        if not mechanic_hours:
-            continue
-
-        # Sort the mechanics by hours worked (descending)
-        top_mechanic_name, top_hours = sorted(
-            mechanic_hours.items(), key=lambda item: item[1], reverse=True
-        )[0]
-
-        # 5. Append the result to our final report
-        report.append(
-            {
-                "ticket_id": ticket.ticket_id,
-                "ticket_description": ticket.description,
-                "top_mechanic": top_mechanic_name,
-                "total_hours_logged": top_hours,
-            }
-        )
+    try:
+        query = top_labor_query()
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
 
+    report = [top_labor_row(row) for row in db.session.execute(query)]
     return jsonify(report), 200
 
 
 # New route for mechanics ranked by ticket count
 @mechanics_bp.route("/reports/most_tickets_worked", methods=["GET"])
-@cache.cached(timeout=60)  # Cache the report for 60 seconds
+@request_cost(5)
+@reads_replica  # Lag is acceptable, even right after the client wrote
+@cached_with_tags("reports", query_args=True)  # Cache each filtered report until tickets change
 def get_mechanics_by_ticket_count():
     """
-    Returns a list of mechanics ordered by the number of tickets they have worked on,
-    calculated using Python's sorted() function.
-    """
-    # 1. Fetch all mechanics from the database
-    all_mechanics = db.session.execute(select(Mechanic)).scalars().all()
-
-    # 2. Create a list of mechanic data, including the count of tickets they are assigned to
-    mechanic_ticket_counts = []
-    for mechanic in all_mechanics:
-        mechanic_ticket_counts.append(
-            {
-                "mechanic_id": mechanic.id,
-                "name": mechanic.name,
-                "email": mechanic.email,
-                "tickets_worked_on": len(mechanic.service_tickets),
-            }
-        )
+    Returns a list of mechanics ordered by the number of tickets they have worked on.
 
-    # 3. Sort the list of mechanics by the 'tickets_worked_on' count in descending order
-    sorted_report = sorted(
-        mechanic_ticket_counts, key=lambda m: m["tickets_worked_on"], reverse=True
-    )
+    Tickets are counted with a single COUNT ... GROUP BY over mechanic_association.
+    Optional query parameters: start_date / end_date (ticket service_date, YYYY-MM-DD),
+    status, limit (top N mechanics) and page / per_page.
+    """
+    try:
+        query = tickets_worked_query()
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    if query is None:
+        return jsonify([]), 200
 
-    return jsonify(sorted_report), 200
+    report = [tickets_worked_row(row) for row in db.session.execute(query)]
+    return jsonify(report), 200
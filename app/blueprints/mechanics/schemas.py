@@ -14,7 +14,7 @@ class MechanicSchema(SQLAlchemyAutoSchema):
         model = Mechanic
         include_fk = True
         load_instance = False
-        exclude = ("service_tickets", "labor_logs")
+        exclude = ("service_tickets", "labor_logs", "version")
 
     @validates("email")
     def validate_email(self, value, **kwargs):
@@ -38,6 +38,7 @@ class MechanicUpdateSchema(SQLAlchemyAutoSchema):
         model = Mechanic
         include_fk = True
         load_instance = False
+        exclude = ("version",)
 
     username = fields.String(dump_only=True)
     password = fields.String(load_only=True, required=False)
@@ -0,0 +1,59 @@
+# Async versions of the service ticket list, served by the ASGI app (app/asgi.py)
+from flask import abort, jsonify, request
+from sqlalchemy import select
+from app.models import ServiceTicket
+from app.utils.async_db import async_session, async_view
+from app.utils.cache_tags import cached_with_tags
+from app.utils.fieldsets import request_fieldset
+from app.utils.instrumentation import guarded_dump
+from app.utils.pagination import is_cursor_request, keyset_page, keyset_query
+from .schemas import compiled_service_tickets_schema, service_ticket_load_options
+
+
+async def _page_items(session, query, page, per_page):
+    """The items db.paginate would return, 404 for invalid or empty pages, without its COUNT query."""
+    if page < 1 or per_page < 1:
+        abort(404)
+    items = (
+        await session.execute(query.limit(per_page).offset((page - 1) * per_page))
+    ).scalars().all()
+    if not items and page != 1:
+        abort(404)
+    return items
+
+
+@async_view("service_tickets.get_all_service_tickets")
+@cached_with_tags("tickets:list", query_args=True)
+async def get_all_service_tickets():
+    try:
+        fieldset = request_fieldset(compiled_service_tickets_schema, service_ticket_load_options)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    query = select(ServiceTicket).options(*fieldset.options)
+    async with async_session() as session:
+        # Cursor mode: ?after=<cursor>&limit=<n>
+        if is_cursor_request():
+            try:
+                page_query, limit = keyset_query(query, ServiceTicket.ticket_id)
+            except ValueError as e:
+                return jsonify({"Error": str(e)}), 400
+            rows = (await session.execute(page_query)).scalars().all()
+            tickets, next_cursor = keyset_page(rows, limit, ServiceTicket.ticket_id)
+            return (
+                jsonify(
+                    {
+                        "items": guarded_dump(fieldset.schema, tickets),
+                        "next_cursor": next_cursor,
+                    }
+                ),
+                200,
+            )
+
+        try:
+            page = int(request.args.get("page", 1))
+            per_page = int(request.args.get("per_page", 10))
+        except (TypeError, ValueError):
+            tickets = (await session.execute(query)).scalars().all()
+            return jsonify(guarded_dump(fieldset.schema, tickets)), 200
+        tickets = await _page_items(session, query, page, per_page)
+        return jsonify(guarded_dump(fieldset.schema, tickets))
@@ -1,5 +1,9 @@
 # Service ticket routes will be defined here
-from flask import request, jsonify
+import csv
+import io
+import json
+from datetime import date
+from flask import request, jsonify, Response, stream_with_context
 from marshmallow import ValidationError
 from sqlalchemy import select
 from app.models import (
@@ -12,23 +16,43 @@ from app.models import (
 )
 from .schemas import (
     service_ticket_schema,
-    service_tickets_schema,
+    compiled_service_tickets_schema,
     edit_service_ticket_schema,
     labor_log_schema,
+    service_ticket_load_options,
 )
 from app.blueprints.inventory.schemas import part_schema
 from app.extensions import limiter
 from . import service_tickets_bp  # Import the blueprint from __init__.py
-from app.extensions import cache
+from app.utils.cache_tags import cached_with_tags
+from app.utils.fieldsets import request_fieldset
+from app.utils.rate_limits import request_cost, unpaginated_cost
+from app.utils.etags import conditional_get, service_ticket_etag
 from app.utils.roles import (
     customer_token_required,
     mechanic_token_required,
 )
+from app.utils.pagination import is_cursor_request, keyset_paginate
+from app.utils.instrumentation import guarded_dump
+from app.utils.query_args import parse_date_range
+
+# Columns written by the export route, in output order
+EXPORT_COLUMNS = (
+    "ticket_id",
+    "customer_id",
+    "service_date",
+    "description",
+    "VIN",
+    "status",
+    "date_created",
+    "date_completed",
+)
+EXPORT_BATCH_SIZE = 1000
 
 
 # Route for creating a new service ticket
 @service_tickets_bp.route("/", methods=["POST"])
-@limiter.limit("10/hour")  # Rate limit: 10 requests per hour per IP
+@limiter.limit("10/hour")  # Rate limit: 10 requests per hour per user
 @customer_token_required
 def create_service_ticket(current_user):
     if not request.json:
@@ -60,41 +84,146 @@ def create_service_ticket(current_user):
 
 # Route to get all service tickets
 @service_tickets_bp.route("/", methods=["GET"])
-@cache.cached(timeout=15)  # Cache this route for 15 seconds
+@request_cost(unpaginated_cost(5, page=1, per_page=10))  # The whole table for a non-integer page
+@cached_with_tags("tickets:list", query_args=True)  # Cache each page until tickets change
 def get_all_service_tickets():
+    # Sparse fieldsets: ?fields=ticket_id,status&expand=customer
+    try:
+        fieldset = request_fieldset(compiled_service_tickets_schema, service_ticket_load_options)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    query = select(ServiceTicket).options(*fieldset.options)
+
+    # Cursor mode: ?after=<cursor>&limit=<n>
+    if is_cursor_request():
+        try:
+            tickets, next_cursor = keyset_paginate(query, ServiceTicket.ticket_id)
+        except ValueError as e:
+            return jsonify({"Error": str(e)}), 400
+        return (
+            jsonify(
+                {
+                    "items": guarded_dump(fieldset.schema, tickets),
+                    "next_cursor": next_cursor,
+                }
+            ),
+            200,
+        )
+
     try:
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 10))
-        query = select(ServiceTicket)
         tickets = db.paginate(query, page=page, per_page=per_page)
-        return jsonify(service_tickets_schema.dump(tickets))
+        return jsonify(guarded_dump(fieldset.schema, tickets))
     except (TypeError, ValueError):
-        query = select(ServiceTicket)
         tickets = db.session.execute(query).scalars().all()
-        return jsonify(service_tickets_schema.dump(tickets)), 200
+        return jsonify(guarded_dump(fieldset.schema, tickets)), 200
+
+
+# Route to stream every service ticket as NDJSON or CSV
+@service_tickets_bp.route("/export", methods=["GET"])
+@limiter.limit("10/hour")
+@request_cost(10)
+def export_service_tickets():
+    """
+    Streams tickets row by row, so memory stays flat regardless of table size.
+
+    Rows are read from a server-side cursor in batches of EXPORT_BATCH_SIZE as
+    plain column tuples (no ORM objects). Query parameters: format (ndjson or csv,
+    default ndjson), status and start_date / end_date on service_date.
+    """
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"Error": "'format' must be 'ndjson' or 'csv'."}), 400
+    try:
+        start_date, end_date = parse_date_range()
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    status = request.args.get("status")
+
+    query = select(
+        *(getattr(ServiceTicket, column) for column in EXPORT_COLUMNS)
+    ).order_by(ServiceTicket.ticket_id)
+    if start_date:
+        query = query.where(ServiceTicket.service_date >= start_date)
+    if end_date:
+        query = query.where(ServiceTicket.service_date <= end_date)
+    if status:
+        query = query.where(ServiceTicket.status == status)
+
+    def generate():
+        result = db.session.execute(
+            query, execution_options={"yield_per": EXPORT_BATCH_SIZE}
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == "csv":
+            writer.writerow(EXPORT_COLUMNS)
+
+        for batch in result.partitions():
+            for row in batch:
+                values = [
+                    value.isoformat() if isinstance(value, date) else value
+                    for value in row
+                ]
+                if export_format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment; filename=service_tickets.{export_format}"
+        },
+    )
 
 
 # New route for a customer to get their own tickets
 @service_tickets_bp.route("/my-tickets", methods=["GET"])
 @customer_token_required
-@cache.cached(timeout=30)
+@cached_with_tags("tickets:list", query_args=("fields", "expand"), vary_on_user=True)
 def get_my_tickets(current_user):
-    query = select(ServiceTicket).where(ServiceTicket.customer_id == current_user.id)
+    try:
+        fieldset = request_fieldset(compiled_service_tickets_schema, service_ticket_load_options)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    query = (
+        select(ServiceTicket)
+        .where(ServiceTicket.customer_id == current_user.id)
+        .options(*fieldset.options)
+    )
     my_tickets = db.session.execute(query).scalars().all()
     if not my_tickets:
         return jsonify({"message": "You have no service tickets."}), 200
-    return jsonify(service_tickets_schema.dump(my_tickets)), 200
+    return jsonify(guarded_dump(fieldset.schema, my_tickets)), 200
 
 
 # Route to get a service ticket by ID
 @service_tickets_bp.route("/<int:ticket_id>", methods=["GET"])
-@cache.cached(timeout=30)
+@conditional_get(service_ticket_etag, "ticket:{ticket_id}", query_args=("fields", "expand"))
+@cached_with_tags("ticket:{ticket_id}", query_args=("fields", "expand"))
 def find_service_ticket(ticket_id):
-    query = select(ServiceTicket).where(ServiceTicket.ticket_id == ticket_id)
+    try:
+        fieldset = request_fieldset(service_ticket_schema, service_ticket_load_options)
+    except ValueError as e:
+        return jsonify({"Error": str(e)}), 400
+    query = (
+        select(ServiceTicket)
+        .where(ServiceTicket.ticket_id == ticket_id)
+        .options(*fieldset.options)
+    )
     ticket = db.session.execute(query).scalars().first()
     if not ticket:
         return jsonify({"Error": "Service ticket not found."}), 404
-    return jsonify(service_ticket_schema.dump(ticket)), 200
+    return jsonify(guarded_dump(fieldset.schema, ticket)), 200
 
 
 # Route to delete a service ticket
@@ -240,7 +369,16 @@ def edit_ticket_mechanics(current_user, ticket_id):
 
     db.session.add(ticket)  # Explicitly add the ticket to the session
     db.session.commit()
-    return jsonify(service_ticket_schema.dump(ticket)), 200
+
+    # Reload the committed ticket with its loading plan before dumping it
+    query = (
+        select(ServiceTicket)
+        .where(ServiceTicket.ticket_id == ticket_id)
+        .options(*service_ticket_load_options)
+        .execution_options(populate_existing=True)
+    )
+    ticket = db.session.execute(query).scalars().first()
+    return jsonify(guarded_dump(service_ticket_schema, ticket)), 200
 
 
 # Route to log labor hours for a mechanic on a specific ticket
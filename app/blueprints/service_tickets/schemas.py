@@ -1,8 +1,10 @@
 # Service ticket schemas will be defined here
 import re
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from sqlalchemy.orm import joinedload, selectinload
 from app.extensions import ma
 from app.models import ServiceTicket, LaborLog
+from app.utils.compiled_schemas import compile_schema
 from marshmallow import fields, validates, ValidationError
 from ..customers.schemas import CustomerSchema
 from ..mechanics.schemas import MechanicSchema
@@ -61,6 +63,16 @@ class EditTicketSchema(ma.Schema):
         fields = ("add_mechanic_ids", "remove_mechanic_ids")
 
 
+# Loading plan matching the nested fields of ServiceTicketSchema and LaborLogSchema.
+# Apply it with .options(*service_ticket_load_options) on every query whose results
+# are dumped, so a page of tickets costs a fixed number of queries (one per
+# relationship level) instead of lazy loads per ticket.
+service_ticket_load_options = (
+    joinedload(ServiceTicket.customer, innerjoin=True),
+    selectinload(ServiceTicket.mechanics),
+    selectinload(ServiceTicket.labor_logs).joinedload(LaborLog.mechanic, innerjoin=True),
+)
+
 # creating an instance of the schema
 service_ticket_schema = ServiceTicketSchema()
 service_tickets_schema = ServiceTicketSchema(many=True)
@@ -69,3 +81,6 @@ edit_service_ticket_schema = EditTicketSchema()
 # Instances for the new schema
 labor_log_schema = LaborLogSchema()
 labor_logs_schema = LaborLogSchema(many=True)
+
+# Same output as service_tickets_schema.dump, generated once; used by the list routes
+compiled_service_tickets_schema = compile_schema(service_tickets_schema)
@@ -1,14 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_caching import Cache
+from app.utils import ratelimit_storage  # noqa: F401  Registers the sqlite:// limiter storage
+from app.utils.rate_limits import rate_limit_key, route_cost, tier_limits
 
 db = SQLAlchemy()
 ma = Marshmallow()
 limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",  # Explicitly set memory storage to suppress warning
-)
-cache = Cache(config={"CACHE_TYPE": "SimpleCache"})
+    key_func=rate_limit_key,  # Per user when a valid token is sent, else per IP
+    default_limits=["200 per day", "50 per hour"],  # Per route
+    application_limits=[tier_limits],  # One budget across all routes, sized by role
+    application_limits_cost=route_cost,  # Expensive routes declare a higher @request_cost
+)  # Counters are stored where RATELIMIT_STORAGE_URI in the config class says
+cache = Cache()  # Backend chosen by CACHE_TYPE in the config class
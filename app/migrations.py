@@ -0,0 +1,180 @@
+# Versioned schema migrations for databases created before a model change.
+# db.create_all() only creates missing tables, so changes to existing tables
+# (indexes, keys, columns) are applied here, in order, and recorded in the
+# schema_version table. Run them once per deploy with `flask schema upgrade`.
+from contextlib import contextmanager
+import click
+from flask.cli import AppGroup
+from sqlalchemy import inspect, text
+from .models import db, mechanic_association, service_ticket_part_association, VERSIONED_MODELS
+
+schema_cli = AppGroup("schema", help="Database schema migrations.")
+
+
+def _create_missing_indexes(connection, tables):
+    """
+    Creates every index declared on the models that the database does not have yet.
+    Indexes on columns a later migration adds are left to that migration.
+    """
+    inspector = inspect(connection)
+    for table in tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if index.name not in existing and {c.name for c in index.columns} <= columns:
+                index.create(connection)
+
+
+def _add_association_primary_key(connection, table):
+    """Removes duplicate association rows, then adds the composite primary key."""
+    inspector = inspect(connection)
+    if inspector.get_pk_constraint(table.name)["constrained_columns"]:
+        return
+
+    columns = ", ".join(column.name for column in table.primary_key.columns)
+    not_null = " AND ".join(f"{column.name} IS NOT NULL" for column in table.primary_key.columns)
+    connection.execute(text(f"DROP TABLE IF EXISTS {table.name}_dedup"))  # Left by an interrupted run
+    connection.execute(
+        text(f"CREATE TABLE {table.name}_dedup AS SELECT DISTINCT {columns} FROM {table.name} WHERE {not_null}")
+    )
+    connection.execute(text(f"DELETE FROM {table.name}"))
+    connection.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {table.name}_dedup"))
+    connection.execute(text(f"DROP TABLE {table.name}_dedup"))
+
+    if connection.dialect.name == "sqlite":
+        # SQLite cannot add a primary key to an existing table, a unique index gives the same guarantee
+        connection.execute(
+            text(f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{table.name} ON {table.name} ({columns})")
+        )
+    else:
+        connection.execute(text(f"ALTER TABLE {table.name} ADD PRIMARY KEY ({columns})"))
+
+
+def _add_indexes_and_association_keys(connection):
+    for table in (mechanic_association, service_ticket_part_association):
+        _add_association_primary_key(connection, table)
+    _create_missing_indexes(connection, db.metadata.sorted_tables)
+
+
+def _add_version_columns(connection):
+    existing_tables = inspect(connection).get_table_names()
+    for model in VERSIONED_MODELS:
+        table = model.__tablename__
+        if table not in existing_tables:
+            continue
+        columns = {column["name"] for column in inspect(connection).get_columns(table)}
+        if "version" not in columns:
+            connection.execute(
+                text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            )
+
+
+def _add_part_reservation_columns(connection):
+    table = service_ticket_part_association.name
+    columns = {column["name"] for column in inspect(connection).get_columns(table)}
+    if "quantity" not in columns:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN quantity INTEGER NOT NULL DEFAULT 1"))
+    if "hold_expires_at" not in columns:
+        datetime_type = service_ticket_part_association.c.hold_expires_at.type.compile(connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN hold_expires_at {datetime_type}"))
+    _create_missing_indexes(connection, [service_ticket_part_association])
+
+
+# (version, description, step) in the order they must be applied. Append new steps, never edit old ones.
+MIGRATIONS = [
+    (1, "Add foreign key / filter indexes and association table primary keys", _add_indexes_and_association_keys),
+    (2, "Add row version columns used for ETags", _add_version_columns),
+    (3, "Add part quantities and reservation holds to tickets", _add_part_reservation_columns),
+]
+
+
+def current_version(connection):
+    connection.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    version = connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    return version or 0
+
+
+# Advisory lock serialising concurrent upgrades (GET_LOCK name on MySQL, bigint key on Postgres)
+UPGRADE_LOCK_NAME = "mechanic_shop.schema_upgrade"
+UPGRADE_LOCK_KEY = 0x6D656368  # "mech"
+UPGRADE_LOCK_TIMEOUT = 600  # Seconds to wait for another upgrade to finish
+
+
+@contextmanager
+def upgrade_lock():
+    """
+    Holds a session-level advisory lock on its own connection, so two deploys
+    running `schema upgrade` at once apply each step once. SQLite has no
+    advisory locks and is not locked.
+    """
+    with db.engine.connect() as connection:
+        dialect = connection.dialect.name
+        if dialect == "mysql":
+            acquired = connection.execute(
+                text("SELECT GET_LOCK(:name, :timeout)"),
+                {"name": UPGRADE_LOCK_NAME, "timeout": UPGRADE_LOCK_TIMEOUT},
+            ).scalar()
+            if acquired != 1:
+                raise RuntimeError("Timed out waiting for another schema upgrade to finish")
+        elif dialect == "postgresql":
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": UPGRADE_LOCK_KEY})
+        # The lock belongs to the session, end the transaction so it is not left idle
+        connection.commit()
+        try:
+            yield
+        finally:
+            if dialect == "mysql":
+                connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": UPGRADE_LOCK_NAME})
+            elif dialect == "postgresql":
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": UPGRADE_LOCK_KEY})
+            connection.commit()
+
+
+def upgrade():
+    """
+    Applies every migration newer than the database's schema version, holding
+    upgrade_lock(). Returns the applied versions.
+
+    MySQL commits every DDL statement on its own, so a step that fails there can
+    be left half applied. Steps check what already exists and can be run again.
+    """
+    with upgrade_lock():
+        return _apply_pending()
+
+
+def _apply_pending():
+    applied = []
+    # Read under the lock, a concurrent upgrade may just have applied steps
+    with db.engine.begin() as connection:
+        version = current_version(connection)
+    for step_version, description, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        # Each step and its version bump are committed together
+        with db.engine.begin() as connection:
+            step(connection)
+            connection.execute(text("DELETE FROM schema_version"))
+            connection.execute(
+                text("INSERT INTO schema_version (version) VALUES (:version)"),
+                {"version": step_version},
+            )
+        applied.append((step_version, description))
+    return applied
+
+
+@schema_cli.command("upgrade")
+def upgrade_command():
+    """Apply pending schema migrations."""
+    db.create_all()
+    applied = upgrade()
+    for version, description in applied:
+        click.echo(f"Applied migration {version}: {description}")
+    if not applied:
+        click.echo("Schema is up to date.")
+
+
+@schema_cli.command("version")
+def version_command():
+    """Show the current schema version."""
+    with db.engine.begin() as connection:
+        click.echo(f"Schema version {current_version(connection)} (latest {MIGRATIONS[-1][0]})")
@@ -1,24 +1,31 @@
 # Import necessary libraries and modules
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import String, Integer, Date, ForeignKey, Float
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import event
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, Session
 from datetime import date
+from app.utils.replicas import RoutingSession
 
 
 # Define the base model class
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 
 #  Association table for many-to-many relationship between service tickets and mechanics
 mechanic_association = db.Table(
     "mechanic_association",  # Explicitly name the table
     Base.metadata,
     db.Column(
-        "service_ticket_id", db.Integer, db.ForeignKey("service_tickets.ticket_id")
+        "service_ticket_id",
+        db.Integer,
+        db.ForeignKey("service_tickets.ticket_id"),
+        primary_key=True,
     ),
-    db.Column("mechanic_id", db.Integer, db.ForeignKey("mechanics.id")),
+    db.Column("mechanic_id", db.Integer, db.ForeignKey("mechanics.id"), primary_key=True),
+    # The primary key covers lookups by ticket, this one covers lookups and counts by mechanic
+    db.Index("ix_mechanic_association_mechanic_id", "mechanic_id"),
 )
 
 # Association table for many-to-many relationship between service tickets and parts
@@ -26,9 +33,17 @@ service_ticket_part_association = db.Table(
     "service_ticket_part_association",
     Base.metadata,
     db.Column(
-        "service_ticket_id", db.Integer, db.ForeignKey("service_tickets.ticket_id")
+        "service_ticket_id",
+        db.Integer,
+        db.ForeignKey("service_tickets.ticket_id"),
+        primary_key=True,
     ),
-    db.Column("part_id", db.Integer, db.ForeignKey("parts.part_id")),
+    db.Column("part_id", db.Integer, db.ForeignKey("parts.part_id"), primary_key=True),
+    db.Column("quantity", db.Integer, nullable=False, default=1, server_default="1"),
+    # Set while the parts are only held for the ticket; expired holds return their stock
+    db.Column("hold_expires_at", db.DateTime, nullable=True),
+    db.Index("ix_service_ticket_part_association_part_id", "part_id"),
+    db.Index("ix_service_ticket_part_association_hold_expires_at", "hold_expires_at"),
 )
 
 # Define the models
@@ -44,7 +59,8 @@ class Customer(Base):
         nullable=False,
     )
     password: Mapped[str] = mapped_column(db.String(255), nullable=False)
-    
+    version: Mapped[int] = mapped_column(default=1, server_default="1")  # Row version for ETags
+
     # relationship with service tickets
     service_tickets: Mapped[list["ServiceTicket"]] = relationship(
         back_populates="customer"
@@ -60,6 +76,7 @@ class Mechanic(Base):
     phone: Mapped[str] = mapped_column(db.String(100), nullable=False)
     password: Mapped[str] = mapped_column(db.String(255), nullable=False)
     salary: Mapped[float] = mapped_column(db.Float, nullable=False)
+    version: Mapped[int] = mapped_column(default=1, server_default="1")  # Row version for ETags
 
     # relationship with service tickets (existing)
     service_tickets: Mapped[list["ServiceTicket"]] = relationship(
@@ -73,14 +90,20 @@ class ServiceTicket(Base):
     __tablename__ = "service_tickets"
     ticket_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     customer_id: Mapped[int] = mapped_column(
-        db.ForeignKey("customers.id"), nullable=False
+        db.ForeignKey("customers.id"), nullable=False, index=True
     )
-    service_date: Mapped[date] = mapped_column(nullable=False)
+    service_date: Mapped[date] = mapped_column(nullable=False, index=True)
     description: Mapped[str] = mapped_column(db.String(500), nullable=False)
     VIN: Mapped[str] = mapped_column(db.String(100), nullable=False, unique=True)
     status: Mapped[str] = mapped_column(db.String(50), default="Open")
     date_created: Mapped[date] = mapped_column(default=date.today)
     date_completed: Mapped[date] = mapped_column(nullable=True)
+    version: Mapped[int] = mapped_column(default=1, server_default="1")  # Row version for ETags
+
+    # Status filters are combined with service_date ranges in the reports and export
+    __table_args__ = (
+        db.Index("ix_service_tickets_status_service_date", "status", "service_date"),
+    )
 
     # One-to-many relationship with customer
     customer: Mapped["Customer"] = relationship(back_populates="service_tickets")
@@ -102,13 +125,19 @@ class LaborLog(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     hours_worked: Mapped[float] = mapped_column(db.Float, nullable=False)
     date_logged: Mapped[date] = mapped_column(default=date.today)
+    version: Mapped[int] = mapped_column(default=1, server_default="1")  # Row version for ETags
 
     # Foreign Keys
     ticket_id: Mapped[int] = mapped_column(
         db.ForeignKey("service_tickets.ticket_id"), nullable=False
     )
     mechanic_id: Mapped[int] = mapped_column(
-        db.ForeignKey("mechanics.id"), nullable=False
+        db.ForeignKey("mechanics.id"), nullable=False, index=True
+    )
+
+    # Matches the per (ticket, mechanic) grouping of the labor report and covers ticket_id lookups
+    __table_args__ = (
+        db.Index("ix_labor_logs_ticket_id_mechanic_id", "ticket_id", "mechanic_id"),
     )
 
     # Relationships
@@ -124,6 +153,7 @@ class Part(Base):
     description: Mapped[str] = mapped_column(db.String(500), nullable=True)
     price: Mapped[float] = mapped_column(db.Float, nullable=False)
     quantity_in_stock: Mapped[int] = mapped_column(db.Integer, nullable=False)
+    version: Mapped[int] = mapped_column(default=1, server_default="1")  # Row version for ETags
 
     # Many-to-many relationship with ServiceTickets
     service_tickets: Mapped[list["ServiceTicket"]] = relationship(
@@ -131,3 +161,15 @@ class Part(Base):
     )
 
 
+VERSIONED_MODELS = (Customer, Mechanic, ServiceTicket, LaborLog, Part)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_row_versions(session, flush_context, instances):
+    """
+    Increments the version of every changed row. A ticket whose mechanics or parts
+    changed counts as changed even though none of its own columns did.
+    """
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj):
+            obj.version = (obj.version or 0) + 1
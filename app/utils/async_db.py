@@ -0,0 +1,72 @@
+# SQLAlchemy asyncio engine for the views served by the ASGI app (app/asgi.py)
+from flask import current_app
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.models import db
+
+# Async driver used for each sync driver of SQLALCHEMY_DATABASE_URI
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+# Async views by the endpoint of the sync view they replace, see async_view
+ASYNC_VIEWS = {}
+
+
+def async_view(endpoint):
+    """
+    Registers a coroutine as the ASGI app's implementation of a GET endpoint.
+    The sync view keeps serving the endpoint under WSGI.
+    """
+
+    def decorator(f):
+        ASYNC_VIEWS[endpoint] = f
+        return f
+
+    return decorator
+
+
+def async_database_url(app):
+    """ASYNC_SQLALCHEMY_DATABASE_URI, or the sync engine's URL with its async driver."""
+    if app.config.get("ASYNC_SQLALCHEMY_DATABASE_URI"):
+        return app.config["ASYNC_SQLALCHEMY_DATABASE_URI"]
+    with app.app_context():
+        url = db.engine.url  # Relative SQLite paths already resolved by Flask-SQLAlchemy
+    if url.drivername not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver known for {url.drivername}; set ASYNC_SQLALCHEMY_DATABASE_URI")
+    return url.set(drivername=ASYNC_DRIVERS[url.drivername])
+
+
+def _check_driver(url):
+    """Raises RuntimeError naming the package when the async driver of url is not installed."""
+    try:
+        url.get_dialect().import_dbapi()
+    except ImportError as e:
+        raise RuntimeError(
+            f"The async mode needs the {e.name} package for {url.drivername}: "
+            f"pip install {e.name} (see requirements.txt), or set ASYNC_SQLALCHEMY_DATABASE_URI"
+        ) from e
+
+
+def init_async_db(app):
+    """
+    Creates the app's async engine and session factory.
+
+    Call it from the process and event loop that will use them (the ASGI app
+    does so on lifespan startup, or on its first request): pooled connections
+    belong to the loop that opened them.
+    """
+    url = make_url(async_database_url(app))
+    _check_driver(url)
+    engine = create_async_engine(url, **app.config.get("ASYNC_SQLALCHEMY_ENGINE_OPTIONS", {}))
+    app.extensions["async_db"] = async_sessionmaker(engine, expire_on_commit=False)
+    return engine
+
+
+def async_session():
+    """A new AsyncSession for the current app; use it with `async with`."""
+    return current_app.extensions["async_db"]()
@@ -0,0 +1,196 @@
+# Flask-Caching backends shared by all worker processes on a node
+import os
+import pickle
+import time
+from flask_caching.backends.base import BaseCache
+from .shared_sqlite import SharedSQLite
+from .ttl_cache import TTLCache
+
+# Entries kept in the shared SQLite file before the oldest are dropped
+DEFAULT_THRESHOLD = 100000
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache stored in a SQLite file, shared by every process on the node.
+
+    Each process opens its own connection (see SharedSQLite). Entries store an
+    absolute expiry time; expired rows are ignored on read and purged every
+    `purge_interval` writes, and the oldest rows are dropped once there are more
+    than `threshold` entries.
+
+    Config: CACHE_L2_PATH and CACHE_SQLITE_THRESHOLD (default 100000). Flask-Caching's
+    CACHE_THRESHOLD (default 500) sizes in-memory caches and is not used here.
+    """
+
+    def __init__(self, path, default_timeout=300, threshold=DEFAULT_THRESHOLD, purge_interval=500):
+        super().__init__(default_timeout=default_timeout)
+        self.path = path
+        self.threshold = threshold
+        self.purge_interval = purge_interval
+        self._writes = 0
+        self._db = SharedSQLite(
+            path,
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)",
+        )
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            path=config.get("CACHE_L2_PATH") or os.path.join(app.instance_path, "cache.sqlite"),
+            threshold=config.get("CACHE_SQLITE_THRESHOLD", DEFAULT_THRESHOLD),
+        )
+        return cls(*args, **kwargs)
+
+    def _connection(self):
+        return self._db.connection()
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return 0 if timeout == 0 else time.time() + timeout
+
+    def _after_write(self, connection):
+        self._writes += 1
+        if self._writes % self.purge_interval:
+            return
+        connection.execute(
+            "DELETE FROM cache WHERE expires_at != 0 AND expires_at <= ?", (time.time(),)
+        )
+        connection.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at = 0, expires_at "
+            "LIMIT MAX((SELECT COUNT(*) FROM cache) - ?, 0))",
+            (self.threshold,),
+        )
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires_at = 0 OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=None):
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires_at(timeout)),
+        )
+        self._after_write(connection)
+        return True
+
+    def add(self, key, value, timeout=None):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "DELETE FROM cache WHERE key = ? AND expires_at != 0 AND expires_at <= ?",
+                (key, time.time()),
+            )
+            added = connection.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._expires_at(timeout)),
+            ).rowcount
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._after_write(connection)
+        return bool(added)
+
+    def delete(self, key):
+        return bool(
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount
+        )
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+        return True
+
+
+class TwoTierCache(BaseCache):
+    """
+    Small per-process LRU (L1) in front of a cache shared by all workers (L2).
+
+    L2 is a SQLiteCache file on the node, or a Redis-protocol server when
+    CACHE_L2_TYPE is "redis" (any local stand-in speaking the protocol works).
+    Values are stored in L2 together with their absolute expiry time, and an L1
+    copy never outlives that expiry, so both tiers expire an entry at the same
+    moment. L1 copies are additionally capped at `l1_ttl` seconds, which bounds
+    how long a worker can keep serving an entry another worker deleted. Keys
+    starting with one of `l1_bypass_prefixes` are always read from L2.
+
+    Config: CACHE_L1_SIZE (default 1000), CACHE_L1_TTL (default 5),
+    CACHE_L1_BYPASS_PREFIXES, CACHE_L2_TYPE ("sqlite" or "redis"),
+    CACHE_L2_PATH (sqlite file) and CACHE_REDIS_URL (redis).
+    """
+
+    def __init__(self, l2, default_timeout=300, l1_size=1000, l1_ttl=5, l1_bypass_prefixes=()):
+        super().__init__(default_timeout=default_timeout)
+        self.l1 = TTLCache(l1_size, l1_ttl)
+        self.l2 = l2
+        self.l1_ttl = l1_ttl
+        self.l1_bypass_prefixes = tuple(l1_bypass_prefixes)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        if config.get("CACHE_L2_TYPE", "sqlite") == "redis":
+            from flask_caching.backends.rediscache import RedisCache
+
+            l2 = RedisCache.factory(app, config, [], dict(kwargs))
+        else:
+            l2 = SQLiteCache.factory(app, config, [], dict(kwargs))
+        kwargs.update(
+            l1_size=config.get("CACHE_L1_SIZE", 1000),
+            l1_ttl=config.get("CACHE_L1_TTL", 5),
+            l1_bypass_prefixes=config.get("CACHE_L1_BYPASS_PREFIXES", ()),
+        )
+        return cls(l2, *args, **kwargs)
+
+    def _use_l1(self, key):
+        return not key.startswith(self.l1_bypass_prefixes)
+
+    def get(self, key):
+        use_l1 = self._use_l1(key)
+        raw = self.l1.get(key) if use_l1 else None
+        if raw is None:
+            entry = self.l2.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            remaining = self.l1_ttl if expires_at == 0 else expires_at - time.time()
+            if remaining <= 0:
+                return None
+            if use_l1:
+                self.l1.set(key, raw, ttl=min(remaining, self.l1_ttl))
+        # Values are kept pickled in L1 too, so callers never share a mutable object
+        return pickle.loads(raw)
+
+    def _store(self, key, value, timeout, l2_write):
+        timeout = self._normalize_timeout(timeout)
+        expires_at = 0 if timeout == 0 else time.time() + timeout
+        raw = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        stored = l2_write(key, (expires_at, raw), timeout=timeout)
+        if stored and self._use_l1(key):
+            self.l1.set(key, raw, ttl=self.l1_ttl if timeout == 0 else min(timeout, self.l1_ttl))
+        return stored
+
+    def set(self, key, value, timeout=None):
+        return self._store(key, value, timeout, self.l2.set)
+
+    def add(self, key, value, timeout=None):
+        return self._store(key, value, timeout, self.l2.add)
+
+    def delete(self, key):
+        self.l1.pop(key)
+        return self.l2.delete(key)
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        self.l1.clear()
+        return self.l2.clear()
@@ -0,0 +1,266 @@
+# Response caching invalidated by entity tags when the tagged rows are committed
+import hashlib
+import inspect
+import time
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+from flask import g, request, make_response, current_app, has_app_context
+from sqlalchemy import event, select, union
+from sqlalchemy.orm import Session
+from app.extensions import cache
+from app.models import Customer, Mechanic, ServiceTicket, LaborLog, Part, db, mechanic_association
+from .replicas import read_from_replica
+
+# Each tag has a version stored under TAG_PREFIX + tag. A cached response records
+# the versions of its tags and is only served while they are all unchanged, so a
+# commit evicts every response carrying one of its tags by bumping their versions.
+TAG_PREFIX = "tag:"
+PENDING_TAGS = "cache_tags"
+
+
+def entity_tags(obj):
+    """The tags of the cached responses that include this row."""
+    if isinstance(obj, Part):
+        return {f"part:{obj.part_id}", "parts:list"}
+    if isinstance(obj, ServiceTicket):
+        return {f"ticket:{obj.ticket_id}", "tickets:list", "reports"}
+    if isinstance(obj, LaborLog):
+        return {f"ticket:{obj.ticket_id}", "tickets:list", "reports"}
+    # Customers and mechanics are nested in ticket responses, see _nesting_ticket_ids
+    if isinstance(obj, Customer):
+        return {f"customer:{obj.id}", "customers:list", "tickets:list"}
+    if isinstance(obj, Mechanic):
+        return {f"mechanic:{obj.id}", "mechanics:list", "tickets:list", "reports"}
+    return set()
+
+
+def _nesting_ticket_ids(session, obj):
+    """The ids of the tickets whose responses nest this customer or mechanic."""
+    if isinstance(obj, Customer):
+        query = select(ServiceTicket.ticket_id).where(ServiceTicket.customer_id == obj.id)
+    elif isinstance(obj, Mechanic):
+        query = union(
+            select(mechanic_association.c.service_ticket_id).where(
+                mechanic_association.c.mechanic_id == obj.id
+            ),
+            select(LaborLog.ticket_id).where(LaborLog.mechanic_id == obj.id),
+        )
+    else:
+        return []
+    return session.connection().execute(query).scalars().all()
+
+
+def _changed(session, obj):
+    """
+    False for rows that are only dirty because a collection changed, e.g. a
+    mechanic through the backref when a ticket's mechanics change. Tickets own
+    their mechanics, labor logs and parts collections, which their responses nest.
+    """
+    return session.is_modified(obj, include_collections=isinstance(obj, ServiceTicket))
+
+
+def _new_version():
+    # Prefixed with the time, so responses read from a replica can tell a recent change
+    return f"{time.time():.3f}:{uuid.uuid4().hex}"
+
+
+def _tag_versions(tags):
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = cache.get_many(*keys)
+    for i, version in enumerate(versions):
+        if version is None:
+            # A fresh version (rather than a fixed initial one) keeps responses cached
+            # before the version was evicted from being served again
+            cache.add(keys[i], _new_version(), timeout=0)
+            versions[i] = cache.get(keys[i])
+    return tuple(versions)
+
+
+def tag_version(tag):
+    """The tag's current version, a new value each time the tag is invalidated."""
+    return _tag_versions([tag])[0]
+
+
+def bump_tags(tags):
+    """Evicts every cached response carrying one of these tags."""
+    if tags:
+        cache.set_many({TAG_PREFIX + tag: _new_version() for tag in tags}, timeout=0)
+
+
+def invalidate_tags(*tags):
+    """
+    Evicts the tagged responses when the current transaction commits.
+
+    Session events only see changes made through ORM objects; call this after
+    Core UPDATE/INSERT/DELETE statements.
+    """
+    db.session.info.setdefault(PENDING_TAGS, set()).update(tags)
+
+
+def _cacheable(versions):
+    """
+    False when the response was read from a replica within DATABASE_REPLICA_LAG
+    seconds of a change to one of its tags, as the replica may not have that
+    change yet. Such responses are served but not cached.
+    """
+    if not read_from_replica():
+        return True
+    cutoff = time.time() - current_app.config.get("DATABASE_REPLICA_LAG", 5)
+    for version in versions:
+        try:
+            if float(version.split(":", 1)[0]) > cutoff:
+                return False
+        except ValueError:  # Version written before the time prefix was added
+            continue
+    return True
+
+
+def get_or_set_tagged(key, tags, compute, timeout=3600):
+    """Returns compute(), cached under key until one of the tags is invalidated. None is not cached."""
+    versions = _tag_versions(tags)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == versions:
+        return entry[1]
+    value = compute()
+    if value is not None and _cacheable(versions):
+        cache.set(key, (versions, value), timeout=timeout)
+    return value
+
+
+def _normalized_query_args(names):
+    """Query args in a canonical order, without blank values or args outside `names`."""
+    args = []
+    for name in sorted(request.args):
+        if names is not True and name not in names:
+            continue
+        values = [value.strip() for value in request.args.getlist(name) if value.strip()]
+        args.extend((name, value) for value in values)
+    return urlencode(args)
+
+
+def _cache_key(query_args, vary_on_user, vary_on_role, vary_on_accept):
+    """
+    The cache key of the current request under a route's key policy, or None
+    when the policy needs a principal and the request has none.
+    """
+    key = f"view/{request.path}"
+    variant = []
+    if query_args:
+        variant.append(_normalized_query_args(query_args))
+    if vary_on_user or vary_on_role:
+        principal = g.get("current_user")
+        if principal is None:
+            return None
+        variant.append(f"{principal.role}:{principal.id}" if vary_on_user else principal.role)
+    if vary_on_accept:
+        variant.append(str(request.accept_mimetypes))
+    if variant:
+        key += "#" + hashlib.md5("|".join(variant).encode()).hexdigest()
+    return key
+
+
+def cached_with_tags(
+    *tags,
+    timeout=3600,
+    query_args=None,
+    vary_on_user=False,
+    vary_on_role=False,
+    vary_on_accept=False,
+):
+    """
+    Caches a view's 200 responses until one of its tags is invalidated.
+
+    Tags are formatted with the view's URL arguments, e.g. "part:{part_id}".
+    The cache key is the path plus what the route's response depends on:
+      query_args: True for every query arg, or a tuple of the arg names to use.
+        Args are sorted and blank values dropped, so equivalent URLs share an entry.
+      vary_on_user: one entry per authenticated principal (personalised routes)
+      vary_on_role: one entry per role of the authenticated principal
+      vary_on_accept: one entry per Accept header (content negotiation)
+    Routes varying on the principal must be decorated below the token decorator.
+    Async views (app/asgi.py) can be decorated too.
+    """
+    vary = []
+    if vary_on_user or vary_on_role:
+        vary.append("Authorization")
+    if vary_on_accept:
+        vary.append("Accept")
+
+    def lookup(kwargs):
+        """Returns (key, versions, cached response); key None when the request is not cached."""
+        key = _cache_key(query_args, vary_on_user, vary_on_role, vary_on_accept)
+        if key is None:
+            return None, None, None
+        # Versions are read before the view runs, so a commit made while it
+        # renders leaves the stored response already out of date
+        versions = _tag_versions([tag.format(**kwargs) for tag in tags])
+        entry = cache.get(key)
+        if entry is not None and entry[0] == versions:
+            return key, versions, entry[1]
+        return key, versions, None
+
+    def store(key, versions, rv):
+        response = make_response(rv)
+        response.vary.update(vary)
+        if response.status_code == 200 and _cacheable(versions):
+            cache.set(key, (versions, response), timeout=timeout)
+        return response
+
+    def decorator(f):
+        if inspect.iscoroutinefunction(f):
+            # Async views (app/asgi.py); the cache itself is still called synchronously
+
+            @wraps(f)
+            async def decorated_coroutine(*args, **kwargs):
+                key, versions, cached = lookup(kwargs)
+                if key is None:
+                    return await f(*args, **kwargs)
+                if cached is not None:
+                    return cached
+                return store(key, versions, await f(*args, **kwargs))
+
+            return decorated_coroutine
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key, versions, cached = lookup(kwargs)
+            if key is None:
+                return f(*args, **kwargs)
+            if cached is not None:
+                return cached
+            return store(key, versions, f(*args, **kwargs))
+
+        return decorated_function
+
+    return decorator
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_nesting_ticket_tags(session, flush_context, instances):
+    # Before the flush, while the links of deleted customers and mechanics still exist
+    pending = session.info.setdefault(PENDING_TAGS, set())
+    changed = [obj for obj in session.dirty if _changed(session, obj)] + list(session.deleted)
+    for obj in changed:
+        if isinstance(obj, (Customer, Mechanic)) and obj.id is not None:
+            pending.update(f"ticket:{ticket_id}" for ticket_id in _nesting_ticket_ids(session, obj))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_tags(session, flush_context):
+    pending = session.info.setdefault(PENDING_TAGS, set())
+    changed = [obj for obj in session.dirty if _changed(session, obj)]
+    for obj in list(session.new) + changed + list(session.deleted):
+        pending.update(entity_tags(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed_tags(session):
+    tags = session.info.pop(PENDING_TAGS, None)
+    if tags and has_app_context() and cache in current_app.extensions.get("cache", {}):
+        bump_tags(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_tags(session):
+    session.info.pop(PENDING_TAGS, None)
@@ -0,0 +1,153 @@
+# Serializers generated from marshmallow schemas for the hot read-only list responses
+import itertools
+import keyword
+from marshmallow import fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow.schema import Schema
+from sqlalchemy import inspect
+
+_names = itertools.count()
+
+
+def _attribute_expression(attribute):
+    """Source reading a (dotted) attribute of obj."""
+    expression = "obj"
+    for part in attribute.split("."):
+        if part.isidentifier() and not keyword.iskeyword(part):
+            expression += f".{part}"
+        else:
+            expression = f"getattr({expression}, {part!r})"
+    return expression
+
+
+class _Generator:
+    """Writes the source of one dump function per (nested) schema."""
+
+    def __init__(self):
+        self.namespace = {}
+        self.functions = []
+
+    def constant(self, value):
+        """A name bound to value in the generated module."""
+        name = f"_c{next(_names)}"
+        self.namespace[name] = value
+        return name
+
+    def schema_function(self, schema):
+        """Generates a function dumping one object with schema; returns its name."""
+        if schema._hooks[PRE_DUMP] or schema._hooks[POST_DUMP]:
+            raise ValueError(f"{type(schema).__name__} has dump hooks and cannot be compiled")
+        if type(schema).get_attribute is not Schema.get_attribute:
+            raise ValueError(f"{type(schema).__name__} overrides get_attribute and cannot be compiled")
+        name = f"_dump_{type(schema).__name__}_{next(_names)}"
+        model = getattr(schema.opts, "model", None)
+        mapped = set(inspect(model).attrs.keys()) if model is not None else set()
+
+        reads, fast_reads, items = [], [], []
+        for i, (field_name, field) in enumerate(schema.dump_fields.items()):
+            key = field.data_key if field.data_key is not None else field_name
+            value = f"v{i}"
+            attribute = field.attribute or field_name
+            if not field._CHECK_ATTRIBUTE:  # Method, Function, Constant: computed from obj
+                value = "None"
+            elif attribute in mapped:
+                reads.append(f"{value} = {_attribute_expression(attribute)}")
+                fast_reads.append(f"{value} = d[{attribute!r}]")
+            else:
+                reads.append(f"{value} = {_attribute_expression(attribute)}")
+                fast_reads.append(reads[-1])
+            items.append(f"        {key!r}: {self.field_expression(field, field_name, value)},")
+
+        lines = [f"def {name}(obj):"]
+        if model is not None and reads != fast_reads:
+            # Loaded column and relationship values of the schema's model are read
+            # from the instance dict; rows, other classes and unloaded attributes
+            # (KeyError) go through the attributes, which load them as usual
+            lines.append(f"    if obj.__class__ is {self.constant(model)}:")
+            lines.append("        d = obj.__dict__")
+            lines.append("        try:")
+            lines.extend(f"            {line}" for line in fast_reads)
+            lines.append("        except KeyError:")
+            lines.extend(f"            {line}" for line in reads)
+            lines.append("    else:")
+            lines.extend(f"        {line}" for line in reads)
+        else:
+            lines.extend(f"    {line}" for line in reads)
+        lines.append("    return {")
+        lines.extend(items)
+        lines.append("    }")
+        self.functions.append("\n".join(lines))
+        return name
+
+    def field_expression(self, field, field_name, value):
+        """An expression giving field._serialize(value, field_name, obj)."""
+        if isinstance(field, fields.Nested):
+            schema = field.schema
+            function = self.schema_function(schema)
+            if schema.many or field.many:
+                return f"None if {value} is None else [{function}(x) for x in {value}]"
+            return f"None if {value} is None else {function}({value})"
+        if isinstance(field, fields.List):
+            item = self.field_expression(field.inner, field_name, "x")
+            return f"None if {value} is None else [{item} for x in {value}]"
+        if type(field) is fields.String:
+            # ensure_text_type also decodes bytes, so only str passes through as is
+            return (
+                f"{value} if {value}.__class__ is str else "
+                f"({self.generic_expression(field, field_name, value)})"
+            )
+        if type(field) in (fields.Integer, fields.Float) and not field.as_string:
+            kind = field.num_type.__name__
+            return f"{value} if {value}.__class__ is {kind} else (None if {value} is None else {kind}({value}))"
+        if type(field) in (fields.Date, fields.DateTime, fields.Time):
+            data_format = field.format or field.DEFAULT_FORMAT
+            format_function = field.SERIALIZATION_FUNCS.get(data_format)
+            if format_function is None:
+                return self.generic_expression(field, field_name, value)
+            return f"None if {value} is None else {self.constant(format_function)}({value})"
+        return self.generic_expression(field, field_name, value)
+
+    def generic_expression(self, field, field_name, value):
+        """Any other field: its own _serialize, as Field.serialize calls it."""
+        return f"{self.constant(field)}._serialize({value}, {field_name!r}, obj)"
+
+
+class CompiledSchema:
+    """
+    A marshmallow schema's dump, generated once as plain Python functions.
+
+    Every field becomes one read and an inline conversion (int(), float(),
+    str(), date.isoformat...) in a dict literal, and nested schemas become
+    nested function calls, instead of marshmallow's per-field serialize /
+    get_value / _serialize calls. Loaded attributes of the schema's model are
+    read straight from the instance dict. Other field types call their own
+    _serialize, so the output is the same as schema.dump.
+
+    Objects must have every dumped attribute: ORM instances, or Core rows
+    selecting every field. Mappings are not supported. Schemas with
+    pre_dump / post_dump hooks or a custom get_attribute raise ValueError.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.many = schema.many
+        generator = _Generator()
+        function = generator.schema_function(schema)
+        self.source = "\n\n\n".join(reversed(generator.functions))
+        namespace = dict(generator.namespace)
+        exec(compile(self.source, f"<compiled {type(schema).__name__}>", "exec"), namespace)
+        self._dump_one = namespace[function]
+
+    def dump(self, obj, *, many=None):
+        many = self.many if many is None else bool(many)
+        if obj is None:
+            return self.schema.dump(obj, many=many)
+        if many:
+            dump_one = self._dump_one
+            return [dump_one(item) for item in obj]
+        return self._dump_one(obj)
+
+
+def compile_schema(schema):
+    """A CompiledSchema with the same output as schema.dump (and schema.many)."""
+    return CompiledSchema(schema)
@@ -0,0 +1,107 @@
+# Strong ETags built from row versions, and conditional GET handling
+import hashlib
+from functools import wraps
+from flask import request, make_response, Response
+from sqlalchemy import select, func
+from app.utils.cache_tags import _normalized_query_args, get_or_set_tagged, tag_version
+from app.models import (
+    Customer,
+    LaborLog,
+    Mechanic,
+    Part,
+    ServiceTicket,
+    db,
+    mechanic_association,
+)
+
+
+def make_etag(*parts):
+    """A strong ETag value for the given version numbers."""
+    return hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def part_etag(part_id):
+    version = db.session.execute(select(Part.version).where(Part.part_id == part_id)).scalar()
+    return None if version is None else make_etag("part", part_id, version)
+
+
+def parts_etag():
+    # Inserts change the count and max id, deletes the count and updates the version sum.
+    # Deleting the newest part and inserting another (SQLite reuses its id) can repeat
+    # that tuple, so the parts:list tag version, new on every committed change, is added
+    count, max_id, versions = db.session.execute(
+        select(func.count(), func.max(Part.part_id), func.coalesce(func.sum(Part.version), 0))
+    ).one()
+    return make_etag("parts", count, max_id, versions, tag_version("parts:list"))
+
+
+def service_ticket_etag(ticket_id):
+    """Covers the ticket and everything its response nests: customer, mechanics and labor logs."""
+    labor_logs = select(LaborLog).where(LaborLog.ticket_id == ServiceTicket.ticket_id)
+    mechanics = (
+        select(Mechanic)
+        .join(mechanic_association, Mechanic.id == mechanic_association.c.mechanic_id)
+        .where(mechanic_association.c.service_ticket_id == ServiceTicket.ticket_id)
+    )
+    row = db.session.execute(
+        select(
+            ServiceTicket.version,
+            Customer.version,
+            labor_logs.with_only_columns(func.count()).scalar_subquery(),
+            labor_logs.with_only_columns(func.max(LaborLog.id)).scalar_subquery(),
+            labor_logs.with_only_columns(func.sum(LaborLog.version)).scalar_subquery(),
+            mechanics.with_only_columns(func.count()).scalar_subquery(),
+            mechanics.with_only_columns(func.sum(Mechanic.version)).scalar_subquery(),
+        )
+        .join(Customer, Customer.id == ServiceTicket.customer_id)
+        .where(ServiceTicket.ticket_id == ticket_id)
+    ).first()
+    return None if row is None else make_etag("ticket", ticket_id, *row)
+
+
+def conditional_get(etag_function, *tags, query_args=None):
+    """
+    Answers GET requests whose If-None-Match matches the current ETag with 304
+    Not Modified, before the view (and any response cache below it) runs.
+
+    etag_function receives the view's URL arguments and returns the ETag value,
+    or None to let the view handle the request (e.g. to return its 404). It should
+    only read version columns, so a 304 costs no ORM loading or serialization.
+    With cache tags (formatted like cached_with_tags tags) the ETag is kept in
+    the cache until they are invalidated, so repeat requests skip the database.
+    The ETag is computed before the view runs, so at worst a client holding a
+    body newer than its ETag downloads it once more.
+    query_args names the args that change the body (as on cached_with_tags,
+    e.g. ("fields", "expand")). Each normalized combination gets its own ETag.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            variant = _normalized_query_args(query_args) if query_args else ""
+            if tags:
+                etag = get_or_set_tagged(
+                    f"etag/{request.path}?{variant}",
+                    [tag.format(**kwargs) for tag in tags],
+                    lambda: etag_function(**kwargs),
+                )
+            else:
+                etag = etag_function(**kwargs)
+            if etag is None:
+                return f(*args, **kwargs)
+            if variant:
+                etag = make_etag(etag, variant)
+
+            if request.if_none_match.contains_weak(etag):
+                not_modified = Response(status=304)
+                not_modified.set_etag(etag)
+                return not_modified
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+
+        return decorated_function
+
+    return decorator
@@ -0,0 +1,110 @@
+# Sparse fieldsets (?fields=) and expansion control (?expand=) for the read endpoints
+from collections import namedtuple
+from functools import lru_cache
+from flask import request
+from marshmallow import fields as ma_fields
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from .compiled_schemas import CompiledSchema, compile_schema
+
+# The schema to dump a response with and the ORM loader options that load
+# exactly what it dumps
+Fieldset = namedtuple("Fieldset", ["schema", "options"])
+
+
+def _query_names(arg):
+    """Sorted, de-duplicated comma separated names of a query arg; None when it is absent."""
+    if arg not in request.args:
+        return None
+    names = (name.strip() for value in request.args.getlist(arg) for name in value.split(","))
+    return tuple(sorted({name for name in names if name}))
+
+
+def _nested_schema(field):
+    """The schema of a Nested field, or of a List of Nested; None for other fields."""
+    if isinstance(field, ma_fields.List):
+        field = field.inner
+    return field.schema if isinstance(field, ma_fields.Nested) else None
+
+
+def _check_path(schema, path):
+    """True when the dotted path names a dumped field of schema."""
+    name, _, rest = path.partition(".")
+    field = schema.dump_fields.get(name)
+    if field is None:
+        return False
+    if not rest:
+        return True
+    nested = _nested_schema(field)
+    return nested is not None and _check_path(nested, rest)
+
+
+def _load_options(schema):
+    """Loader options loading only the columns and relationships schema dumps."""
+    model = schema.opts.model
+    mapper = inspect(model)
+    columns, options = [], []
+    for name, field in schema.dump_fields.items():
+        attribute = field.attribute or name
+        if attribute in mapper.column_attrs:
+            columns.append(getattr(model, attribute))
+        elif attribute in mapper.relationships:
+            relationship = mapper.relationships[attribute]
+            if relationship.uselist:
+                loader = selectinload(getattr(model, attribute))
+            else:
+                # An inner join when the foreign key cannot be NULL, as in service_ticket_load_options
+                innerjoin = not any(column.nullable for column in relationship.local_columns)
+                loader = joinedload(getattr(model, attribute), innerjoin=innerjoin)
+            options.append(loader.options(*_load_options(_nested_schema(field))))
+    # The primary key is always loaded, so it stands in when no column is dumped
+    columns = columns or [getattr(model, mapper.primary_key[0].key)]
+    return (load_only(*columns), *options)
+
+
+@lru_cache(maxsize=256)
+def _fieldset(schema, fields, expand):
+    """The Fieldset of a normalized ?fields= / ?expand= pair, built once per combination."""
+    dumped = schema.dump_fields
+    nested = {name for name, field in dumped.items() if _nested_schema(field) is not None}
+
+    unknown = [path for path in fields or () if not _check_path(schema, path)]
+    if unknown:
+        raise ValueError(f"Unknown field(s) in 'fields': {', '.join(unknown)}.")
+    not_nested = [name for name in expand or () if name not in nested]
+    if not_nested:
+        raise ValueError(
+            f"'expand' accepts {', '.join(sorted(nested)) or 'no fields'} here, got: {', '.join(not_nested)}."
+        )
+
+    # fields picks the top level fields (all but the nested ones by default) and,
+    # with dotted names, the fields of nested ones; expand adds whole nested fields
+    top = {path.partition(".")[0] for path in fields} if fields else set(dumped) - nested
+    partial = {path.partition(".")[0] for path in fields or () if "." in path}
+    only = {name for name in top if name not in partial}
+    only.update(path for path in fields or () if "." in path)
+    only.update(name for name in expand or () if name not in partial)
+
+    sparse = type(schema)(only=tuple(sorted(only)), exclude=schema.exclude, many=schema.many)
+    return Fieldset(compile_schema(sparse), _load_options(sparse))
+
+
+def request_fieldset(schema, options=()):
+    """
+    The Fieldset for the request's ?fields= and ?expand= query args.
+
+    `schema` (marshmallow or compiled) and `options` are the endpoint's full
+    response and loading plan, returned as they are when neither arg is sent.
+    ?fields=a,b,nested.c selects dumped fields (nested ones by dotted name);
+    without it every non-nested field is dumped. ?expand=nested,... adds whole
+    nested fields. Only the selected columns are loaded and only the selected
+    relationships are joined / selectin loaded. Schemas and options are cached
+    per combination. Raises ValueError for names the schema does not dump.
+    """
+    fields = _query_names("fields")
+    expand = _query_names("expand")
+    if fields is None and expand is None:
+        return Fieldset(schema, options)
+    if isinstance(schema, CompiledSchema):
+        schema = schema.schema
+    return _fieldset(schema, fields, expand)
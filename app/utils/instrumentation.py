@@ -0,0 +1,196 @@
+# Per-request SQL instrumentation: query counts, DB time and N+1 detection
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request, jsonify, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"IN \((?:\?|%s|:\w+)(?:, (?:\?|%s|:\w+))*\)", re.IGNORECASE)
+
+
+class LazyLoadError(RuntimeError):
+    """Raised in strict mode when a relationship or column is lazy loaded during serialization."""
+
+
+def statement_shape(statement):
+    """Normalizes a SQL statement so executions that differ only by literals or IN list size match."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERALS.sub("?", shape)
+    return _IN_LISTS.sub("IN (?)", shape)
+
+
+class RequestSqlStats:
+    """The SQL statements executed while handling one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.lazy_loads = 0
+
+    @property
+    def duplicates(self):
+        """Shapes executed more than once, with their execution counts."""
+        return {shape: count for shape, count in self.shapes.items() if count > 1}
+
+
+class SqlStats:
+    """Per-endpoint totals aggregated across requests in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, stats):
+        duplicated = sum(count - 1 for count in stats.duplicates.values())
+        with self._lock:
+            totals = self._endpoints.setdefault(
+                endpoint,
+                {
+                    "requests": 0,
+                    "queries": 0,
+                    "db_time_ms": 0.0,
+                    "max_queries": 0,
+                    "duplicate_queries": 0,
+                    "lazy_loads_in_serialization": 0,
+                },
+            )
+            totals["requests"] += 1
+            totals["queries"] += stats.queries
+            totals["db_time_ms"] += stats.db_time * 1000
+            totals["max_queries"] = max(totals["max_queries"], stats.queries)
+            totals["duplicate_queries"] += duplicated
+            totals["lazy_loads_in_serialization"] += stats.lazy_loads
+
+    def snapshot(self):
+        """Returns a copy of the totals with per-request averages added."""
+        with self._lock:
+            endpoints = {name: dict(totals) for name, totals in self._endpoints.items()}
+        for totals in endpoints.values():
+            totals["avg_queries"] = round(totals["queries"] / totals["requests"], 2)
+            totals["avg_db_time_ms"] = round(totals["db_time_ms"] / totals["requests"], 3)
+            totals["db_time_ms"] = round(totals["db_time_ms"], 3)
+        return endpoints
+
+
+def _current_stats():
+    if not has_app_context():
+        return None
+    return g.get("sql_stats")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    if stats is None or not conn.info.get("query_start"):
+        return
+    stats.db_time += time.perf_counter() - conn.info["query_start"].pop()
+    stats.queries += 1
+    stats.shapes[statement_shape(statement)] += 1
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _detect_lazy_load(orm_execute_state):
+    """Counts, or in strict mode rejects, lazy loads inside a serialization_guard block."""
+    stats = _current_stats()
+    if stats is None or not g.get("serializing"):
+        return
+    if orm_execute_state.is_relationship_load or orm_execute_state.is_column_load:
+        stats.lazy_loads += 1
+        if g.get("strict_lazy_loads"):
+            raise LazyLoadError(
+                f"Lazy load during serialization in {request.endpoint}: "
+                f"{statement_shape(str(orm_execute_state.statement))}"
+            )
+
+
+@contextmanager
+def serialization_guard():
+    """Marks a block as a serialization step, where lazy loads are an N+1 bug."""
+    previous = g.get("serializing", False)
+    g.serializing = True
+    try:
+        yield
+    finally:
+        g.serializing = previous
+
+
+def guarded_dump(schema, obj):
+    """schema.dump(obj) inside a serialization_guard block."""
+    with serialization_guard():
+        return schema.dump(obj)
+
+
+def init_instrumentation(app):
+    """
+    Hooks SQL instrumentation on the app's engines and request lifecycle.
+
+    Config:
+      SQL_INSTRUMENTATION: enable the instrumentation (default True)
+      SQL_INSTRUMENTATION_HEADERS: add X-DB-* response headers (default app.debug)
+      SQL_STRICT_LAZY_LOADS: raise LazyLoadError on lazy loads during serialization
+      SQL_DUPLICATE_QUERY_WARNING: log a warning when one statement shape runs
+        this many times in a request (default 5)
+      SQL_STATS_ENDPOINT: serve the per-endpoint totals at /_instrumentation/sql
+    """
+    if not app.config.get("SQL_INSTRUMENTATION", True):
+        return
+
+    sql_stats = SqlStats()
+    app.extensions["sql_stats"] = sql_stats
+    send_headers = app.config.get("SQL_INSTRUMENTATION_HEADERS", app.debug)
+    strict = app.config.get("SQL_STRICT_LAZY_LOADS", False)
+    warning_threshold = app.config.get("SQL_DUPLICATE_QUERY_WARNING", 5)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = RequestSqlStats()
+        g.strict_lazy_loads = strict
+
+    @app.after_request
+    def finish_sql_stats(response):
+        stats = g.pop("sql_stats", None)
+        if stats is None:
+            return response
+        endpoint = request.endpoint or "unknown"
+        sql_stats.record(endpoint, stats)
+
+        repeated = {shape: count for shape, count in stats.duplicates.items() if count >= warning_threshold}
+        if repeated:
+            logger.warning(
+                "Possible N+1 in %s: %s",
+                endpoint,
+                "; ".join(f"{count}x {shape}" for shape, count in repeated.items()),
+            )
+
+        if send_headers:
+            response.headers["X-DB-Query-Count"] = str(stats.queries)
+            response.headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.2f}"
+            response.headers["X-DB-Duplicate-Queries"] = str(
+                sum(count - 1 for count in stats.duplicates.values())
+            )
+        return response
+
+    if app.config.get("SQL_STATS_ENDPOINT", False):
+
+        @app.route("/_instrumentation/sql", methods=["GET"])
+        def sql_stats_endpoint():
+            return jsonify(sql_stats.snapshot()), 200
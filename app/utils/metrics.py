@@ -0,0 +1,182 @@
+# Prometheus metrics: request counts and latency per route, cache, rate limiter and DB pool
+import os
+import time
+from flask import g, request, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from app.models import db
+
+# With gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes every worker
+# write its samples to files in that directory, and /metrics aggregates all of them.
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled.",
+    ["blueprint", "endpoint", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency.",
+    ["blueprint", "endpoint", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Response cache lookups.", ["result"])
+RATE_LIMITED = Counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by the rate limiter.",
+    ["blueprint", "endpoint"],
+)
+POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool.", ["bind"])
+POOL_CONNECTIONS = Counter("db_pool_connections_total", "New DB connections opened by the pool.", ["bind"])
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    ["bind"],
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is not yet full).",
+    ["bind"],
+    multiprocess_mode="livesum",
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to get a connection from the pool, including waiting for a free one.",
+    ["bind"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up after pool_timeout.", ["bind"]
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long every checkout takes, and checkout timeouts."""
+
+    bind = "default"
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.labels(bind=self.bind).inc()
+            raise
+        finally:
+            POOL_WAIT.labels(bind=self.bind).observe(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.bind = self.bind
+        return pool
+
+
+def _route_labels():
+    # Unmatched URLs share one label so 404 scans cannot create unbounded series
+    return request.blueprint or "", request.endpoint or "unmatched"
+
+
+def _instrument_cache(cache_backend):
+    """Counts hits and misses of the response cache backend's get()."""
+    original_get = cache_backend.get
+
+    def get(key):
+        value = original_get(key)
+        if not key.startswith("view/"):
+            return value  # Tag versions and ETags are not response lookups
+        CACHE_LOOKUPS.labels(result="miss" if value is None else "hit").inc()
+        return value
+
+    cache_backend.get = get
+
+
+def _instrument_pool(engine, bind):
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTIONS.labels(bind=bind).inc()
+
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.bind = bind
+
+    def record_overflow():
+        if isinstance(engine.pool, QueuePool):
+            POOL_OVERFLOW.labels(bind=bind).set(engine.pool.overflow())
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKOUTS.labels(bind=bind).inc()
+        POOL_CHECKED_OUT.labels(bind=bind).inc()
+        record_overflow()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.labels(bind=bind).dec()
+        record_overflow()
+
+
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def use_timed_pool(app):
+    """
+    Makes the app's engines use TimedQueuePool unless the config picks a pool
+    class. Call it before db.init_app; in-memory SQLite keeps its own pool.
+    """
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    if ":memory:" in (app.config.get("SQLALCHEMY_DATABASE_URI") or ""):
+        return
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    options.setdefault("poolclass", TimedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def init_metrics(app, cache, limiter):
+    """Records request, cache, limiter and pool metrics and serves them at /metrics."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+
+    _instrument_cache(app.extensions["cache"][cache])
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            _instrument_pool(engine, bind or "default")
+
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    # First, so requests stopped by an earlier hook (the limiter's 429s) are timed and counted too
+    app.before_request_funcs.setdefault(None, []).insert(0, start_timer)
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("request_started", None)
+        if started is None:
+            return response
+        blueprint, endpoint = _route_labels()
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(
+            time.perf_counter() - started
+        )
+        REQUESTS.labels(blueprint, endpoint, request.method, response.status_code).inc()
+        if response.status_code == 429:
+            RATE_LIMITED.labels(blueprint, endpoint).inc()
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    @limiter.exempt
+    def metrics():
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
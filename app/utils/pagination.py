@@ -0,0 +1,66 @@
+# Keyset (cursor) pagination helpers for the list endpoints
+import base64
+import json
+from flask import request
+from app.models import db
+from .query_args import parse_int_arg
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(key):
+    """Encodes the last primary key of a page into an opaque cursor string."""
+    raw = json.dumps({"k": key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodes a cursor produced by encode_cursor back into the primary key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))["k"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(key, int) or isinstance(key, bool):
+        raise ValueError("Invalid cursor.")
+    return key
+
+
+def is_cursor_request():
+    """Returns True when the client opted into cursor mode with ?after= or ?limit=."""
+    return "after" in request.args or "limit" in request.args
+
+
+def keyset_query(query, key_column):
+    """
+    Returns (page query, limit) for the page of `query` after the request's cursor.
+    Raises ValueError for a malformed cursor or limit.
+    """
+    limit = parse_int_arg("limit", minimum=1, maximum=MAX_PAGE_SIZE) or DEFAULT_PAGE_SIZE
+    after = request.args.get("after")
+    if after:
+        query = query.where(key_column > decode_cursor(after))
+    return query.order_by(key_column).limit(limit + 1), limit
+
+
+def keyset_page(items, limit, key_column):
+    """Returns (items, next_cursor) from the rows fetched with a keyset_query."""
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(getattr(items[-1], key_column.key))
+    return items, next_cursor
+
+
+def keyset_paginate(query, key_column):
+    """
+    Returns (items, next_cursor) for the page of `query` after the request's cursor.
+
+    Rows are ordered by `key_column` (a unique primary key) and fetched with
+    WHERE key > :after LIMIT :limit + 1, so every page costs the same as the first
+    and no COUNT query is issued. next_cursor is None on the last page.
+    Raises ValueError for a malformed cursor or limit.
+    """
+    query, limit = keyset_query(query, key_column)
+    return keyset_page(db.session.execute(query).scalars().all(), limit, key_column)
@@ -0,0 +1,93 @@
+# Password hashing on a bounded thread pool, so slow KDFs cannot tie up every request thread
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Prefixes of the hashes werkzeug generates ("method:params$salt$hash"). Any
+# other stored value is a plaintext password from before hashing was added.
+HASH_PREFIXES = ("scrypt:", "pbkdf2:")
+# Marks an account that cannot log in with a password (e.g. generated fake data)
+UNUSABLE_PASSWORD = "!"
+
+
+class PasswordHasherBusy(Exception):
+    """More password hashes are queued than PASSWORD_HASH_MAX_PENDING allows."""
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords on a pool of `workers` threads.
+
+    hashlib runs scrypt and PBKDF2 without holding the GIL, so the pool uses
+    several cores while request threads wait on it, and at most `workers` hashes
+    (and their memory, for scrypt) are computed at once per process. Up to
+    `max_pending` further calls wait for a free thread; beyond that calls fail
+    fast with PasswordHasherBusy instead of queueing behind a login storm.
+
+    `method` is a full werkzeug method string with its cost parameters, e.g.
+    "scrypt:32768:8:1" or "pbkdf2:sha256:600000". Hashes made with any other
+    method (or stored as plaintext) are reported as needing a rehash.
+    """
+
+    def __init__(self, method="scrypt:32768:8:1", workers=4, max_pending=64):
+        self.method = method
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._dummy_hash = None
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many password checks in progress")
+        try:
+            return self._executor.submit(function, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def needs_rehash(self, stored):
+        return stored.split("$", 1)[0] != self.method
+
+    def verify(self, stored, password):
+        """
+        Returns (matches, needs_rehash). `stored` None checks a dummy hash and
+        never matches. Plaintext values match by constant time comparison and
+        always need a rehash.
+        """
+        if stored is None:
+            # Unknown email: spend the same time as a wrong password would
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash("dummy password")
+            self._run(check_password_hash, self._dummy_hash, password)
+            return False, False
+        if stored.startswith(UNUSABLE_PASSWORD):
+            return False, False
+        if not stored.startswith(HASH_PREFIXES):
+            return hmac.compare_digest(stored.encode(), password.encode()), True
+        matches = self._run(check_password_hash, stored, password)
+        return matches, matches and self.needs_rehash(stored)
+
+
+def init_password_hasher(app):
+    app.extensions["password_hasher"] = PasswordHasher(
+        method=app.config.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1"),
+        workers=app.config.get("PASSWORD_HASH_WORKERS", 4),
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING", 64),
+    )
+
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        return jsonify({"Error": "Server busy, please retry."}), 503, {"Retry-After": "1"}
+
+
+def hash_password(password):
+    """The hash to store for a new or changed password."""
+    return current_app.extensions["password_hasher"].hash(password)
+
+
+def verify_password(stored, password):
+    """(matches, needs_rehash) for a login attempt; see PasswordHasher.verify."""
+    return current_app.extensions["password_hasher"].verify(stored, password)
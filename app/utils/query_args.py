@@ -0,0 +1,53 @@
+# Query string parsing helpers shared by the list, report and export routes
+from datetime import date
+from flask import request
+
+
+def parse_date_arg(name):
+    """Returns the ISO formatted (YYYY-MM-DD) query parameter as a date, or None if absent."""
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format.")
+
+
+def parse_date_range():
+    """Returns the (start_date, end_date) query parameters, validating their order."""
+    start_date = parse_date_arg("start_date")
+    end_date = parse_date_arg("end_date")
+    if start_date and end_date and start_date > end_date:
+        raise ValueError("'start_date' must be on or before 'end_date'.")
+    return start_date, end_date
+
+
+def parse_int_arg(name, minimum=None, maximum=None):
+    """Returns the integer query parameter, or None if absent."""
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer.")
+    if minimum is not None and number < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}.")
+    if maximum is not None and number > maximum:
+        raise ValueError(f"'{name}' must be at most {maximum}.")
+    return number
+
+
+def parse_float_arg(name, minimum=None):
+    """Returns the numeric query parameter as a float, or None if absent."""
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number.")
+    if minimum is not None and number < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}.")
+    return number
@@ -0,0 +1,92 @@
+# Rate limit keys, per-role tiers and per-route request costs
+from flask import g, request, current_app
+from flask_limiter.util import get_remote_address
+from jose import JWTError
+from .pagination import is_cursor_request
+from .roles import _verify_token
+
+# Application-wide limits of each tier: one budget shared by all routes, on top
+# of the per-route limits. Requests with a valid token are counted per user in
+# the tier of their role, others per IP address. Each request spends its route's
+# cost. Override with RATELIMIT_TIERS in the config class.
+DEFAULT_TIERS = {
+    "anonymous": "1000 per day;200 per hour",
+    "customer": "5000 per day;1000 per hour",
+    "mechanic": "20000 per day;3000 per hour",
+}
+
+
+def _token_claims():
+    """The (role, user id) of the request's bearer token, or None without a valid token."""
+    if "rate_limit_claims" not in g:
+        claims = None
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            try:
+                # Verified (and cached) like the token decorators do, so a
+                # forged subject cannot spend another user's budget
+                claims = _verify_token(current_app.extensions["auth_cache"], auth_header[7:])
+            except (JWTError, KeyError, TypeError, ValueError):
+                claims = None
+        g.rate_limit_claims = claims
+    return g.rate_limit_claims
+
+
+def rate_limit_key():
+    """Limiter key: "role:user id" for authenticated requests, else the client IP."""
+    claims = _token_claims()
+    if claims is None:
+        return get_remote_address()
+    role, user_id = claims
+    return f"{role}:{user_id}"
+
+
+def tier_limits():
+    """The application-wide limits of the request's tier."""
+    tiers = current_app.config.get("RATELIMIT_TIERS", DEFAULT_TIERS)
+    claims = _token_claims()
+    role = claims[0] if claims else "anonymous"
+    return tiers.get(role, tiers["anonymous"])
+
+
+def request_cost(cost):
+    """
+    Declares how many hits of the tier budget one request to the route spends.
+    Use it for expensive routes (reports, exports, un-paginated lists); routes
+    without it cost 1. `cost` is a number, or a callable returning the cost of
+    the current request (see unpaginated_cost).
+    """
+
+    def decorator(f):
+        f.rate_limit_cost = cost  # Copied onto outer decorators by functools.wraps
+        return f
+
+    return decorator
+
+
+def unpaginated_cost(cost, **defaults):
+    """
+    A request_cost for list routes that return the whole table unless paginated:
+    `cost` when the request has no cursor (?after= / ?limit=) and no integer
+    page and per_page, 1 otherwise. `defaults` are the values the route uses
+    for absent args, e.g. page=1, per_page=10.
+    """
+
+    def cost_of_request():
+        if is_cursor_request():
+            return 1
+        try:
+            for name in ("page", "per_page"):
+                int(request.args.get(name, defaults.get(name)))
+        except (TypeError, ValueError):
+            return cost
+        return 1
+
+    return cost_of_request
+
+
+def route_cost():
+    """The declared cost of the route handling the request."""
+    view = current_app.view_functions.get(request.endpoint)
+    cost = getattr(view, "rate_limit_cost", 1)
+    return cost() if callable(cost) else cost
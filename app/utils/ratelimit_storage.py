@@ -0,0 +1,77 @@
+# Rate limit counters shared by every gunicorn worker on the node, without an external service
+import sqlite3
+import time
+from limits.storage import Storage
+from .shared_sqlite import SharedSQLite
+
+
+class SQLiteStorage(Storage):
+    """
+    limits storage backed by a SQLite file, selected with
+    RATELIMIT_STORAGE_URI = "sqlite:///relative/path" or "sqlite:////absolute/path".
+
+    Importing this module registers the "sqlite" scheme. Each hit is one atomic
+    upsert, so all workers count against the same fixed windows, and the counters
+    survive restarts. Supports the fixed-window strategy.
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri, wrap_exceptions=False, purge_interval=1000, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len("sqlite:///"):]
+        self.purge_interval = int(purge_interval)
+        self._hits = 0
+        self._db = SharedSQLite(
+            self.path,
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)",
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        connection = self._db.connection()
+        # A key whose window has ended starts a new window
+        count = connection.execute(
+            "INSERT INTO rate_limits (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "count = CASE WHEN expires_at <= ? THEN excluded.count ELSE count + excluded.count END, "
+            "expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END "
+            "RETURNING count",
+            (key, amount, now + expiry, now, now),
+        ).fetchone()[0]
+
+        self._hits += 1
+        if self._hits % self.purge_interval == 0:
+            connection.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        return count
+
+    def get(self, key):
+        row = self._db.connection().execute(
+            "SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._db.connection().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._db.connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._db.connection().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key):
+        self._db.connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
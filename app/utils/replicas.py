@@ -0,0 +1,112 @@
+# Read replica routing: reads of safe requests go to a replica bind, writes and
+# everything read after them go to the primary (SQLALCHEMY_DATABASE_URI)
+import random
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, TextClause
+from sqlalchemy.sql.dml import UpdateBase
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Holds the time until which a client that just wrote reads from the primary
+STICKY_COOKIE = "db_primary_until"
+
+
+def _is_write(clause):
+    """True for statements that must run on the primary: DML, SELECT ... FOR UPDATE and raw SQL."""
+    if isinstance(clause, (UpdateBase, TextClause)):
+        return True
+    return isinstance(clause, Select) and clause._for_update_arg is not None
+
+
+class RoutingSession(Session):
+    """
+    db.session class sending the reads of replica requests (see init_replicas)
+    to the replica bind chosen for the request.
+
+    Once the session flushes or executes a write, it stays on the primary for
+    the rest of its life (one request), so a request always reads its own writes.
+    Tables with their own bind key are not routed.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or self.info.get("db_primary"):
+            return engine
+        if self._flushing or _is_write(clause):
+            self.info["db_primary"] = True
+            return engine
+        replica = g.get("db_replica") if has_request_context() else None
+        if replica is None or engine is not self._db.engines.get(None):
+            return engine
+        return self._db.engines[replica]
+
+
+def reads_replica(f):
+    """
+    Sends a route's reads to a replica even right after the client wrote
+    (STICKY_COOKIE), for routes where replication lag is acceptable, e.g. reports.
+    """
+    f.reads_replica = True  # Copied onto outer decorators by functools.wraps
+    return f
+
+
+def read_from_replica():
+    """True when the current request reads from a replica."""
+    return has_request_context() and g.get("db_replica") is not None
+
+
+def _sticky():
+    """True while the client is inside the stickiness window of its last write."""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def init_replicas(app):
+    """
+    Routes reads to the binds named in DATABASE_REPLICAS (keys of SQLALCHEMY_BINDS).
+
+    GET, HEAD and OPTIONS requests read from one replica chosen at random per
+    request; other requests only use the primary. After a successful write the
+    response sets STICKY_COOKIE, and that client's reads stay on the primary
+    for DATABASE_REPLICA_LAG seconds (unless DATABASE_REPLICA_STICKY is False),
+    except on @reads_replica routes. Register it before other before_request
+    hooks that query the database, so they read from the replica too.
+    """
+    replicas = list(app.config.get("DATABASE_REPLICAS", ()))
+    if not replicas:
+        return
+    missing = set(replicas) - set(app.config.get("SQLALCHEMY_BINDS") or {})
+    if missing:
+        raise RuntimeError(f"DATABASE_REPLICAS not in SQLALCHEMY_BINDS: {sorted(missing)}")
+    # db.init_app made a metadata per bind; the replicas hold no tables of their
+    # own (they get the schema by replication), so keep create_all / drop_all off them
+    metadatas = app.extensions["sqlalchemy"].metadatas
+    for key in replicas:
+        if key in metadatas and not metadatas[key].tables:
+            del metadatas[key]
+    lag = app.config.get("DATABASE_REPLICA_LAG", 5)
+    sticky = app.config.get("DATABASE_REPLICA_STICKY", True)
+
+    @app.before_request
+    def choose_replica():
+        if request.method not in SAFE_METHODS:
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if sticky and _sticky() and not getattr(view, "reads_replica", False):
+            return
+        g.db_replica = random.choice(replicas)
+
+    @app.after_request
+    def stick_to_primary(response):
+        if sticky and request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{time.time() + lag:.3f}",
+                max_age=int(lag) + 1,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -1,23 +1,104 @@
+import logging
+import time
+from collections import namedtuple
 from functools import wraps
-from flask import request, jsonify
+from flask import g, request, jsonify, current_app, has_app_context
 from jose import jwt, ExpiredSignatureError, JWTError
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
 from app.models import Customer, Mechanic, db
+from .ttl_cache import TTLCache
 from .util import SECRET_KEY
 
+logger = logging.getLogger(__name__)
+
+# The authenticated user passed to protected routes as `current_user`
+Principal = namedtuple("Principal", ["id", "role", "name"])
+
+
+class AuthCache:
+    """
+    Per-process caches that let authenticated requests skip JWT decoding and the user lookup.
+
+    tokens maps a raw token to its (role, user id) claims, for at most token_ttl
+    seconds and never past the token's own expiry. principals maps (role, user id)
+    to a Principal for principal_ttl seconds. Principals are evicted as soon as
+    the customer or mechanic is updated or deleted in this process; other
+    worker processes see the change once principal_ttl has elapsed.
+    """
+
+    def __init__(self, maxsize=10000, token_ttl=300, principal_ttl=60):
+        self.tokens = TTLCache(maxsize, token_ttl)
+        self.principals = TTLCache(maxsize, principal_ttl)
+
+    def invalidate(self, role, user_id):
+        self.principals.pop((role, user_id))
+
+
+def init_auth_cache(app):
+    app.extensions["auth_cache"] = AuthCache(
+        maxsize=app.config.get("AUTH_CACHE_SIZE", 10000),
+        token_ttl=app.config.get("AUTH_TOKEN_CACHE_TTL", 300),
+        principal_ttl=app.config.get("AUTH_PRINCIPAL_CACHE_TTL", 60),
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_principals(session, flush_context):
+    """Evicts cached principals of customers and mechanics changed by this flush."""
+    if not has_app_context():
+        return
+    auth_cache = current_app.extensions.get("auth_cache")
+    if auth_cache is None:
+        return
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Customer):
+            auth_cache.invalidate("customer", obj.id)
+        elif isinstance(obj, Mechanic):
+            auth_cache.invalidate("mechanic", obj.id)
+
+
+def _verify_token(auth_cache, token):
+    """Returns the (role, user id) claims of a valid token, decoding it only on a cache miss."""
+    claims = auth_cache.tokens.get(token)
+    if claims is not None:
+        return claims
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    claims = (payload.get("role"), int(payload["sub"]))
+    ttl = auth_cache.tokens.ttl
+    if "exp" in payload:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        auth_cache.tokens.set(token, claims, ttl=ttl)
+    return claims
+
+
+def _load_principal(auth_cache, model, role, user_id):
+    """Returns the cached Principal, or loads its id and name only on a cache miss."""
+    principal = auth_cache.principals.get((role, user_id))
+    if principal is not None:
+        return principal
+
+    row = db.session.execute(
+        select(model.id, model.name).where(model.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    principal = Principal(id=row.id, role=role, name=row.name)
+    auth_cache.principals.set((role, user_id), principal)
+    return principal
+
 
 def _token_required(role_names, model):
+    # Allow for a list of roles
+    allowed_roles = role_names if isinstance(role_names, list) else [role_names]
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            token = None
             auth_header = request.headers.get("Authorization")
-
-            # Debugging: Log the raw Authorization header
-            print(f"Raw Authorization Header: {auth_header}")
-
-            if auth_header and auth_header.startswith("Bearer "):
-                token = auth_header.split(" ")[1]
-            else:
+            if not auth_header or not auth_header.startswith("Bearer "):
                 # Reject cases where the prefix is missing
                 return (
                     jsonify(
@@ -26,75 +107,47 @@ def _token_required(role_names, model):
                     401,
                 )
 
-            # Debugging: Log the extracted token
-            print(f"Extracted Token: {token}")
-
+            token = auth_header.split(" ")[1]
             if not token:
-                print("Token is missing after parsing.")  # Debugging
+                logger.debug("Token is missing after parsing the Authorization header.")
                 return jsonify({"message": "Token is missing. Please log in."}), 401
 
+            auth_cache = current_app.extensions["auth_cache"]
             try:
-                # Debugging: Log the SECRET_KEY being used
-                print(f"SECRET_KEY: {SECRET_KEY}")
-
-                payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-
-                # Debugging: Log the decoded token payload
-                print(f"Decoded Token Payload: {payload}")
-
-                # Allow for a list of roles
-                allowed_roles = (
-                    role_names if isinstance(role_names, list) else [role_names]
-                )
-
-                # Debugging: Log the expected roles
-                print(f"Expected Roles: {allowed_roles}")
-
-                user_role = payload.get("role")
-
-                # Debugging: Log the user role from the token
-                print(f"User Role from Token: {user_role}")
-
-                if user_role not in allowed_roles:
-                    print(
-                        f"Access denied. User role '{user_role}' not in {allowed_roles}"
-                    )  # Debugging
-                    return (
-                        jsonify(
-                            {
-                                "message": f"Access denied. Required roles: {allowed_roles}"
-                            }
-                        ),
-                        403,
-                    )
-
-                user_id = payload["sub"]
-                current_user = db.session.get(model, int(user_id))
-
-                # Debugging: Log the current user fetched from the database
-                print(f"Current User: {current_user}")
-
-                if not current_user:
-                    print(f"User ID {user_id} not found in the database.")  # Debugging
-                    return (
-                        jsonify(
-                            {
-                                "message": f"Invalid token: {user_role} with ID {user_id} not found. Please log in again."
-                            }
-                        ),
-                        401,
-                    )
-
+                user_role, user_id = _verify_token(auth_cache, token)
             except ExpiredSignatureError:
-                print("Token has expired.")  # Debugging
+                logger.debug("Rejected expired token.")
                 return (
                     jsonify({"message": "Session expired. Please log in again."}),
                     401,
                 )
-            except JWTError as e:
-                print(f"Invalid token. Error: {e}")  # Debugging
+            except (JWTError, KeyError, TypeError, ValueError) as e:
+                logger.debug("Rejected invalid token: %s", e)
                 return jsonify({"message": "Invalid token. Please log in again."}), 401
 
+            if user_role not in allowed_roles:
+                logger.debug("Access denied. Role %r not in %s", user_role, allowed_roles)
+                return (
+                    jsonify(
+                        {"message": f"Access denied. Required roles: {allowed_roles}"}
+                    ),
+                    403,
+                )
+
+            current_user = _load_principal(auth_cache, model, user_role, user_id)
+            if not current_user:
+                logger.debug("%s with ID %s not found in the database.", user_role, user_id)
+                return (
+                    jsonify(
+                        {
+                            "message": f"Invalid token: {user_role} with ID {user_id} not found. Please log in again."
+                        }
+                    ),
+                    401,
+                )
+
+            # Also exposed on g for code outside the view, such as cache key policies
+            g.current_user = current_user
             return f(current_user, *args, **kwargs)
 
         return decorated_function
@@ -0,0 +1,30 @@
+# SQLite file opened by every worker process on the node, for state they must share
+import os
+import sqlite3
+import threading
+
+
+class SharedSQLite:
+    """
+    Per-thread connections to one SQLite file, reopened after a fork.
+
+    Connections are in autocommit mode and WAL journal mode, so readers never
+    block the single writer and each statement is its own transaction.
+    """
+
+    def __init__(self, path, schema):
+        self.path = path
+        self._local = threading.local()
+        self.connection().execute(schema)
+
+    def connection(self):
+        # gunicorn --preload forks after the app (and this object) was created
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
@@ -0,0 +1,6 @@
+# ASGI entry point: `uvicorn asgi:asgi_app --workers 4`
+# The WSGI entry point (gunicorn flask_app:app) is unchanged.
+from flask_app import app
+from app.asgi import AsyncApp
+
+asgi_app = AsyncApp(app)
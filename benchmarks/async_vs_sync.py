@@ -0,0 +1,131 @@
+# The read-heavy routes served by the sync app under gunicorn sync workers and
+# by the ASGI app (app/asgi.py) under uvicorn, with the same number of worker
+# processes, on the same seeded dataset. The response cache is off so every
+# request reaches the database. Point --database-url at MySQL to include real
+# network round trips; the default temporary SQLite file has none.
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.asgi import AsyncApp
+from app.blueprints.fakedata.seeder import seed_database
+from app.models import db
+from .common import Timer, make_app
+
+URLS = [
+    "/service-tickets/?page=1&per_page=20",
+    "/service-tickets/?limit=20",
+    "/inventory/",
+    "/inventory/7",
+    "/mechanics/reports/top_labor_by_ticket?limit=20",
+    "/mechanics/reports/most_tickets_worked?limit=20",
+]
+
+
+def _server_app():
+    return make_app(os.environ["BENCHMARK_DATABASE_URL"], CACHE_TYPE="NullCache")
+
+
+def sync_app():
+    """WSGI app factory for gunicorn."""
+    return _server_app()
+
+
+def asgi_app():
+    """ASGI app factory for uvicorn."""
+    return AsyncApp(_server_app())
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def load(port, concurrency, requests):
+    """`requests` GETs cycling through URLS from `concurrency` client threads."""
+
+    def client(worker):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        latencies, errors = [], 0
+        for i in range(worker, requests, concurrency):
+            started = time.perf_counter()
+            connection.request("GET", URLS[i % len(URLS)])
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - started)
+            errors += response.status != 200
+        connection.close()
+        return latencies, errors
+
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(client, range(concurrency)))
+
+    latencies = sorted(seconds for worker_latencies, _ in results for seconds in worker_latencies)
+    return {
+        "per_second": round(requests / timer.elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "errors": sum(errors for _, errors in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync (gunicorn) vs async (uvicorn) read routes.")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--workers", type=int, default=2, help="server worker processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="client connections")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--tickets", type=int, default=2000)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    app = make_app(database_url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed_database(customers=500, mechanics=50, parts=200, tickets=args.tickets, seed=1)
+
+    env = dict(os.environ, BENCHMARK_DATABASE_URL=database_url)
+    servers = {
+        "sync (gunicorn)": lambda port: [
+            sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-b", f"127.0.0.1:{port}",
+            "-c", "/dev/null", "benchmarks.async_vs_sync:sync_app()",
+        ],
+        "async (uvicorn)": lambda port: [
+            sys.executable, "-m", "uvicorn", "--factory", "benchmarks.async_vs_sync:asgi_app",
+            "--workers", str(args.workers), "--port", str(port), "--log-level", "warning",
+        ],
+    }
+    for name, command in servers.items():
+        port = _free_port()
+        server = subprocess.Popen(command(port), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_for(port)
+            load(port, args.concurrency, min(200, args.requests))  # Warm up
+            print(f"{name:>16}: {load(port, args.concurrency, args.requests)}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# Shared setup for the benchmark scripts: run them from the project root, e.g.
+#   python -m benchmarks.stock_contention --threads 32
+import os
+import tempfile
+import time
+import config
+from app import create_app
+
+
+def make_app(database_url=None, **settings):
+    """
+    An app on its own database (a temporary SQLite file by default), with rate
+    limits and request instrumentation off so they do not skew the numbers.
+    """
+    if database_url is None:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db")
+
+    class BenchmarkConfig(config.TestingConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+        RATELIMIT_ENABLED = False
+        SQL_INSTRUMENTATION = False
+        METRICS_ENABLED = False
+
+    for name, value in settings.items():
+        setattr(BenchmarkConfig, name, value)
+    config.BenchmarkConfig = BenchmarkConfig
+    return create_app("BenchmarkConfig")
+
+
+class Timer:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
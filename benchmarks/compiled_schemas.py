@@ -0,0 +1,67 @@
+# Dump time of seeded ticket pages with marshmallow and with the compiled
+# serializer (app/utils/compiled_schemas.py), for ORM objects as the list
+# routes load them, and for Core rows of the parts list.
+import argparse
+import statistics
+import time
+from sqlalchemy import select
+from app.blueprints.fakedata.seeder import seed_database
+from app.blueprints.inventory.schemas import compiled_parts_schema, parts_schema
+from app.blueprints.service_tickets.schemas import (
+    compiled_service_tickets_schema,
+    service_ticket_load_options,
+    service_tickets_schema,
+)
+from app.models import Part, ServiceTicket, db
+from .common import make_app
+
+
+def median_ms(function, obj, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(obj)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def compare(label, schema, compiled, obj, repeat):
+    assert compiled.dump(obj) == schema.dump(obj)
+    marshmallow_ms = median_ms(schema.dump, obj, repeat)
+    compiled_ms = median_ms(compiled.dump, obj, repeat)
+    print(
+        f"{label:>22}: marshmallow {marshmallow_ms:.2f} ms, compiled {compiled_ms:.2f} ms "
+        f"({marshmallow_ms / compiled_ms:.1f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="marshmallow vs compiled dump time.")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--tickets", type=int, default=1000)
+    parser.add_argument("--parts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    with app.app_context():
+        db.create_all()
+        seed_database(customers=200, mechanics=40, parts=args.parts, tickets=args.tickets, seed=1)
+        query = select(ServiceTicket).options(*service_ticket_load_options)
+        tickets = db.session.execute(query).scalars().all()
+        compare(
+            f"{len(tickets)} tickets (ORM)",
+            service_tickets_schema,
+            compiled_service_tickets_schema,
+            tickets,
+            args.repeat,
+        )
+
+        parts = db.session.execute(select(Part)).scalars().all()
+        compare(f"{len(parts)} parts (ORM)", parts_schema, compiled_parts_schema, parts, args.repeat)
+        rows = db.session.execute(select(*Part.__table__.c)).all()
+        compare(f"{len(rows)} parts (rows)", parts_schema, compiled_parts_schema, rows, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# Encoding time of ticket list responses with Flask's stdlib JSON provider and
+# the orjson provider (app/utils/json_provider.py), on seeded ticket pages with
+# their nested customers, mechanics, parts and labor logs.
+import argparse
+import statistics
+import time
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+from app.blueprints.fakedata.seeder import seed_database
+from app.blueprints.service_tickets.schemas import service_ticket_load_options, service_tickets_schema
+from app.models import ServiceTicket, db
+from app.utils.json_provider import OrjsonProvider
+from .common import make_app
+
+
+def ticket_page(per_page):
+    query = select(ServiceTicket).options(*service_ticket_load_options).limit(per_page)
+    return service_tickets_schema.dump(db.session.execute(query).scalars().all())
+
+
+def time_response(provider, payload, repeat):
+    """Median milliseconds for provider.response(payload), as jsonify calls it, and the body size."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = provider.response(payload).get_data()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON encoding time of ticket pages per provider.")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, DEBUG=False)  # Compact output, as in production
+    with app.app_context():
+        db.create_all()
+        seed_database(customers=200, mechanics=40, parts=100, tickets=args.tickets, seed=1)
+        providers = {"stdlib": DefaultJSONProvider(app), "orjson": OrjsonProvider(app)}
+        for per_page in args.pages:
+            payload = ticket_page(per_page)
+            results = {name: time_response(p, payload, args.repeat) for name, p in providers.items()}
+            stdlib_ms, size = results["stdlib"]
+            orjson_ms, _ = results["orjson"]
+            print(
+                f"{len(payload):>5} tickets ({size / 1024:,.0f} KiB): stdlib {stdlib_ms:.2f} ms, "
+                f"orjson {orjson_ms:.2f} ms ({stdlib_ms / orjson_ms:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Login throughput and latency at several password hash cost settings, with
+# concurrent request threads sharing the bounded hashing pool of
+# app/utils/passwords.py (like gunicorn threads in one worker process).
+import argparse
+import contextlib
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from app.models import Customer, db
+from .common import Timer, make_app
+
+DEFAULT_METHODS = [
+    "pbkdf2:sha256:100000",
+    "pbkdf2:sha256:600000",
+    "scrypt:16384:8:1",
+    "scrypt:32768:8:1",
+]
+
+
+def run(method, threads, hash_workers, logins):
+    app = make_app(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=hash_workers)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        password = generate_password_hash("benchmark password", method)
+        db.session.add_all(
+            Customer(name=f"user{i}", email=f"user{i}@example.com", phone="540-540-9999", password=password)
+            for i in range(threads)
+        )
+        db.session.commit()
+
+    client = app.test_client()
+
+    def login(i):
+        started = time.perf_counter()
+        response = client.post(
+            "/customers/login",
+            json={"email": f"user{i % threads}@example.com", "password": "benchmark password"},
+        )
+        return response.status_code, time.perf_counter() - started
+
+    # The login route prints a greeting per request
+    with contextlib.redirect_stdout(io.StringIO()), Timer() as timer:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(login, range(logins)))
+
+    latencies = sorted(seconds for _, seconds in results)
+    return {
+        "ok": sum(status == 200 for status, _ in results),
+        "busy": sum(status == 503 for status, _ in results),
+        "per_second": round(logins / timer.elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput per password hash cost.")
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--threads", type=int, default=8, help="concurrent request threads")
+    parser.add_argument("--hash-workers", type=int, default=4, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    for method in args.methods:
+        print(f"{method:>22}: {run(method, args.threads, args.hash_workers, args.logins)}")
+
+
+if __name__ == "__main__":
+    main()
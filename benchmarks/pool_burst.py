@@ -0,0 +1,83 @@
+# Connection pool checkout waits under a burst of concurrent requests, for a
+# pool smaller than the request thread count and one sized from it
+# (config.pool_options). Every request holds its connection for --hold-ms,
+# like a slow query, so threads beyond pool_size + max_overflow must wait.
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from prometheus_client import REGISTRY
+from sqlalchemy import exc, text
+from app.models import db
+from config import pool_options
+from .common import Timer, make_app
+
+LABELS = {"bind": "default"}
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, {**LABELS, **labels}) or 0
+
+
+def _snapshot():
+    return {
+        "checkouts": _sample("db_pool_checkout_wait_seconds_count"),
+        "wait": _sample("db_pool_checkout_wait_seconds_sum"),
+        "fast": _sample("db_pool_checkout_wait_seconds_bucket", le="0.01"),
+        "timeouts": _sample("db_pool_timeouts_total"),
+    }
+
+
+def run(options, threads, requests, hold, database_url=None):
+    app = make_app(database_url, METRICS_ENABLED=True, SQLALCHEMY_ENGINE_OPTIONS=options)
+    with app.app_context():
+        db.create_all()
+
+    def handle_request(_):
+        with app.app_context():
+            try:
+                db.session.execute(text("SELECT 1"))
+                time.sleep(hold)
+            except exc.TimeoutError:
+                return False
+            finally:
+                db.session.remove()
+        return True
+
+    # The metrics are process wide, so report the difference over this run
+    before = _snapshot()
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            ok = sum(executor.map(handle_request, range(requests)))
+    after = _snapshot()
+    with app.app_context():
+        db.engine.dispose()
+
+    checkouts = after["checkouts"] - before["checkouts"]
+    waited = checkouts - (after["fast"] - before["fast"])
+    return {
+        "ok": ok,
+        "timeouts": int(after["timeouts"] - before["timeouts"]),
+        "per_second": round(requests / timer.elapsed, 1),
+        "avg_wait_ms": round((after["wait"] - before["wait"]) / checkouts * 1000, 1),
+        "waits_over_10ms": f"{waited / checkouts:.0%}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pool checkout waits under a request burst.")
+    parser.add_argument("--threads", type=int, default=16, help="concurrent request threads")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--hold-ms", type=float, default=20, help="time each request holds its connection")
+    parser.add_argument("--pool-timeout", type=float, default=2)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    hold = args.hold_ms / 1000
+    small = {"pool_size": 2, "max_overflow": 0, "pool_timeout": args.pool_timeout}
+    sized = {**pool_options(args.threads), "pool_timeout": args.pool_timeout}
+    for name, options in (("pool_size=2", small), ("thread sized", sized)):
+        print(f"{name:>13}: {run(options, args.threads, args.requests, hold, args.database_url)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Rate limit checks against the per-process memory:// storage and the shared
+# SQLite storage in app/utils/ratelimit_storage.py, plus a multi-process run
+# showing that with the shared storage every worker counts against one limit.
+import argparse
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from app.utils import ratelimit_storage  # noqa: F401  (registers sqlite://)
+from .common import Timer
+
+
+def check_overhead(uri, checks):
+    """Seconds per limiter.hit on one key, as a request would do."""
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    limit = parse(f"{checks * 2}/hour")
+    with Timer() as timer:
+        for _ in range(checks):
+            limiter.hit(limit, "benchmark", "127.0.0.1")
+    return timer.elapsed / checks
+
+
+def worker_hits(uri, limit, attempts):
+    """One 'gunicorn worker': how many of its requests the limiter let through."""
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    return sum(limiter.hit(parse(limit), "login", "127.0.0.1") for _ in range(attempts))
+
+
+def allowed_across_workers(uri, workers, limit, attempts):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(worker_hits, [uri] * workers, [limit] * workers, [attempts] * workers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rate limit storage overhead and cross-worker accuracy.")
+    parser.add_argument("--checks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", default="100/hour")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_uri = "sqlite:///" + os.path.join(directory, "ratelimit.sqlite")
+        for name, uri in (("memory://", "memory://"), ("sqlite://", sqlite_uri)):
+            per_check = check_overhead(uri, args.checks)
+            print(f"{name:>10}: {per_check * 1e6:.1f} us per check")
+
+        # Every worker tries to spend the whole limit; only the shared storage holds it
+        attempts = parse(args.limit).amount
+        for name, uri in (("memory://", "memory://"), ("sqlite://", sqlite_uri + ".workers")):
+            allowed = allowed_across_workers(uri, args.workers, args.limit, attempts)
+            print(f"{name:>10}: {allowed} allowed across {args.workers} workers (limit {args.limit})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Many threads removing stock from the same part, with the old read-check-write
+# code and with the conditional UPDATE in app/blueprints/inventory/stock.py.
+# The atomic version must sell exactly the initial stock, never more.
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from app.models import Part, db
+from app.blueprints.inventory.stock import decrement_stock
+from .common import Timer, make_app
+
+
+def read_check_write(part_id, quantity):
+    """What remove_part_stock used to do: check in Python, then write the new value back."""
+    part = db.session.get(Part, part_id)
+    if part.quantity_in_stock < quantity:
+        return None
+    part.quantity_in_stock -= quantity
+    return part.name, part.quantity_in_stock
+
+
+def run(app, decrement, threads, attempts, stock):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        part = Part(name="Brake Pad", price=45.99, quantity_in_stock=stock)
+        db.session.add(part)
+        db.session.commit()
+        part_id = part.part_id
+
+    def remove_one(_):
+        with app.app_context():
+            try:
+                result = decrement(part_id, 1)
+                db.session.commit()
+                return "sold" if result is not None else "rejected"
+            except Exception:
+                db.session.rollback()
+                return "error"
+
+    with Timer() as timer:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            outcomes = list(executor.map(remove_one, range(attempts)))
+
+    with app.app_context():
+        remaining = db.session.get(Part, part_id).quantity_in_stock
+    sold = outcomes.count("sold")
+    return {
+        "sold": sold,
+        "rejected": outcomes.count("rejected"),
+        "errors": outcomes.count("error"),
+        "remaining": remaining,
+        # Units reported sold beyond what left the shelf, i.e. lost updates
+        "oversold": sold - (stock - remaining),
+        "seconds": round(timer.elapsed, 3),
+        "per_second": round(attempts / timer.elapsed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent stock decrements on one part.")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=2000)
+    parser.add_argument("--stock", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, SQLALCHEMY_ENGINE_OPTIONS={"pool_size": args.threads})
+    for name, decrement in (("read-check-write", read_check_write), ("atomic update", decrement_stock)):
+        print(f"{name:>16}: {run(app, decrement, args.threads, args.attempts, args.stock)}")
+
+
+if __name__ == "__main__":
+    main()
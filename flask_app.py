@@ -9,6 +9,8 @@ app = create_app("ProductionConfig")
 with app.app_context():
     # db.drop_all()
     db.create_all()
+    # Schema migrations are not run here, where every worker would race to apply
+    # them; run `flask --app flask_app schema upgrade` once per deploy
 
 
 # seeding database
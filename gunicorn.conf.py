@@ -0,0 +1,30 @@
+# Gunicorn settings, loaded automatically when gunicorn is started from the project root
+import os
+import shutil
+import tempfile
+
+# Prometheus multiprocess mode: every worker writes its metrics to files in this
+# directory and /metrics aggregates them, so counters are not per worker.
+# It must be set before the app (and prometheus_client) is imported.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "mechanic_shop_metrics"),
+)
+
+# Worker processes and threads per worker; config.pool_options sizes each
+# worker's connection pool from GUNICORN_THREADS
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+
+def on_starting(server):
+    # Start from an empty directory so samples of a previous run are not reported
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,121 @@
+from app import create_app
+from app.asgi import AsyncApp
+from app.blueprints.fakedata.seeder import seed_database
+from app.models import db, Part
+from app.utils.async_db import init_async_db
+from unittest import mock
+from urllib.parse import urlsplit
+import asyncio
+import json
+import sys
+import unittest
+
+PARITY_URLS = [
+    "/inventory/",
+    "/inventory/3",
+    "/inventory/99999",
+    "/service-tickets/",
+    "/service-tickets/?page=2&per_page=5",
+    "/service-tickets/?page=99&per_page=5",
+    "/service-tickets/?limit=4",
+    "/service-tickets/?limit=0",
+    "/service-tickets/?fields=ticket_id,customer.name&expand=mechanics",
+    "/service-tickets/?fields=unknown",
+    "/inventory/?fields=name,price",
+    "/inventory/3?fields=quantity_in_stock",
+    "/mechanics/reports/top_labor_by_ticket?limit=5&min_hours=1",
+    "/mechanics/reports/top_labor_by_ticket?start_date=bad",
+    "/mechanics/reports/most_tickets_worked?page=2&per_page=3",
+    "/mechanics/reports/most_tickets_worked?limit=2&page=3&per_page=2",
+]
+
+
+def asgi_scope(method, url, headers=()):
+    parts = urlsplit(url)
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": parts.path,
+        "root_path": "",
+        "query_string": parts.query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "server": ("localhost", 80),
+    }
+
+
+class TestAsyncApp(unittest.TestCase):
+    def setUp(self):
+        # Separate Flask apps, so each has its own response cache
+        self.sync_app = create_app("TestingConfig")
+        self.asgi_app = AsyncApp(create_app("TestingConfig"))
+        with self.sync_app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed_database(customers=10, mechanics=6, parts=8, tickets=30, seed=7)
+        self.client = self.sync_app.test_client()
+
+    def run_requests(self, *requests):
+        """Sends (method, url[, body]) requests concurrently to the ASGI app."""
+
+        async def call(method, url, body=b""):
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            headers = [("Content-Type", "application/json"), ("Content-Length", str(len(body)))] if body else []
+            await self.asgi_app(asgi_scope(method, url, headers), receive, send)
+            start = messages[0]
+            headers = {name.decode(): value.decode() for name, value in start["headers"]}
+            return start["status"], headers, b"".join(m.get("body", b"") for m in messages[1:])
+
+        async def main():
+            try:
+                return await asyncio.gather(*(call(*request) for request in requests))
+            finally:
+                if self.asgi_app.engine is not None:
+                    await self.asgi_app.engine.dispose()
+
+        return asyncio.run(main())
+
+    def test_async_views_match_sync_views(self):
+        results = self.run_requests(*(("GET", url) for url in PARITY_URLS))
+        for url, (status, headers, body) in zip(PARITY_URLS, results):
+            with self.subTest(url=url):
+                expected = self.client.get(url)
+                self.assertEqual(status, expected.status_code)
+                if expected.is_json:
+                    self.assertEqual(json.loads(body), expected.get_json())
+
+    def test_other_requests_use_the_sync_app(self):
+        payload = json.dumps({"email": "nobody@email.com", "password": "wrongpassword"}).encode()
+        (login_status, _, _), (customers_status, _, _) = self.run_requests(
+            ("POST", "/customers/login", payload), ("GET", "/customers/")
+        )
+        self.assertEqual(login_status, 401)
+        self.assertEqual(customers_status, 401)  # No async view, token required
+
+    def test_async_views_use_response_cache(self):
+        self.run_requests(("GET", "/inventory/1"))
+        with self.asgi_app.flask_app.app_context():
+            db.session.execute(db.update(Part).where(Part.part_id == 1).values(name="Changed"))
+            db.session.commit()  # Core update without invalidate_tags
+        (_, _, body), = self.run_requests(("GET", "/inventory/1"))
+        self.assertNotEqual(json.loads(body)["name"], "Changed")
+
+    def test_async_views_are_rate_limited(self):
+        self.asgi_app.flask_app.config["RATELIMIT_TIERS"] = {"anonymous": "6/hour"}
+        results = self.run_requests(*[("GET", "/mechanics/reports/most_tickets_worked")] * 2)
+        self.assertEqual(sorted(status for status, _, _ in results), [200, 429])  # Reports cost 5
+
+    def test_missing_async_driver_is_a_startup_error(self):
+        app = self.asgi_app.flask_app
+        app.config["ASYNC_SQLALCHEMY_DATABASE_URI"] = "postgresql+asyncpg://shop@db/shop"
+        with mock.patch.dict(sys.modules, {"asyncpg": None}):  # Not installed
+            with self.assertRaisesRegex(RuntimeError, "pip install asyncpg"):
+                init_async_db(app)
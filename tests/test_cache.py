@@ -0,0 +1,283 @@
+from app import create_app
+from app.extensions import cache
+from app.models import db, Part, Customer, Mechanic, ServiceTicket
+from app.utils.cache_backends import SQLiteCache, TwoTierCache
+from app.utils.cache_tags import _tag_versions, invalidate_tags
+from app.utils.util import encode_token
+from datetime import date
+from sqlalchemy import update
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class TestTwoTierCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_worker(self, **kwargs):
+        """Helper method returning a cache as one worker process would open it"""
+        return TwoTierCache(SQLiteCache(self.path), **kwargs)
+
+    def test_l2_shared_between_workers(self):
+        first, second = self.make_worker(), self.make_worker()
+        first.set("view//inventory/", {"name": "Oil Filter"}, timeout=60)
+        self.assertEqual(second.get("view//inventory/"), {"name": "Oil Filter"})
+        self.assertIsNone(second.get("missing"))
+
+    def test_l1_serves_until_its_ttl(self):
+        first, second = self.make_worker(l1_ttl=0.2), self.make_worker(l1_ttl=0.2)
+        first.set("key", 1, timeout=60)
+        self.assertEqual(second.get("key"), 1)  # Now held in second's L1
+        first.delete("key")
+        self.assertEqual(second.get("key"), 1)
+        time.sleep(0.25)
+        self.assertIsNone(second.get("key"))
+
+    def test_both_tiers_expire_together(self):
+        worker = self.make_worker(l1_ttl=60)
+        worker.set("key", "value", timeout=1)
+        self.assertEqual(worker.get("key"), "value")
+        time.sleep(1.1)
+        self.assertIsNone(worker.get("key"))
+        self.assertIsNone(worker.l2.get("key"))
+
+    def test_l1_returns_copies(self):
+        worker = self.make_worker()
+        worker.set("key", {"items": []})
+        worker.get("key")["items"].append(1)
+        self.assertEqual(worker.get("key"), {"items": []})
+
+    def test_bypass_prefix_reads_l2(self):
+        first = self.make_worker(l1_bypass_prefixes=("tag:",))
+        second = self.make_worker(l1_bypass_prefixes=("tag:",))
+        first.set("tag:part", "v1")
+        self.assertEqual(second.get("tag:part"), "v1")
+        first.set("tag:part", "v2")
+        self.assertEqual(second.get("tag:part"), "v2")
+
+    def test_add_and_clear(self):
+        first, second = self.make_worker(), self.make_worker()
+        self.assertTrue(first.add("key", 1))
+        self.assertFalse(second.add("key", 2))
+        self.assertEqual(second.get("key"), 1)
+        second.clear()
+        self.assertIsNone(second.get("key"))
+
+    def test_sqlite_threshold(self):
+        store = SQLiteCache(self.path, threshold=10, purge_interval=5)
+        for i in range(20):
+            store.set(f"key{i}", i)
+        self.assertIsNone(store.get("key0"))
+        self.assertEqual(store.get("key19"), 19)
+
+    def test_selected_by_config(self):
+        app = create_app("TestingConfig")
+        app.config.update(
+            CACHE_TYPE="app.utils.cache_backends.TwoTierCache", CACHE_L2_PATH=self.path
+        )
+        cache.init_app(app)
+        backend = app.extensions["cache"][cache]
+        self.assertIsInstance(backend, TwoTierCache)
+        self.assertEqual(backend.l2.path, self.path)
+
+    def test_sqlite_threshold_from_config(self):
+        app = create_app("TestingConfig")
+        app.config.update(
+            CACHE_TYPE="app.utils.cache_backends.TwoTierCache", CACHE_L2_PATH=self.path
+        )
+        cache.init_app(app)
+        # Not Flask-Caching's CACHE_THRESHOLD, whose default of 500 is meant for memory caches
+        self.assertEqual(app.extensions["cache"][cache].l2.threshold, 100000)
+        app.config.update(CACHE_SQLITE_THRESHOLD=250)
+        cache.init_app(app)
+        self.assertEqual(app.extensions["cache"][cache].l2.threshold, 250)
+
+
+class TestCacheTags(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            customer = Customer(
+                name="test_customer", email="customer@email.com", phone="111", password="pw"
+            )
+            db.session.add_all(
+                [
+                    customer,
+                    Part(name="Oil Filter", description="Filter", price=9.99, quantity_in_stock=5),
+                    Part(name="Spark Plug", description="Plug", price=4.99, quantity_in_stock=8),
+                ]
+            )
+            db.session.flush()
+            db.session.add(
+                ServiceTicket(
+                    customer_id=customer.id,
+                    service_date=date.today(),
+                    description="Brakes",
+                    VIN="1HGBH41JXMN109186",
+                )
+            )
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def get(self, url):
+        """Helper method returning the JSON body and the number of queries it took"""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json, int(response.headers["X-DB-Query-Count"])
+
+    def update_part(self, part_id, **values):
+        with self.app.app_context():
+            part = db.session.get(Part, part_id)
+            for field, value in values.items():
+                setattr(part, field, value)
+            db.session.commit()
+
+    def test_cached_until_tag_changes(self):
+        self.get("/inventory/1")
+        body, queries = self.get("/inventory/1")
+        self.assertEqual(queries, 0)
+
+        self.update_part(1, quantity_in_stock=3)
+        body, queries = self.get("/inventory/1")
+        self.assertEqual(body["quantity_in_stock"], 3)
+        self.assertGreater(queries, 0)
+
+    def test_only_affected_entries_evicted(self):
+        self.get("/inventory/1")
+        self.get("/inventory/2")
+        self.get("/inventory/")
+
+        self.update_part(1, price=12.5)
+        self.assertEqual(self.get("/inventory/2")[1], 0)
+        body, queries = self.get("/inventory/")
+        self.assertEqual(body[0]["price"], 12.5)
+        self.assertGreater(queries, 0)
+
+    def test_rollback_keeps_entries(self):
+        self.get("/inventory/1")
+        with self.app.app_context():
+            db.session.get(Part, 1).price = 1.0
+            db.session.flush()
+            db.session.rollback()
+        self.assertEqual(self.get("/inventory/1")[1], 0)
+
+    def test_nested_customer_change(self):
+        self.get("/service-tickets/1")
+        with self.app.app_context():
+            db.session.get(Customer, 1).name = "renamed"
+            db.session.commit()
+        body, _ = self.get("/service-tickets/1")
+        self.assertEqual(body["customer"]["name"], "renamed")
+
+    def test_customer_change_evicts_only_its_tickets(self):
+        with self.app.app_context():
+            other = Customer(name="other", email="other@email.com", phone="222", password="pw")
+            db.session.add(other)
+            db.session.flush()
+            db.session.add(
+                ServiceTicket(
+                    customer_id=other.id,
+                    service_date=date.today(),
+                    description="Tires",
+                    VIN="1HGBH41JXMN109187",
+                )
+            )
+            db.session.commit()
+        self.get("/service-tickets/1")
+        self.get("/service-tickets/2")
+        with self.app.app_context():
+            db.session.get(Customer, 1).name = "renamed"
+            db.session.commit()
+        self.assertEqual(self.get("/service-tickets/2")[1], 0)
+        body, queries = self.get("/service-tickets/1")
+        self.assertEqual(body["customer"]["name"], "renamed")
+        self.assertGreater(queries, 0)
+
+    def test_backref_only_change_keeps_mechanic_tags(self):
+        tags = ("mechanic:1", "mechanics:list", "ticket:1")
+        with self.app.app_context():
+            db.session.add(
+                Mechanic(name="mechanic", email="m@email.com", phone="333", password="pw", salary=1)
+            )
+            db.session.commit()
+            before = _tag_versions(tags)
+            ticket = db.session.get(ServiceTicket, 1)
+            ticket.mechanics.append(db.session.get(Mechanic, 1))  # The mechanic is dirty via the backref
+            db.session.commit()
+            after = _tag_versions(tags)
+            self.assertEqual(db.session.get(Mechanic, 1).version, 1)
+        self.assertEqual(after[:2], before[:2])
+        self.assertNotEqual(after[2], before[2])  # The ticket owns the link
+
+    def test_core_update_with_invalidate_tags(self):
+        self.get("/inventory/1")
+        with self.app.app_context():
+            db.session.execute(
+                update(Part).where(Part.part_id == 1).values(quantity_in_stock=0)
+            )
+            invalidate_tags("part:1", "parts:list")
+            db.session.commit()
+        self.assertEqual(self.get("/inventory/1")[0]["quantity_in_stock"], 0)
+
+
+class TestCacheKeyPolicy(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            for i in (1, 2):
+                customer = Customer(
+                    name=f"customer{i}", email=f"customer{i}@email.com", phone="111", password="pw"
+                )
+                db.session.add(customer)
+                db.session.flush()
+                db.session.add(
+                    ServiceTicket(
+                        customer_id=customer.id,
+                        service_date=date.today(),
+                        description=f"Ticket of customer {i}",
+                        VIN=f"1HGBH41JXMN10918{i}",
+                    )
+                )
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def get(self, url, customer_id=None):
+        """Helper method returning the response, authenticated as customer_id when given"""
+        headers = {}
+        if customer_id is not None:
+            headers["Authorization"] = f"Bearer {encode_token(customer_id)}"
+        response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_personalised_route_keyed_by_principal(self):
+        first = self.get("/service-tickets/my-tickets", customer_id=1)
+        second = self.get("/service-tickets/my-tickets", customer_id=2)
+        self.assertEqual(first.json[0]["customer_id"], 1)
+        self.assertEqual(second.json[0]["customer_id"], 2)
+        self.assertIn("Authorization", second.headers["Vary"])
+
+        again = self.get("/service-tickets/my-tickets", customer_id=1)
+        self.assertEqual(again.json[0]["customer_id"], 1)
+        self.assertEqual(again.headers["X-DB-Query-Count"], "0")
+
+    def test_pages_cached_separately(self):
+        first = self.get("/service-tickets/?page=1&per_page=1")
+        second = self.get("/service-tickets/?page=2&per_page=1")
+        self.assertNotEqual(first.json, second.json)
+
+    def test_equivalent_query_strings_share_entry(self):
+        self.get("/service-tickets/?page=1&per_page=1")
+        response = self.get("/service-tickets/?per_page=1&page=1&status=")
+        self.assertEqual(response.headers["X-DB-Query-Count"], "0")
@@ -0,0 +1,122 @@
+from app import create_app
+from app.blueprints.customers.schemas import compiled_customers_schema, customers_schema
+from app.blueprints.fakedata.seeder import seed_database
+from app.blueprints.inventory.schemas import compiled_parts_schema, parts_schema
+from app.blueprints.service_tickets.schemas import (
+    LaborLogSchema,
+    compiled_service_tickets_schema,
+    service_ticket_load_options,
+    service_ticket_schema,
+    service_tickets_schema,
+)
+from app.models import db, Customer, Part, ServiceTicket
+from app.utils.compiled_schemas import compile_schema
+from datetime import date
+from marshmallow import Schema, fields, post_dump
+from sqlalchemy import select
+from types import SimpleNamespace
+import unittest
+
+
+class TestCompiledSchemas(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed_database(customers=15, mechanics=8, parts=12, tickets=60, seed=11)
+
+    def assertSameDump(self, compiled, schema, obj, **kwargs):
+        expected = schema.dump(obj, **kwargs)
+        self.assertEqual(compiled.dump(obj, **kwargs), expected)
+        self.assertEqual(list(compiled.dump(obj, **kwargs)), list(expected))  # Same key order
+
+    def test_ticket_parity(self):
+        with self.app.app_context():
+            query = select(ServiceTicket).options(*service_ticket_load_options)
+            tickets = db.session.execute(query).scalars().all()
+            self.assertTrue(any(ticket.date_completed is None for ticket in tickets))
+            self.assertSameDump(compiled_service_tickets_schema, service_tickets_schema, tickets)
+            self.assertSameDump(compiled_service_tickets_schema, service_ticket_schema, tickets[0], many=False)
+            compiled_one = compile_schema(service_ticket_schema)
+            self.assertSameDump(compiled_one, service_ticket_schema, tickets[0])
+            self.assertSameDump(compiled_one, service_ticket_schema, None)
+
+    def test_parts_and_customers_parity(self):
+        with self.app.app_context():
+            parts = db.session.execute(select(Part)).scalars().all()
+            customers = db.session.execute(select(Customer)).scalars().all()
+            self.assertSameDump(compiled_parts_schema, parts_schema, parts)
+            self.assertSameDump(compiled_customers_schema, customers_schema, customers)
+            self.assertNotIn("password", compiled_customers_schema.dump(customers)[0])
+
+    def test_core_rows(self):
+        with self.app.app_context():
+            rows = db.session.execute(
+                select(Part.part_id, Part.name, Part.description, Part.price, Part.quantity_in_stock)
+            ).all()
+            self.assertSameDump(compiled_parts_schema, parts_schema, rows)
+
+    def test_expired_and_transient_objects(self):
+        with self.app.app_context():
+            parts = db.session.execute(select(Part)).scalars().all()
+            db.session.expire_all()  # Attributes reload on access, as with marshmallow
+            self.assertEqual(compiled_parts_schema.dump(parts), parts_schema.dump(parts))
+
+        ticket = ServiceTicket(
+            ticket_id=1,
+            customer_id=2,
+            service_date=date(2024, 5, 1),
+            description="Brakes",
+            VIN="1HGBH41JXMN109186",
+            status="Open",
+            date_created=date(2024, 5, 1),
+            date_completed=None,
+            customer=None,
+            mechanics=[],
+            labor_logs=[],
+        )
+        self.assertSameDump(compiled_service_tickets_schema, service_tickets_schema, [ticket])
+
+    def test_converts_like_marshmallow(self):
+        # Values of other types go through the same conversions as marshmallow's
+        part = SimpleNamespace(
+            part_id="7", name=b"bytes name", description=None, price=10, quantity_in_stock=True
+        )
+        self.assertSameDump(compiled_parts_schema, parts_schema, [part])
+        self.assertEqual(compiled_parts_schema.dump([part])[0]["price"], 10.0)
+
+    def test_other_fields_and_keys(self):
+        class ExampleSchema(Schema):
+            key = fields.Integer(attribute="id", data_key="identifier")
+            total = fields.Method("get_total")
+            created = fields.DateTime(format="%Y/%m/%d")
+            cost = fields.Decimal(as_string=True)
+            logs = fields.List(fields.Nested(LaborLogSchema, only=("id",)))
+
+            def get_total(self, obj):
+                return obj.id * 2
+
+        schema = ExampleSchema()
+        obj = SimpleNamespace(
+            id=4,
+            created=date(2024, 1, 2),
+            cost=1.5,
+            logs=[SimpleNamespace(id=1), None],
+        )
+        self.assertSameDump(compile_schema(schema), schema, obj)
+
+    def test_dump_hooks_are_rejected(self):
+        class HookSchema(Schema):
+            id = fields.Integer()
+
+            @post_dump
+            def wrap(self, data, **kwargs):
+                return {"data": data}
+
+        with self.assertRaises(ValueError):
+            compile_schema(HookSchema())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 from app import create_app
 from app.models import db, Customer
 from app.utils.util import encode_token
+from sqlalchemy import event
 import unittest
 
 
@@ -98,6 +99,35 @@ class TestMember(unittest.TestCase):
         response_data = response.get_json()
         self.assertIn("Error", response_data)
 
+    # Password hashes are never sent to clients
+    def test_responses_exclude_password(self):
+        headers = {"Authorization": "Bearer " + self.test_login_customer()}
+        payload = {
+            "name": "John Doe",
+            "email": "jd@example.com",
+            "phone": "540-540-9999",
+            "password": "12345678",
+        }
+        self.client.post(
+            "/service-tickets/",
+            json={"service_date": "2024-05-01", "description": "Brakes", "VIN": "1HGBH41JXMN109186"},
+            headers=headers,
+        )
+        responses = [
+            self.client.post("/customers/", json=payload),
+            self.client.get("/customers/1", headers=headers),
+            self.client.put("/customers/1", json={"name": "Peter"}, headers=headers),
+            self.client.get("/customers/", headers=headers),
+            self.client.get("/customers/search?name=Peter", headers=headers),
+            self.client.get("/service-tickets/"),
+            self.client.get("/service-tickets/1"),
+            self.client.get("/service-tickets/my-tickets", headers=headers),
+        ]
+        for response in responses:
+            self.assertLess(response.status_code, 300, response.request.path)
+            self.assertNotIn("password", response.get_data(as_text=True), response.request.path)
+        self.assertEqual(responses[5].get_json()[0]["customer"]["name"], "Peter")
+
     # Get all customers test
     def test_get_all_customers(self):
         headers = {"Authorization": "Bearer " + self.test_login_customer()}
@@ -109,6 +139,77 @@ class TestMember(unittest.TestCase):
         self.assertIsInstance(customers, list)
         self.assertTrue(len(customers) >= 1)
 
+    # Cursor pagination test
+    def test_get_customers_with_cursor(self):
+        with self.app.app_context():
+            for i in range(4):
+                db.session.add(
+                    Customer(
+                        name=f"customer_{i}",
+                        email=f"customer_{i}@email.com",
+                        phone="111-111-1111",
+                        password="testpassword123",
+                    )
+                )
+            db.session.commit()
+        headers = {"Authorization": "Bearer " + self.test_login_customer()}
+
+        seen = []
+        url = "/customers/?limit=2"
+        while True:
+            response = self.client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            page = response.get_json()
+            self.assertLessEqual(len(page["items"]), 2)
+            seen.extend(c["id"] for c in page["items"])
+            if page["next_cursor"] is None:
+                break
+            url = f"/customers/?limit=2&after={page['next_cursor']}"
+        self.assertEqual(seen, [1, 2, 3, 4, 5])
+
+    def test_invalid_customer_cursor(self):
+        headers = {"Authorization": "Bearer " + self.test_login_customer()}
+
+        response = self.client.get("/customers/?after=not-a-cursor", headers=headers)
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/customers/?limit=1000", headers=headers)
+        self.assertEqual(response.status_code, 400)
+
+    # Authentication fast path test
+    def test_repeated_auth_does_no_user_lookup(self):
+        headers = {"Authorization": "Bearer " + self.test_login_customer()}
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            self.client.get("/customers/search?name=test", headers=headers)
+            first_request = len(statements)
+            statements.clear()
+            response = self.client.get("/customers/search?name=test", headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(first_request, 2)  # principal lookup + search
+        self.assertEqual(len(statements), 1)  # search only
+
+    def test_update_invalidates_cached_principal(self):
+        headers = {"Authorization": "Bearer " + self.test_login_customer()}
+        self.client.get("/customers/search?name=test", headers=headers)
+        principals = self.app.extensions["auth_cache"].principals
+        self.assertEqual(principals.get(("customer", 1)).name, "test_user")
+
+        self.client.put("/customers/1", json={"name": "renamed"}, headers=headers)
+        self.assertIsNone(principals.get(("customer", 1)))
+
+        self.client.get("/customers/search?name=test", headers=headers)
+        self.assertEqual(principals.get(("customer", 1)).name, "renamed")
+
     # Invalid get all customers test (no auth)
     def test_invalid_get_all_customers(self):
         # Try to get customers without authorization header
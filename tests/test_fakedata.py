@@ -0,0 +1,115 @@
+from app import create_app
+from app.models import db, Customer, ServiceTicket, LaborLog, mechanic_association
+from app.blueprints.fakedata.seeder import seed_database
+from datetime import date
+from collections import Counter
+from sqlalchemy import event, select, func
+import unittest
+
+
+class TestFakeData(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+        self.client = self.app.test_client()
+
+    def ticket_snapshot(self):
+        """Helper method returning the seeded tickets as comparable tuples"""
+        with self.app.app_context():
+            query = select(
+                ServiceTicket.ticket_id,
+                ServiceTicket.customer_id,
+                ServiceTicket.VIN,
+                ServiceTicket.description,
+                ServiceTicket.service_date,
+            ).order_by(ServiceTicket.ticket_id)
+            return db.session.execute(query).all()
+
+    def test_seed_database_route(self):
+        """Test the default scale matches the original seeding endpoint"""
+        response = self.client.post("/fakedata/seed-database")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data["customers"], 100)
+        self.assertEqual(data["mechanics"], 20)
+        self.assertEqual(data["parts"], 50)
+        self.assertEqual(data["service_tickets"], 100)
+        self.assertIn("seed", data)
+
+        with self.app.app_context():
+            self.assertEqual(db.session.scalar(select(func.count(Customer.id))), 100)
+            logs = db.session.scalar(select(func.count(LaborLog.id)))
+            links = db.session.scalar(select(func.count()).select_from(mechanic_association))
+            self.assertEqual(logs, data["labor_logs"])
+            self.assertEqual(logs, links)  # one labor log per assigned mechanic
+
+    def test_seed_database_scale_and_seed(self):
+        """Test the same seed reproduces the same dataset"""
+        payload = {"customers": 7, "mechanics": 3, "parts": 4, "tickets": 25, "seed": 42}
+        self.client.post("/fakedata/seed-database", json={**payload, "chunk_size": 10})
+        first = self.ticket_snapshot()
+        self.assertEqual(len(first), 25)
+
+        self.client.post("/fakedata/seed-database", json={**payload, "chunk_size": 10})
+        self.assertEqual(self.ticket_snapshot(), first)
+
+        self.client.post("/fakedata/seed-database", json={**payload, "seed": 7})
+        self.assertNotEqual(self.ticket_snapshot(), first)
+
+    def test_seed_with_worker_processes(self):
+        """Test parallel generation produces the same rows as a single process"""
+        options = dict(
+            customers=5, mechanics=2, parts=3, tickets=30, seed=1, chunk_size=8,
+            as_of=date(2025, 1, 1),
+        )
+        with self.app.app_context():
+            seed_database(workers=1, **options)
+        single = self.ticket_snapshot()
+        with self.app.app_context():
+            seed_database(workers=2, **options)
+        self.assertEqual(self.ticket_snapshot(), single)
+
+    def test_one_insert_per_table_and_chunk(self):
+        """Test rows with and without NULL columns share one executemany batch"""
+        inserts = Counter()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO"):
+                inserts[statement.split()[2]] += 1
+
+        with self.app.app_context():
+            engine = db.engine
+            event.listen(engine, "before_cursor_execute", record)
+            try:
+                seed_database(customers=12, mechanics=4, parts=5, tickets=90, seed=3, chunk_size=30)
+            finally:
+                event.remove(engine, "before_cursor_execute", record)
+            completed = db.session.scalar(
+                select(func.count(ServiceTicket.ticket_id)).where(ServiceTicket.date_completed.is_not(None))
+            )
+        self.assertTrue(0 < completed < 90)  # Both kinds of rows were generated
+        self.assertEqual(inserts["customers"], 1)
+        self.assertEqual(inserts["service_tickets"], 3)
+        self.assertEqual(inserts["labor_logs"], 3)
+        self.assertEqual(inserts["mechanic_association"], 3)
+
+    def test_invalid_seed_options(self):
+        response = self.client.post("/fakedata/seed-database", json={"tickets": -1})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Error", response.get_json())
+
+    def test_http_scale_is_capped(self):
+        """Test large datasets are refused by the endpoint, they are for the CLI"""
+        response = self.client.post("/fakedata/seed-database", json={"tickets": 5_000_000})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("tickets", response.get_json()["Error"])
+        with self.app.app_context():
+            self.assertEqual(db.session.scalar(select(func.count(ServiceTicket.ticket_id))), 0)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
@@ -0,0 +1,140 @@
+from app import create_app
+from app.blueprints.fakedata.seeder import seed_database
+from app.blueprints.service_tickets.schemas import compiled_service_tickets_schema
+from app.models import db
+from app.utils.fieldsets import request_fieldset
+from app.utils.util import encode_token
+from sqlalchemy import event
+import unittest
+
+
+class TestFieldsets(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed_database(customers=10, mechanics=6, parts=8, tickets=30, seed=5)
+        self.client = self.app.test_client()
+        self.mechanic_headers = {"Authorization": f"Bearer {encode_token(1, role='mechanic')}"}
+
+    def get(self, url, status=200, **kwargs):
+        """Helper method returning the response and the SQL statements it ran"""
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get(url, **kwargs)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        self.assertEqual(response.status_code, status, response.json)
+        return response, statements
+
+    def item_queries(self, statements):
+        """The statements loading the page's items, without db.paginate's COUNT"""
+        return [statement for statement in statements if "count(*)" not in statement]
+
+    def test_fields_load_only_selected_columns(self):
+        response, statements = self.get("/service-tickets/?fields=ticket_id,status")
+        self.assertEqual(set(response.json[0]), {"ticket_id", "status"})
+        selects = self.item_queries(statements)
+        self.assertEqual(len(selects), 1)  # No customer join, no mechanics / labor log queries
+        self.assertNotIn("description", selects[0])
+        self.assertNotIn("JOIN", selects[0])
+
+    def test_expand_only_loads_requested_relationship(self):
+        response, statements = self.get("/service-tickets/?expand=customer")
+        ticket = response.json[0]
+        self.assertIn("customer", ticket)
+        self.assertIn("description", ticket)
+        self.assertNotIn("mechanics", ticket)
+        self.assertNotIn("labor_logs", ticket)
+        selects = self.item_queries(statements)
+        self.assertEqual(len(selects), 1)
+        self.assertIn("JOIN customers", selects[0])
+
+    def test_dotted_fields(self):
+        response, _ = self.get("/service-tickets/?fields=ticket_id,customer.name,labor_logs.hours_worked")
+        ticket = response.json[0]
+        self.assertEqual(set(ticket), {"ticket_id", "customer", "labor_logs"})
+        self.assertEqual(set(ticket["customer"]), {"name"})
+        for log in ticket["labor_logs"]:
+            self.assertEqual(set(log), {"hours_worked"})
+
+    def test_full_response_without_args(self):
+        sparse, _ = self.get(
+            "/service-tickets/?page=1&per_page=50&fields=ticket_id&expand=customer,mechanics,labor_logs"
+        )
+        full, _ = self.get("/service-tickets/?page=1&per_page=50")
+        self.assertIn("description", full.json[0])
+        full_by_id = {ticket["ticket_id"]: ticket for ticket in full.json}
+        for ticket in sparse.json:
+            expected = full_by_id[ticket["ticket_id"]]
+            self.assertEqual(ticket, {name: expected[name] for name in ticket})
+
+    def test_unknown_names_rejected(self):
+        for url in (
+            "/service-tickets/?fields=ticket_id,secret",
+            "/service-tickets/?fields=customer.phone_number",
+            "/service-tickets/?expand=status",
+            "/inventory/?expand=customer",
+        ):
+            with self.subTest(url=url):
+                response, _ = self.get(url, status=400)
+                self.assertIn("Error", response.json)
+
+    def test_password_is_never_selectable(self):
+        for url in ("/service-tickets/?fields=customer.password", "/service-tickets/1?fields=customer.password"):
+            with self.subTest(url=url):
+                response, _ = self.get(url, status=400)
+                self.assertIn("Unknown field(s) in 'fields': customer.password", response.json["Error"])
+        expanded, _ = self.get("/service-tickets/?expand=customer")
+        self.assertNotIn("password", expanded.get_data(as_text=True))
+
+    def test_cache_key_per_fieldset(self):
+        narrow, _ = self.get("/inventory/?fields=name")
+        wide, _ = self.get("/inventory/?fields=name,price")
+        self.assertEqual(set(narrow.json[0]), {"name"})
+        self.assertEqual(set(wide.json[0]), {"name", "price"})
+        again, statements = self.get("/inventory/?fields=name,price")
+        self.assertEqual(again.json, wide.json)
+        self.assertEqual(statements, [])
+
+    def test_fieldset_built_once(self):
+        with self.app.test_request_context("/?fields=status,ticket_id"):
+            first = request_fieldset(compiled_service_tickets_schema)
+        with self.app.test_request_context("/?fields=ticket_id&fields=status,status"):
+            second = request_fieldset(compiled_service_tickets_schema)
+        self.assertIs(first, second)
+        with self.app.test_request_context("/"):
+            unchanged = request_fieldset(compiled_service_tickets_schema)
+        self.assertIs(unchanged.schema, compiled_service_tickets_schema)
+
+    def test_single_resources(self):
+        part, _ = self.get("/inventory/3?fields=name,price")
+        self.assertEqual(set(part.json), {"name", "price"})
+        mechanic, _ = self.get("/mechanics/2?fields=name", headers=self.mechanic_headers)
+        self.assertEqual(set(mechanic.json), {"name"})
+        ticket, _ = self.get("/service-tickets/4?fields=status&expand=mechanics")
+        self.assertEqual(set(ticket.json), {"status", "mechanics"})
+
+    def test_other_lists(self):
+        mechanics, _ = self.get("/mechanics/?fields=id,email&limit=3", headers=self.mechanic_headers)
+        self.assertEqual([set(item) for item in mechanics.json["items"]], [{"id", "email"}] * 3)
+        self.assertIsNotNone(mechanics.json["next_cursor"])
+        customer_headers = {"Authorization": f"Bearer {encode_token(1)}"}
+        customers, _ = self.get("/customers/?fields=name&page=1&per_page=2", headers=customer_headers)
+        self.assertEqual(customers.json, [{"name": customer["name"]} for customer in customers.json])
+        self.assertEqual(len(customers.json), 2)
+        # The list never dumps passwords, so they cannot be selected either
+        rejected, _ = self.get("/customers/?fields=name,password", status=400, headers=customer_headers)
+        self.assertIn("password", rejected.json["Error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
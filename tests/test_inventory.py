@@ -1,7 +1,11 @@
 from app import create_app
-from app.models import db, Part, ServiceTicket, Customer, Mechanic
+from app.models import db, Part, ServiceTicket, Customer, Mechanic, service_ticket_part_association
+from app.blueprints.inventory import stock
 from app.utils.util import encode_token
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select, update
+from unittest import mock
 import unittest
 
 
@@ -239,6 +243,242 @@ class TestInventory(unittest.TestCase):
         )
         self.assertEqual(response.status_code, 404)
 
+    def test_concurrent_decrements_never_oversell(self):
+        """Test many threads removing stock from one part sell exactly the stock"""
+
+        def remove_one(_):
+            with self.app.app_context():
+                result = stock.decrement_stock(self.part_id, 1)
+                db.session.commit()
+                return result is not None
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            successes = sum(executor.map(remove_one, range(40)))
+
+        self.assertEqual(successes, 25)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Part, self.part_id).quantity_in_stock, 0)
+
+    def test_remove_stock_without_returning(self):
+        """Test the read-back path used on databases without UPDATE ... RETURNING"""
+        with mock.patch.object(stock, "_returns_rows", return_value=False):
+            response = self.client.post(
+                f"/inventory/{self.part_id}/remove_stock",
+                json={"quantity": 5},
+                headers=self.auth_headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["new_quantity_in_stock"], 20)
+
+    def test_add_part_to_ticket_twice(self):
+        """Test adding the same part again does not take more stock"""
+        for _ in range(2):
+            response = self.client.post(
+                f"/inventory/{self.part_id}/add-to-ticket/{self.ticket_id}",
+                headers=self.auth_headers,
+            )
+            self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Part, self.part_id).quantity_in_stock, 24)
+
+    def test_add_part_to_ticket_race(self):
+        """Test a link added by a concurrent request after the check returns 200, not 500"""
+        decrement_stock = stock.decrement_stock
+
+        def concurrent_add(part_id, quantity):
+            # Another request links the part between the check and the insert
+            with self.app.app_context(), db.engine.begin() as connection:
+                connection.execute(
+                    service_ticket_part_association.insert().values(
+                        service_ticket_id=self.ticket_id, part_id=self.part_id
+                    )
+                )
+            return decrement_stock(part_id, quantity)
+
+        with mock.patch(
+            "app.blueprints.inventory.routes.decrement_stock", side_effect=concurrent_add
+        ):
+            response = self.client.post(
+                f"/inventory/{self.part_id}/add-to-ticket/{self.ticket_id}",
+                headers=self.auth_headers,
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["Message"], "Part already added to this ticket")
+        self.assertEqual(self.stock_of(self.part_id), 25)  # The rollback returned the unit
+
+    def add_oil_filter(self, quantity_in_stock=3):
+        """Helper method adding a second part, returns its id"""
+        with self.app.app_context():
+            part = Part(name="Oil Filter", price=9.99, quantity_in_stock=quantity_in_stock)
+            db.session.add(part)
+            db.session.commit()
+            return part.part_id
+
+    def stock_of(self, part_id):
+        with self.app.app_context():
+            return db.session.get(Part, part_id).quantity_in_stock
+
+    def reserve(self, parts, **options):
+        return self.client.post(
+            f"/inventory/reserve/{self.ticket_id}",
+            json={"parts": parts, **options},
+            headers=self.auth_headers,
+        )
+
+    def test_reserve_parts(self):
+        """Test reserving several parts with quantities in one request"""
+        filter_id = self.add_oil_filter()
+        response = self.reserve(
+            [{"part_id": self.part_id, "quantity": 4}, {"part_id": filter_id, "quantity": 2}]
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.json["hold_expires_at"])
+        self.assertEqual(self.stock_of(self.part_id), 21)
+        self.assertEqual(self.stock_of(filter_id), 1)
+        with self.app.app_context():
+            links = db.session.execute(
+                select(service_ticket_part_association.c.part_id, service_ticket_part_association.c.quantity)
+            ).all()
+        self.assertEqual(sorted(links), sorted([(self.part_id, 4), (filter_id, 2)]))
+
+        response = self.reserve([{"part_id": filter_id}])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json["part_ids"], [filter_id])
+
+    def test_reserve_is_all_or_nothing(self):
+        """Test one short part leaves every part's stock untouched"""
+        filter_id = self.add_oil_filter(quantity_in_stock=1)
+        response = self.reserve(
+            [{"part_id": self.part_id, "quantity": 4}, {"part_id": filter_id, "quantity": 2}]
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json["parts"], [{"part_id": filter_id, "requested": 2, "quantity_in_stock": 1}]
+        )
+        self.assertEqual(self.stock_of(self.part_id), 25)
+        self.assertEqual(self.stock_of(filter_id), 1)
+
+        response = self.reserve([{"part_id": self.part_id}, {"part_id": 99999}])
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json["part_ids"], [99999])
+        self.assertEqual(self.stock_of(self.part_id), 25)
+
+    def test_expired_hold_returns_stock(self):
+        """Test a held part is released once its hold expires, unless confirmed"""
+        filter_id = self.add_oil_filter()
+        response = self.reserve([{"part_id": self.part_id, "quantity": 5}], hold_seconds=600)
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.json["hold_expires_at"])
+        self.assertEqual(self.stock_of(self.part_id), 20)
+
+        with self.app.app_context():
+            db.session.execute(
+                update(service_ticket_part_association).values(hold_expires_at=datetime(2000, 1, 1))
+            )
+            db.session.commit()
+
+        # The next reservation releases the expired hold first
+        response = self.reserve([{"part_id": filter_id}], hold_seconds=600)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.stock_of(self.part_id), 25)
+
+        response = self.client.post(
+            f"/inventory/reserve/{self.ticket_id}/confirm", headers=self.auth_headers
+        )
+        self.assertEqual(response.json["confirmed"], 1)
+        with self.app.app_context():
+            self.assertEqual(stock.release_expired_holds(), 0)
+        self.assertEqual(self.stock_of(filter_id), 2)
+
+    def test_expired_hold_released_by_other_stock_routes(self):
+        """Test expired holds return their stock on the next inventory request, without a reservation"""
+        self.reserve([{"part_id": self.part_id, "quantity": 25}], hold_seconds=600)
+        self.assertEqual(self.client.get(f"/inventory/{self.part_id}").json["quantity_in_stock"], 0)
+        response = self.client.post(
+            f"/inventory/{self.part_id}/remove_stock", json={"quantity": 1}, headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+        later = stock._utcnow() + timedelta(seconds=601)
+        with mock.patch.object(stock, "_utcnow", return_value=later):
+            response = self.client.post(
+                f"/inventory/{self.part_id}/remove_stock", json={"quantity": 1}, headers=self.auth_headers
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json["new_quantity_in_stock"], 24)
+            self.assertEqual(self.client.get(f"/inventory/{self.part_id}").json["quantity_in_stock"], 24)
+        with self.app.app_context():
+            links = select(func.count()).select_from(service_ticket_part_association)
+            self.assertEqual(db.session.scalar(links), 0)
+
+    def test_part_etag(self):
+        """Test a matching If-None-Match gets 304 until the part changes"""
+        response = self.client.get(f"/inventory/{self.part_id}")
+        etag = response.headers["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+
+        response = self.client.get(f"/inventory/{self.part_id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertEqual(response.headers["X-DB-Query-Count"], "0")
+
+        self.client.put(
+            f"/inventory/{self.part_id}", json={"price": 50.0}, headers=self.auth_headers
+        )
+        response = self.client.get(f"/inventory/{self.part_id}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.get_json()["price"], 50.0)
+
+    def test_parts_list_etag(self):
+        """Test the list ETag changes when a part is added or its stock changes"""
+        etag = self.client.get("/inventory/").headers["ETag"]
+        self.assertEqual(
+            self.client.get("/inventory/", headers={"If-None-Match": etag}).status_code, 304
+        )
+
+        self.client.post(
+            f"/inventory/{self.part_id}/remove_stock", json={"quantity": 1}, headers=self.auth_headers
+        )
+        stock_etag = self.client.get("/inventory/").headers["ETag"]
+        self.assertNotEqual(stock_etag, etag)
+
+        self.client.post(
+            "/inventory/",
+            json={"name": "Oil Filter", "price": 15.99, "quantity_in_stock": 5},
+            headers=self.auth_headers,
+        )
+        response = self.client.get("/inventory/", headers={"If-None-Match": stock_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+
+    def test_etag_per_fieldset(self):
+        """Test ?fields= representations of one part do not share an ETag"""
+        full = self.client.get(f"/inventory/{self.part_id}")
+        sparse = self.client.get(f"/inventory/{self.part_id}?fields=name")
+        self.assertNotEqual(sparse.headers["ETag"], full.headers["ETag"])
+        response = self.client.get(
+            f"/inventory/{self.part_id}?fields=name", headers={"If-None-Match": full.headers["ETag"]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"name": "Brake Pad"})
+        response = self.client.get(
+            f"/inventory/{self.part_id}?fields=name", headers={"If-None-Match": sparse.headers["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_parts_list_etag_after_id_reuse(self):
+        """Test replacing the newest part changes the list ETag even when its id is reused"""
+        etag = self.client.get("/inventory/").headers["ETag"]
+        with self.app.app_context():
+            db.session.delete(db.session.get(Part, self.part_id))
+            db.session.commit()
+            db.session.add(Part(part_id=self.part_id, name="Rotor", price=80.0, quantity_in_stock=25))
+            db.session.commit()
+        response = self.client.get("/inventory/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()[0]["name"], "Rotor")
+
     def tearDown(self):
         """Clean up after tests"""
         with self.app.app_context():
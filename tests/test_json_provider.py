@@ -0,0 +1,108 @@
+from app import create_app
+from app.blueprints.fakedata.seeder import seed_database
+from app.models import db
+from app.utils import json_provider
+from app.utils.json_provider import OrjsonProvider, init_json_provider
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from markupsafe import Markup
+from unittest import mock
+import json
+import unittest
+import uuid
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class TestOrjsonProvider(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        self.orjson = OrjsonProvider(self.app)
+        self.stdlib = DefaultJSONProvider(self.app)
+
+    def assertSameOutput(self, obj):
+        for kwargs in ({}, {"indent": 2}, {"separators": (",", ":")}):
+            self.assertEqual(self.orjson.dumps(obj, **kwargs), self.stdlib.dumps(obj, **kwargs))
+
+    def test_installed_by_default(self):
+        self.assertIsInstance(self.app.json, OrjsonProvider)
+
+    def test_same_output_as_flask(self):
+        self.assertSameOutput(
+            {
+                "b": [1, 2.5, None, True, "text"],
+                "a": {"nested": {"z": 1, "y": []}},
+                "date": date(2024, 3, 1),
+                "datetime": datetime(2024, 3, 1, 12, 30),
+                "price": Decimal("45.99"),
+                "id": uuid.UUID(int=7),
+                "point": Point(1, 2),
+                "html": Markup("<b>x</b>"),
+                "escapes": 'quote " backslash \\ newline \n tab \t',
+            }
+        )
+        self.assertSameOutput({2: "integer", 1: "keys"})
+
+    def test_non_ascii_is_utf8(self):
+        data = {"name": "José Müller"}
+        self.assertEqual(json.loads(self.orjson.dumps(data)), data)
+        self.assertIn("José", self.orjson.dumps(data))
+        self.orjson.ensure_ascii = True
+        self.assertEqual(self.orjson.dumps(data), self.stdlib.dumps(data))
+
+    def test_falls_back_to_stdlib(self):
+        data = {"big": 2**70, "list": [1]}
+        self.assertEqual(self.orjson.dumps(data), self.stdlib.dumps(data))
+        self.assertEqual(self.orjson.dumps(data, indent=4), self.stdlib.dumps(data, indent=4))
+        with self.assertRaises(TypeError):
+            self.orjson.dumps({"value": object()})
+
+    def test_ticket_pages_match_default_provider(self):
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            seed_database(customers=10, mechanics=6, parts=8, tickets=30, seed=3)
+        default_app = create_app("TestingConfig")
+        init_json_provider_default(default_app)
+        for app in (self.app, default_app):
+            app.config["DEBUG"] = False  # Compact output
+        for url in ("/service-tickets/?page=1&per_page=20", "/service-tickets/?limit=5", "/inventory/"):
+            fast = self.app.test_client().get(url)
+            stdlib = default_app.test_client().get(url)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.mimetype, "application/json")
+            self.assertEqual(json.loads(fast.data), json.loads(stdlib.data))
+            if stdlib.data.isascii():
+                self.assertEqual(fast.data, stdlib.data)
+
+    def test_indented_in_debug(self):
+        with self.app.test_request_context():
+            response = self.app.json.response({"b": 1, "a": [1, 2]})
+        self.assertEqual(response.data, b'{\n  "a": [\n    1,\n    2\n  ],\n  "b": 1\n}\n')
+
+    def test_config_selects_provider(self):
+        init_json_provider_default(self.app)
+        self.assertIs(type(self.app.json), DefaultJSONProvider)
+        self.app.config["JSON_PROVIDER"] = "simplejson"
+        with self.assertRaises(ValueError):
+            init_json_provider(self.app)
+
+    def test_missing_orjson_uses_stdlib(self):
+        with mock.patch.object(json_provider, "orjson", None), self.assertLogs(json_provider.logger):
+            init_json_provider(self.app)
+        self.assertIs(type(self.app.json), DefaultJSONProvider)
+
+
+def init_json_provider_default(app):
+    app.config["JSON_PROVIDER"] = "default"
+    init_json_provider(app)
+
+
+if __name__ == "__main__":
+    unittest.main()
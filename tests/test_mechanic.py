@@ -1,6 +1,7 @@
 from app import create_app
-from app.models import db, Mechanic
+from app.models import db, Mechanic, Customer, ServiceTicket, LaborLog
 from app.utils.util import encode_token
+from datetime import date
 import unittest
 
 
@@ -143,3 +144,141 @@ class testMechanic(unittest.TestCase):
         # Try to delete a mechanic that doesn't exist
         response = self.client.delete("/mechanics/999", headers=headers)
         self.assertEqual(response.status_code, 404)
+
+    def add_report_data(self):
+        """Helper method creating two mechanics, two tickets and their labor logs"""
+        with self.app.app_context():
+            customer = Customer(
+                name="report_customer",
+                email="report@email.com",
+                phone="333-333-3333",
+                password="testpassword123",
+            )
+            second = Mechanic(
+                name="second_mechanic",
+                email="second@email.com",
+                phone="444-444-4444",
+                password="testpassword123",
+                salary=60000.0,
+            )
+            db.session.add_all([customer, second])
+            db.session.flush()
+            first = db.session.get(Mechanic, 1)
+            old_ticket = ServiceTicket(
+                customer_id=customer.id,
+                service_date=date(2024, 1, 10),
+                description="Old repair",
+                VIN="1HGBH41JXMN109111",
+            )
+            new_ticket = ServiceTicket(
+                customer_id=customer.id,
+                service_date=date(2025, 6, 1),
+                description="New repair",
+                VIN="1HGBH41JXMN109222",
+            )
+            old_ticket.mechanics.extend([first, second])
+            new_ticket.mechanics.append(first)
+            db.session.add_all([old_ticket, new_ticket])
+            db.session.flush()
+            db.session.add_all(
+                [
+                    LaborLog(ticket_id=old_ticket.ticket_id, mechanic_id=1, hours_worked=2),
+                    LaborLog(ticket_id=old_ticket.ticket_id, mechanic_id=1, hours_worked=1.5),
+                    LaborLog(
+                        ticket_id=old_ticket.ticket_id,
+                        mechanic_id=second.id,
+                        hours_worked=4,
+                    ),
+                    LaborLog(ticket_id=new_ticket.ticket_id, mechanic_id=1, hours_worked=1),
+                ]
+            )
+            db.session.commit()
+            return old_ticket.ticket_id, new_ticket.ticket_id
+
+    def test_top_labor_report(self):
+        old_ticket_id, new_ticket_id = self.add_report_data()
+
+        response = self.client.get("/mechanics/reports/top_labor_by_ticket")
+        self.assertEqual(response.status_code, 200)
+        report = response.get_json()
+        self.assertEqual(
+            report,
+            [
+                {
+                    "ticket_id": old_ticket_id,
+                    "ticket_description": "Old repair",
+                    "top_mechanic": "second_mechanic",
+                    "total_hours_logged": 4.0,
+                },
+                {
+                    "ticket_id": new_ticket_id,
+                    "ticket_description": "New repair",
+                    "top_mechanic": "test_user",
+                    "total_hours_logged": 1.0,
+                },
+            ],
+        )
+
+    def test_top_labor_report_filters(self):
+        old_ticket_id, new_ticket_id = self.add_report_data()
+
+        response = self.client.get(
+            "/mechanics/reports/top_labor_by_ticket?start_date=2025-01-01"
+        )
+        self.assertEqual([r["ticket_id"] for r in response.get_json()], [new_ticket_id])
+
+        response = self.client.get("/mechanics/reports/top_labor_by_ticket?min_hours=2")
+        self.assertEqual([r["ticket_id"] for r in response.get_json()], [old_ticket_id])
+
+        response = self.client.get("/mechanics/reports/top_labor_by_ticket?limit=1")
+        self.assertEqual(len(response.get_json()), 1)
+
+        response = self.client.get("/mechanics/reports/top_labor_by_ticket?limit=zero")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Error", response.get_json())
+
+    def test_most_tickets_worked_report(self):
+        self.add_report_data()
+
+        response = self.client.get("/mechanics/reports/most_tickets_worked")
+        self.assertEqual(response.status_code, 200)
+        report = response.get_json()
+        self.assertEqual(
+            [(r["name"], r["tickets_worked_on"]) for r in report],
+            [("test_user", 2), ("second_mechanic", 1)],
+        )
+
+    def test_most_tickets_worked_report_filters(self):
+        self.add_report_data()
+
+        response = self.client.get(
+            "/mechanics/reports/most_tickets_worked?end_date=2024-12-31"
+        )
+        self.assertEqual(
+            [r["tickets_worked_on"] for r in response.get_json()], [1, 1]
+        )
+
+        response = self.client.get(
+            "/mechanics/reports/most_tickets_worked?status=Completed"
+        )
+        self.assertEqual(
+            [r["tickets_worked_on"] for r in response.get_json()], [0, 0]
+        )
+
+        response = self.client.get("/mechanics/reports/most_tickets_worked?limit=1")
+        self.assertEqual([r["name"] for r in response.get_json()], ["test_user"])
+
+        response = self.client.get(
+            "/mechanics/reports/most_tickets_worked?page=2&per_page=1"
+        )
+        self.assertEqual([r["name"] for r in response.get_json()], ["second_mechanic"])
+
+        response = self.client.get(
+            "/mechanics/reports/most_tickets_worked?limit=1&page=2&per_page=1"
+        )
+        self.assertEqual(response.get_json(), [])
+
+        response = self.client.get(
+            "/mechanics/reports/most_tickets_worked?start_date=tomorrow"
+        )
+        self.assertEqual(response.status_code, 400)
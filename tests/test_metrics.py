@@ -0,0 +1,113 @@
+from app import create_app
+from app.models import db, Part
+from app.utils.metrics import TimedQueuePool
+from config import pool_options
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, exc, text
+from unittest import mock
+import os
+import tempfile
+import unittest
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(
+                Part(name="Oil Filter", description="Filter", price=9.99, quantity_in_stock=5)
+            )
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def get_metrics(self):
+        """Helper method returning the /metrics exposition text"""
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain"))
+        return response.get_data(as_text=True)
+
+    def test_request_metrics(self):
+        self.client.get("/inventory/1")
+        self.client.get("/inventory/99999")
+        text = self.get_metrics()
+        self.assertIn(
+            'http_requests_total{blueprint="inventory",endpoint="inventory.get_part",'
+            'method="GET",status="200"}',
+            text,
+        )
+        self.assertIn('status="404"', text)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{blueprint="inventory",'
+            'endpoint="inventory.get_part",le="0.005",method="GET"}',
+            text,
+        )
+
+    def test_cache_and_pool_metrics(self):
+        self.client.get("/inventory/")
+        self.client.get("/inventory/")  # served from the response cache
+        text = self.get_metrics()
+        self.assertIn('cache_lookups_total{result="hit"}', text)
+        self.assertIn('cache_lookups_total{result="miss"}', text)
+        self.assertIn('db_pool_checkouts_total{bind="default"}', text)
+        self.assertIn('db_pool_checked_out{bind="default"}', text)
+        self.assertIn('db_pool_overflow{bind="default"}', text)
+        self.assertIn('db_pool_checkout_wait_seconds_count{bind="default"}', text)
+
+    def test_rate_limit_rejections(self):
+        credentials = {"email": "nobody@email.com", "password": "wrongpassword"}
+        for _ in range(6):  # login is limited to 5 per minute
+            response = self.client.post("/customers/login", json=credentials)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(
+            'rate_limit_rejections_total{blueprint="customers",endpoint="customers.login"}',
+            self.get_metrics(),
+        )
+
+    def test_tier_limit_rejections(self):
+        # Rejected by the limiter's own before_request hook, ahead of the view
+        self.app.config["RATELIMIT_TIERS"] = {"anonymous": "3/hour"}
+        labels = {"blueprint": "inventory", "endpoint": "inventory.get_part"}
+        before = REGISTRY.get_sample_value("rate_limit_rejections_total", labels) or 0
+        statuses = [self.client.get("/inventory/1").status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(REGISTRY.get_sample_value("rate_limit_rejections_total", labels), before + 1)
+        self.assertIsNotNone(
+            REGISTRY.get_sample_value(
+                "http_requests_total", {**labels, "method": "GET", "status": "429"}
+            )
+        )
+
+    def test_pool_checkout_timeout(self):
+        path = os.path.join(tempfile.mkdtemp(), "pool.db")
+        engine = create_engine(
+            f"sqlite:///{path}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2
+        )
+        engine.pool.bind = "timeout_test"
+        labels = {"bind": "timeout_test"}
+        with engine.connect() as held:
+            held.execute(text("SELECT 1"))
+            with self.assertRaises(exc.TimeoutError):
+                engine.connect()
+        self.assertEqual(REGISTRY.get_sample_value("db_pool_timeouts_total", labels), 1)
+        self.assertEqual(REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count", labels), 2)
+        self.assertGreaterEqual(REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_sum", labels), 0.2)
+        engine.dispose()
+        self.assertEqual(engine.pool.bind, "timeout_test")  # Kept when the pool is recreated
+
+    def test_pool_options_from_thread_count(self):
+        with mock.patch.dict(os.environ, {"DB_POOL_TIMEOUT": "3"}):
+            options = pool_options(threads=8)
+        self.assertEqual(options["pool_size"], 8)
+        self.assertEqual(options["max_overflow"], 4)
+        self.assertEqual(options["pool_timeout"], 3)
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertLess(options["pool_recycle"], 300)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
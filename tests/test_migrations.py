@@ -0,0 +1,117 @@
+from app import create_app
+from app.models import db
+from app.migrations import upgrade, upgrade_lock, MIGRATIONS
+from sqlalchemy import inspect, text
+from unittest import mock
+import unittest
+
+# Tables as created by db.create_all() before the index / key migration
+LEGACY_SCHEMA = [
+    "CREATE TABLE customers (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+    "email VARCHAR(360) NOT NULL UNIQUE, phone VARCHAR(100) NOT NULL, password VARCHAR(255) NOT NULL)",
+    "CREATE TABLE mechanics (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+    "email VARCHAR(360) NOT NULL UNIQUE, phone VARCHAR(100) NOT NULL, password VARCHAR(255) NOT NULL, "
+    "salary FLOAT NOT NULL)",
+    "CREATE TABLE parts (part_id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, description VARCHAR(500), "
+    "price FLOAT NOT NULL, quantity_in_stock INTEGER NOT NULL)",
+    "CREATE TABLE service_tickets (ticket_id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL "
+    "REFERENCES customers(id), service_date DATE NOT NULL, description VARCHAR(500) NOT NULL, "
+    "VIN VARCHAR(100) NOT NULL UNIQUE, status VARCHAR(50), date_created DATE, date_completed DATE)",
+    "CREATE TABLE labor_logs (id INTEGER PRIMARY KEY, hours_worked FLOAT NOT NULL, date_logged DATE, "
+    "ticket_id INTEGER NOT NULL REFERENCES service_tickets(ticket_id), "
+    "mechanic_id INTEGER NOT NULL REFERENCES mechanics(id))",
+    "CREATE TABLE mechanic_association (service_ticket_id INTEGER REFERENCES service_tickets(ticket_id), "
+    "mechanic_id INTEGER REFERENCES mechanics(id))",
+    "CREATE TABLE service_ticket_part_association (service_ticket_id INTEGER "
+    "REFERENCES service_tickets(ticket_id), part_id INTEGER REFERENCES parts(part_id))",
+]
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            with db.engine.begin() as connection:
+                connection.execute(text("DROP TABLE IF EXISTS schema_version"))
+
+    def test_upgrade_legacy_database(self):
+        """Test indexes and association keys are added to an existing database"""
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                for statement in LEGACY_SCHEMA:
+                    connection.execute(text(statement))
+                connection.execute(
+                    text("INSERT INTO mechanic_association VALUES (1, 1), (1, 1), (1, 2)")
+                )
+
+            applied = upgrade()
+            self.assertEqual([version for version, _ in applied], [m[0] for m in MIGRATIONS])
+
+            inspector = inspect(db.engine)
+            ticket_indexes = {index["name"] for index in inspector.get_indexes("service_tickets")}
+            self.assertIn("ix_service_tickets_customer_id", ticket_indexes)
+            self.assertIn("ix_service_tickets_status_service_date", ticket_indexes)
+            log_indexes = {index["name"] for index in inspector.get_indexes("labor_logs")}
+            self.assertIn("ix_labor_logs_ticket_id_mechanic_id", log_indexes)
+
+            with db.engine.connect() as connection:
+                rows = connection.execute(
+                    text("SELECT service_ticket_id, mechanic_id FROM mechanic_association")
+                ).all()
+            self.assertEqual(sorted(rows), [(1, 1), (1, 2)])
+
+            part_columns = {column["name"] for column in inspector.get_columns("parts")}
+            self.assertIn("version", part_columns)
+            link_columns = {
+                column["name"] for column in inspector.get_columns("service_ticket_part_association")
+            }
+            self.assertTrue({"quantity", "hold_expires_at"} <= link_columns)
+
+            # Running it again is a no-op
+            self.assertEqual(upgrade(), [])
+
+    def test_upgrade_fresh_database(self):
+        """Test a database created from the current models is only stamped"""
+        with self.app.app_context():
+            db.create_all()
+            applied = upgrade()
+            self.assertEqual(len(applied), len(MIGRATIONS))
+            with db.engine.connect() as connection:
+                version = connection.execute(text("SELECT version FROM schema_version")).scalar()
+            self.assertEqual(version, MIGRATIONS[-1][0])
+
+    def lock_statements(self, dialect, acquired=1):
+        """Helper method returning the SQL upgrade_lock() runs on a database of the given dialect"""
+        connection = mock.MagicMock()
+        connection.dialect.name = dialect
+        connection.execute.return_value.scalar.return_value = acquired
+        engine = mock.MagicMock()
+        engine.connect.return_value.__enter__.return_value = connection
+        statements = lambda: [str(call.args[0]) for call in connection.execute.call_args_list]
+        with mock.patch.object(type(db), "engine", new_callable=mock.PropertyMock, return_value=engine):
+            with upgrade_lock():
+                held = statements()
+        return held, statements()[len(held):]
+
+    def test_upgrade_lock(self):
+        """Test MySQL and Postgres migrations run under an advisory lock"""
+        with self.app.app_context():
+            held, released = self.lock_statements("mysql")
+            self.assertEqual(held, ["SELECT GET_LOCK(:name, :timeout)"])
+            self.assertEqual(released, ["SELECT RELEASE_LOCK(:name)"])
+
+            held, released = self.lock_statements("postgresql")
+            self.assertEqual(held, ["SELECT pg_advisory_lock(:key)"])
+            self.assertEqual(released, ["SELECT pg_advisory_unlock(:key)"])
+
+            with self.assertRaises(RuntimeError):
+                self.lock_statements("mysql", acquired=0)  # GET_LOCK timed out
+
+    def tearDown(self):
+        """Clean up after tests"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            with db.engine.begin() as connection:
+                connection.execute(text("DROP TABLE IF EXISTS schema_version"))
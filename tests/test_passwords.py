@@ -0,0 +1,105 @@
+from app import create_app
+from app.models import db, Customer, Mechanic
+from app.utils.passwords import PasswordHasher, PasswordHasherBusy, UNUSABLE_PASSWORD
+from app.utils.util import encode_token
+import threading
+import unittest
+
+FAST = "pbkdf2:sha256:1000"
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(method=FAST, workers=2, max_pending=0)
+
+    def test_hash_and_verify(self):
+        stored = self.hasher.hash("secret password")
+        self.assertTrue(stored.startswith(FAST + "$"))
+        self.assertEqual(self.hasher.verify(stored, "secret password"), (True, False))
+        self.assertEqual(self.hasher.verify(stored, "wrong password"), (False, False))
+
+    def test_cost_change_needs_rehash(self):
+        stored = PasswordHasher(method="pbkdf2:sha256:2000").hash("secret password")
+        self.assertEqual(self.hasher.verify(stored, "secret password"), (True, True))
+        self.assertEqual(self.hasher.verify(stored, "wrong password"), (False, False))
+
+    def test_legacy_plaintext(self):
+        self.assertEqual(self.hasher.verify("secret password", "secret password"), (True, True))
+        self.assertEqual(self.hasher.verify("secret password", "wrong password")[0], False)
+
+    def test_unusable_and_unknown(self):
+        self.assertEqual(self.hasher.verify(UNUSABLE_PASSWORD, UNUSABLE_PASSWORD), (False, False))
+        self.assertEqual(self.hasher.verify(None, "secret password"), (False, False))
+
+    def test_busy_when_pool_is_full(self):
+        release = threading.Event()
+        blocked = [
+            threading.Thread(target=self.hasher._run, args=(release.wait,)) for _ in range(2)
+        ]
+        for thread in blocked:
+            thread.start()
+        try:
+            while self.hasher._slots._value:  # Wait until both threads hold a slot
+                pass
+            with self.assertRaises(PasswordHasherBusy):
+                self.hasher.hash("secret password")
+        finally:
+            release.set()
+            for thread in blocked:
+                thread.join()
+        self.assertTrue(self.hasher.hash("secret password").startswith(FAST))
+
+
+class TestStoredPasswords(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            # Rows stored before passwords were hashed
+            db.session.add(
+                Customer(name="legacy", email="legacy@email.com", phone="111-111-1111", password="legacypassword")
+            )
+            db.session.add(
+                Mechanic(
+                    name="legacy", email="legacy@email.com", phone="111-111-1111", password="legacypassword", salary=1
+                )
+            )
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def stored_password(self, model, email):
+        with self.app.app_context():
+            return db.session.execute(db.select(model.password).where(model.email == email)).scalar()
+
+    def test_created_customer_is_hashed(self):
+        payload = {"name": "New", "email": "new@email.com", "phone": "540-540-9999", "password": "newpassword"}
+        self.assertEqual(self.client.post("/customers/", json=payload).status_code, 201)
+        self.assertTrue(self.stored_password(Customer, "new@email.com").startswith(FAST + "$"))
+        credentials = {"email": "new@email.com", "password": "newpassword"}
+        self.assertEqual(self.client.post("/customers/login", json=credentials).status_code, 200)
+
+    def test_legacy_rows_rehashed_on_login(self):
+        credentials = {"email": "legacy@email.com", "password": "legacypassword"}
+        for model, url in ((Customer, "/customers/login"), (Mechanic, "/mechanics/login")):
+            self.assertEqual(self.client.post(url, json=credentials).status_code, 200)
+            self.assertTrue(self.stored_password(model, "legacy@email.com").startswith(FAST + "$"))
+            # Still logs in against the new hash, and a wrong password is still rejected
+            self.assertEqual(self.client.post(url, json=credentials).status_code, 200)
+            wrong = dict(credentials, password="wrongpassword")
+            self.assertEqual(self.client.post(url, json=wrong).status_code, 401)
+
+    def test_updated_password_is_hashed(self):
+        headers = {"Authorization": f"Bearer {encode_token(1)}"}
+        response = self.client.put("/customers/1", json={"password": "changedpassword"}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.stored_password(Customer, "legacy@email.com").startswith(FAST + "$"))
+
+    def test_busy_hasher_returns_503(self):
+        hasher = self.app.extensions["password_hasher"]
+        hasher._slots = threading.BoundedSemaphore(1)
+        hasher._slots.acquire()  # Every slot taken
+        payload = {"name": "New", "email": "new@email.com", "phone": "540-540-9999", "password": "newpassword"}
+        response = self.client.post("/customers/", json=payload)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
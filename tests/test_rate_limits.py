@@ -0,0 +1,136 @@
+from app import create_app
+from app.extensions import limiter
+from app.models import db, Mechanic, Part
+from app.utils.ratelimit_storage import SQLiteStorage
+from app.utils.util import encode_token
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from multiprocessing import get_context
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+def hit_many(uri, times):
+    """Runs in a separate process, like a gunicorn worker"""
+    storage = storage_from_string(uri)
+    for _ in range(times):
+        storage.incr("LIMITER/login", 60)
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.uri = "sqlite:///" + os.path.join(self.directory, "ratelimit.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_registered_scheme(self):
+        self.assertIsInstance(storage_from_string(self.uri), SQLiteStorage)
+
+    def test_counts_within_window(self):
+        storage = SQLiteStorage(self.uri)
+        self.assertEqual(storage.incr("key", 60), 1)
+        self.assertEqual(storage.incr("key", 60, amount=3), 4)
+        self.assertEqual(storage.get("key"), 4)
+        self.assertGreater(storage.get_expiry("key"), time.time() + 55)
+        storage.clear("key")
+        self.assertEqual(storage.get("key"), 0)
+
+    def test_new_window_after_expiry(self):
+        storage = SQLiteStorage(self.uri)
+        storage.incr("key", 1, amount=5)
+        time.sleep(1.1)
+        self.assertEqual(storage.get("key"), 0)
+        self.assertEqual(storage.incr("key", 1), 1)
+
+    def test_limit_shared_between_workers(self):
+        limit = parse("5/minute")
+        workers = [FixedWindowRateLimiter(SQLiteStorage(self.uri)) for _ in range(2)]
+        allowed = [workers[i % 2].hit(limit, "login", "127.0.0.1") for i in range(8)]
+        self.assertEqual(allowed, [True] * 5 + [False] * 3)
+
+    def test_counts_across_processes(self):
+        context = get_context("fork")
+        processes = [context.Process(target=hit_many, args=(self.uri, 50)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(SQLiteStorage(self.uri).get("LIMITER/login"), 200)
+
+
+class TestRateLimitTiers(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app("TestingConfig")
+        self.app.config["RATELIMIT_TIERS"] = {
+            "anonymous": "6/hour",
+            "customer": "8/hour",
+            "mechanic": "20/hour",
+        }
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            db.session.add(Part(name="Oil Filter", price=9.99, quantity_in_stock=5))
+            db.session.add(
+                Mechanic(name="mechanic", email="m@email.com", phone="1", password="pw", salary=1)
+            )
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def statuses(self, url, times, headers=None):
+        return [self.client.get(url, headers=headers).status_code for _ in range(times)]
+
+    def bearer(self, user_id, role):
+        return {"Authorization": f"Bearer {encode_token(user_id, role)}"}
+
+    def test_anonymous_tier_keyed_by_ip(self):
+        self.assertEqual(self.statuses("/inventory/1", 7), [200] * 6 + [429])
+
+    def test_token_gets_own_budget_and_role_tier(self):
+        self.statuses("/inventory/1", 6)  # spends the shared IP budget
+        first = self.bearer(1, "customer")
+        self.assertEqual(self.statuses("/inventory/1", 9, first), [200] * 8 + [429])
+        # Another user behind the same IP is unaffected
+        self.assertEqual(self.statuses("/inventory/1", 2, self.bearer(2, "customer")), [200, 200])
+        self.assertEqual(self.statuses("/inventory/1", 10, self.bearer(1, "mechanic")), [200] * 10)
+
+    def test_invalid_token_counts_against_ip(self):
+        headers = {"Authorization": "Bearer not-a-token"}
+        self.assertEqual(self.statuses("/inventory/1", 4, headers), [200] * 4)
+        self.assertEqual(self.statuses("/inventory/1", 3), [200, 200, 429])
+
+    def test_route_cost(self):
+        # The un-paginated parts list costs 3 of the 6 anonymous hits
+        self.assertEqual(self.statuses("/inventory/", 3), [200, 200, 429])
+
+    def test_unpaginated_lists_cost_more(self):
+        headers = self.bearer(1, "mechanic")
+        # The whole mechanics table costs 3 of the mechanic's 20 hits
+        self.assertEqual(self.statuses("/mechanics/", 7, headers), [200] * 6 + [429])
+        with self.app.app_context():
+            limiter.reset()
+        # A page or a cursor page costs 1
+        self.assertEqual(self.statuses("/mechanics/?page=1&per_page=5", 10, headers), [200] * 10)
+        self.assertEqual(self.statuses("/mechanics/?limit=5", 10, headers), [200] * 10)
+
+    def test_ticket_list_cost_depends_on_pagination(self):
+        # Default and integer pages cost 1 of the 6 anonymous hits
+        self.assertEqual(self.statuses("/service-tickets/", 3), [200] * 3)
+        self.assertEqual(self.statuses("/service-tickets/?page=2&per_page=5", 3), [404] * 3)
+        with self.app.app_context():
+            limiter.reset()
+        # A non-integer page returns every ticket and costs 5
+        self.assertEqual(self.statuses("/service-tickets/?page=all", 2), [200, 429])
+
+    def test_export_spends_tier_limits(self):
+        headers = self.bearer(1, "mechanic")
+        # Each export costs 10 of the mechanic's 20 hits
+        self.assertEqual(self.statuses("/service-tickets/export", 3, headers), [200, 200, 429])
+        # The budget is shared by every route
+        self.assertEqual(self.statuses("/inventory/1", 1, headers), [429])
+        self.assertEqual(self.statuses("/inventory/1", 1), [200])
@@ -0,0 +1,153 @@
+from app import create_app
+from app.models import db, Customer, Mechanic, Part, ServiceTicket
+from app.utils.replicas import STICKY_COOKIE
+from app.utils.util import encode_token
+from datetime import date
+from sqlalchemy import select, update
+from unittest import mock
+import config
+import os
+import tempfile
+import unittest
+
+
+def replica_app(**settings):
+    """An app on a primary SQLite file with a second SQLite file as its replica."""
+    directory = tempfile.mkdtemp()
+
+    class ReplicaConfig(config.TestingConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(directory, "primary.db")
+        SQLALCHEMY_BINDS = {"replica": "sqlite:///" + os.path.join(directory, "replica.db")}
+        DATABASE_REPLICAS = ("replica",)
+        RATELIMIT_ENABLED = False
+
+    for name, value in settings.items():
+        setattr(ReplicaConfig, name, value)
+    with mock.patch.object(config, "ReplicaConfig", ReplicaConfig, create=True):
+        return create_app("ReplicaConfig")
+
+
+class TestReadReplicas(unittest.TestCase):
+    def setUp(self, **settings):
+        self.app = replica_app(**settings)
+        # The same rows in both databases, named after the database they are read from
+        with self.app.app_context():
+            for name, engine in (("primary", db.engines[None]), ("replica", db.engines["replica"])):
+                db.metadata.create_all(engine)
+                with engine.begin() as connection:
+                    connection.execute(
+                        Part.__table__.insert(),
+                        {"part_id": 1, "name": f"{name} part", "price": 10.0, "quantity_in_stock": 5},
+                    )
+                    connection.execute(
+                        Mechanic.__table__.insert(),
+                        {"id": 1, "name": f"{name} mechanic", "email": "m@example.com",
+                         "phone": "540-540-9999", "salary": 50000, "password": "!"},
+                    )
+                    connection.execute(
+                        Customer.__table__.insert(),
+                        {"id": 1, "name": "Customer", "email": "c@example.com",
+                         "phone": "540-540-9999", "password": "!"},
+                    )
+                    connection.execute(
+                        ServiceTicket.__table__.insert(),
+                        {"ticket_id": 1, "customer_id": 1, "service_date": date.today(),
+                         "description": "Brakes", "VIN": "1HGBH41JXMN109186", "status": "Open"},
+                    )
+                    connection.execute(
+                        db.metadata.tables["mechanic_association"].insert(),
+                        {"service_ticket_id": 1, "mechanic_id": 1},
+                    )
+        self.client = self.app.test_client()
+        self.auth_headers = {"Authorization": f"Bearer {encode_token(1, 'mechanic')}"}
+
+    def update_part(self):
+        return self.client.put(
+            "/inventory/1",
+            json={"name": "primary part", "price": 12.0, "quantity_in_stock": 5},
+            headers=self.auth_headers,
+        )
+
+    def test_get_reads_from_replica(self):
+        response = self.client.get("/inventory/1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["name"], "replica part")
+
+    def test_write_goes_to_primary_and_sticks(self):
+        response = self.update_part()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(STICKY_COOKIE, response.headers["Set-Cookie"])
+        with self.app.app_context():
+            engine = db.engines["replica"]
+            with engine.connect() as connection:
+                price = connection.scalar(select(Part.price).where(Part.part_id == 1))
+            self.assertEqual(price, 10.0)  # The replica was not written to
+
+        # The test client sends the cookie back, so the client reads its write
+        self.assertEqual(self.client.get("/inventory/1").json["price"], 12.0)
+
+        # That primary read was cached, so other clients get it despite the lagging replica
+        self.client.delete_cookie(STICKY_COOKIE)
+        self.assertEqual(self.client.get("/inventory/1").json["price"], 12.0)
+
+    def test_reports_read_from_replica_inside_sticky_window(self):
+        self.update_part()
+        self.assertEqual(self.client.get("/inventory/1").json["name"], "primary part")
+        response = self.client.get("/mechanics/reports/most_tickets_worked")
+        self.assertEqual(response.json[0]["name"], "replica mechanic")
+
+    def test_expired_or_invalid_cookie_reads_from_replica(self):
+        for value in ("1", "not-a-time"):
+            self.client.set_cookie(STICKY_COOKIE, value)
+            self.assertEqual(self.client.get("/inventory/1").json["name"], "replica part")
+
+    def test_reads_after_write_in_request_use_primary(self):
+        with self.app.test_request_context("/inventory/1"):
+            self.app.preprocess_request()
+            name = select(Part.name).where(Part.part_id == 1)
+            self.assertEqual(db.session.scalar(name), "replica part")
+            db.session.execute(update(Part).where(Part.part_id == 1).values(price=11.0))
+            self.assertEqual(db.session.scalar(name), "primary part")
+            db.session.rollback()
+            self.assertEqual(db.session.scalar(name), "primary part")
+            db.session.remove()
+
+    def test_no_replica_outside_requests(self):
+        with self.app.app_context():
+            self.assertEqual(db.session.scalar(select(Part.name)), "primary part")
+
+    def test_recent_replica_reads_are_not_cached(self):
+        self.client.get("/inventory/1")
+        with self.app.app_context(), db.engines["replica"].begin() as connection:
+            connection.execute(update(Part).where(Part.part_id == 1).values(price=20.0))
+        # The tag version is newer than DATABASE_REPLICA_LAG, so the response was not cached
+        self.assertEqual(self.client.get("/inventory/1").json["price"], 20.0)
+
+
+class TestReadReplicasSettings(TestReadReplicas):
+    def setUp(self):
+        super().setUp(DATABASE_REPLICA_STICKY=False, DATABASE_REPLICA_LAG=0)
+
+    def test_write_goes_to_primary_and_sticks(self):
+        response = self.update_part()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Set-Cookie", response.headers)
+        self.assertEqual(self.client.get("/inventory/1").json["price"], 10.0)
+
+    def test_reports_read_from_replica_inside_sticky_window(self):
+        pass
+
+    def test_recent_replica_reads_are_not_cached(self):
+        self.client.get("/inventory/1")
+        with self.app.app_context(), db.engines["replica"].begin() as connection:
+            connection.execute(update(Part).where(Part.part_id == 1).values(price=20.0))
+        # Without a lag allowance replica reads are cached like primary reads
+        self.assertEqual(self.client.get("/inventory/1").json["price"], 10.0)
+
+    def test_unknown_replica_bind(self):
+        with self.assertRaises(RuntimeError):
+            replica_app(DATABASE_REPLICAS=("replica", "missing"))
+
+
+if __name__ == "__main__":
+    unittest.main()
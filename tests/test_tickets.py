@@ -1,7 +1,15 @@
 from app import create_app
-from app.models import db, ServiceTicket, Customer, Mechanic
+from app.models import db, ServiceTicket, Customer, Mechanic, LaborLog
 from app.utils.util import encode_token
+from app.extensions import cache
+from app.utils.instrumentation import LazyLoadError, guarded_dump, statement_shape
+from app.blueprints.service_tickets.schemas import service_ticket_schema
+from sqlalchemy import select
 from datetime import date
+from sqlalchemy import event
+import csv
+import io
+import json
 import unittest
 
 
@@ -191,11 +199,186 @@ class TestServiceTicket(unittest.TestCase):
         response = self.client.delete(f"/service-tickets/{self.ticket_id}")
         self.assertEqual(response.status_code, 200)  # Should succeed without auth
 
+    def test_get_tickets_with_cursor(self):
+        """Test cursor mode walks every ticket once in primary key order"""
+        with self.app.app_context():
+            for i in range(4):
+                db.session.add(
+                    ServiceTicket(
+                        customer_id=self.customer_id,
+                        service_date=date.today(),
+                        description=f"Cursor ticket {i}",
+                        VIN=f"1HGBH41JXMN3000{i:02d}",
+                    )
+                )
+            db.session.commit()
+
+        response = self.client.get("/service-tickets/?limit=3")
+        self.assertEqual(response.status_code, 200)
+        first_page = response.get_json()
+        self.assertEqual(len(first_page["items"]), 3)
+        self.assertIsNotNone(first_page["next_cursor"])
+
+        response = self.client.get(
+            f"/service-tickets/?limit=3&after={first_page['next_cursor']}"
+        )
+        second_page = response.get_json()
+        self.assertEqual(len(second_page["items"]), 2)
+        self.assertIsNone(second_page["next_cursor"])
+
+        ticket_ids = [t["ticket_id"] for t in first_page["items"] + second_page["items"]]
+        self.assertEqual(ticket_ids, sorted(ticket_ids))
+        self.assertEqual(len(set(ticket_ids)), 5)
+
+    def test_export_tickets_ndjson(self):
+        """Test the export streams one JSON document per ticket"""
+        response = self.client.get("/service-tickets/export")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["ticket_id"], self.ticket_id)
+        self.assertEqual(rows[0]["service_date"], date.today().isoformat())
+        self.assertEqual(rows[0]["VIN"], "1HGBH41JXMN109186")
+
+    def test_export_tickets_csv_with_filters(self):
+        """Test the CSV export and its status / date filters"""
+        response = self.client.get("/service-tickets/export?format=csv&status=Open")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/csv")
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(rows[0][0], "ticket_id")
+        self.assertEqual(rows[1][0], str(self.ticket_id))
+
+        response = self.client.get("/service-tickets/export?format=csv&status=Completed")
+        rows = list(csv.reader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), 1)  # header only
+
+        response = self.client.get("/service-tickets/export?start_date=2999-01-01")
+        self.assertEqual(response.get_data(as_text=True), "")
+
+        response = self.client.get("/service-tickets/export?format=xml")
+        self.assertEqual(response.status_code, 400)
+
+    def test_sql_instrumentation_headers(self):
+        """Test debug responses report their query count and duplicates"""
+        with self.app.app_context():
+            cache.clear()
+        response = self.client.get(f"/service-tickets/{self.ticket_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response.headers["X-DB-Query-Count"]), 0)
+        self.assertEqual(response.headers["X-DB-Duplicate-Queries"], "0")
+        self.assertIn("X-DB-Time-Ms", response.headers)
+
+        stats = self.app.extensions["sql_stats"].snapshot()
+        self.assertEqual(stats["service_tickets.find_service_ticket"]["requests"], 1)
+
+    def test_strict_mode_rejects_lazy_loads_in_serialization(self):
+        """Test dumping a ticket loaded without its loading plan raises in strict mode"""
+        with self.app.test_request_context(f"/service-tickets/{self.ticket_id}"):
+            self.app.preprocess_request()
+            ticket = db.session.execute(select(ServiceTicket)).scalars().first()
+            with self.assertRaises(LazyLoadError):
+                guarded_dump(service_ticket_schema, ticket)
+
+    def test_statement_shape(self):
+        self.assertEqual(
+            statement_shape("SELECT *  FROM t WHERE id = 5 AND name = 'x' AND k IN (?, ?, ?)"),
+            "SELECT * FROM t WHERE id = ? AND name = ? AND k IN (?)",
+        )
+
     def test_invalid_ticket_access(self):
         """Test accessing non-existent tickets returns 404"""
         response = self.client.get("/service-tickets/99999")
         self.assertEqual(response.status_code, 404)
 
+    def count_queries(self, url, **kwargs):
+        """Helper method returning (response, number of SQL statements issued)"""
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with self.app.app_context():
+            cache.clear()  # make sure the route hits the database
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get(url, **kwargs)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return response, len(statements)
+
+    def test_ticket_page_query_count_is_fixed(self):
+        """Test a page of tickets is served in a fixed number of queries"""
+        with self.app.app_context():
+            mechanic = db.session.get(Mechanic, self.mechanic_id)
+            for i in range(8):
+                ticket = ServiceTicket(
+                    customer_id=self.customer_id,
+                    service_date=date.today(),
+                    description=f"Bulk ticket {i}",
+                    VIN=f"1HGBH41JXMN2000{i:02d}",
+                )
+                ticket.mechanics.append(mechanic)
+                db.session.add(ticket)
+                db.session.flush()
+                db.session.add(
+                    LaborLog(
+                        ticket_id=ticket.ticket_id,
+                        mechanic_id=self.mechanic_id,
+                        hours_worked=2.5,
+                    )
+                )
+            db.session.commit()
+
+        response, small_page = self.count_queries("/service-tickets/?page=1&per_page=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 2)
+
+        response, large_page = self.count_queries("/service-tickets/?page=1&per_page=9")
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(len(data), 9)
+        self.assertEqual(data[-1]["labor_logs"][0]["mechanic"]["name"], "test_mechanic")
+
+        # count + tickets/customer + mechanics + labor logs/mechanic
+        self.assertEqual(small_page, large_page)
+        self.assertLessEqual(large_page, 4)
+
+    def test_find_ticket_query_count(self):
+        """Test a single ticket with relationships is loaded without lazy loads"""
+        self.client.put(
+            f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}"
+        )
+        response, queries = self.count_queries(f"/service-tickets/{self.ticket_id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["customer"]["id"], self.customer_id)
+        # ETag versions + ticket/customer + mechanics + labor logs/mechanic
+        self.assertLessEqual(queries, 4)
+
+    def test_ticket_etag_covers_nested_rows(self):
+        """Test the ticket ETag changes when its mechanics or labor logs change"""
+        url = f"/service-tickets/{self.ticket_id}"
+        etag = self.client.get(url).headers["ETag"]
+        self.assertEqual(self.client.get(url, headers={"If-None-Match": etag}).status_code, 304)
+
+        self.client.put(f"/service-tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}")
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["mechanics"]), 1)
+        etag = response.headers["ETag"]
+
+        with self.app.app_context():
+            db.session.add(
+                LaborLog(ticket_id=self.ticket_id, mechanic_id=self.mechanic_id, hours_worked=2)
+            )
+            db.session.commit()
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()["labor_logs"]), 1)
+
     def tearDown(self):
         """Clean up after tests"""
         with self.app.app_context():